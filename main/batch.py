@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import csv
+import json
+import sys
+from datetime import timedelta
+from typing import Callable, Iterable, TextIO
+
+from timeline import DELIVERED
+
+# The columns of every result, in order
+FIELDS = ["time", "package_id", "address", "city", "zipcode", "deadline",
+          "status", "truck", "delivery_time"]
+
+
+# Name: format_time
+# Function: Formats a time of day as HH:MM
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def format_time(time_of_day: timedelta) -> str:
+    minutes = int(time_of_day.total_seconds()) // 60
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+# Name: parse_query
+# Function: Splits a query line (i.e. "10:30,9" or "10:30,*") into its time
+# and package id. The package id is None for "*" (every package)
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def parse_query(line: str, parse_time: Callable[[str], timedelta]) -> \
+        tuple[timedelta, int | None]:
+    parts = [part.strip() for part in line.split(',')]
+    if len(parts) != 2:
+        raise ValueError("Expected a query in TIME,PACKAGE_ID format.")
+
+    time_of_day = parse_time(parts[0])
+    if parts[1] == '*':
+        return time_of_day, None
+
+    try:
+        return time_of_day, int(parts[1])
+    except ValueError:
+        raise ValueError(f"Invalid package id: {parts[1]}")
+
+
+# Name: run_batch
+# Function: Answers every status query in lines and writes one result per
+# package to output as CSV or JSON lines. The queries are read and answered
+# one at a time, so memory use does not grow with the number of queries.
+# Each distinct scenario is simulated once. Returns the number of queries
+# that could not be answered
+# Time Complexity: O(q * log k) for q results, plus one simulation per
+# scenario
+# Space Complexity: O(s * n) for s scenarios and n packages
+def run_batch(program, lines: Iterable[str], output: TextIO,
+              output_format: str,
+              parse_time: Callable[[str], timedelta]) -> int:
+    if output_format == "csv":
+        writer = csv.writer(output)
+        writer.writerow(FIELDS)
+
+        def write(row: list) -> None:
+            writer.writerow(row)
+    elif output_format == "json":
+        def write(row: list) -> None:
+            output.write(json.dumps(dict(zip(FIELDS, row))) + "\n")
+    else:
+        raise ValueError(f"Unknown output format: {output_format}")
+
+    timelines = {}
+    current_scenario = None
+    timeline = None
+    errors = 0
+
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        # Skip blank lines and comments
+        if not line or line.startswith('#'):
+            continue
+
+        try:
+            time_of_day, package_id = parse_query(line, parse_time)
+            if package_id is not None and \
+                    program.package_hashtable.search(package_id) is None:
+                raise ValueError(f"Unknown package id: {package_id}")
+        except ValueError as e:
+            print(f"Line {line_number}: {e}", file=sys.stderr)
+            errors += 1
+            continue
+
+        # Only switch the package data (and simulate) when the query needs a
+        # different scenario than the previous one
+        scenario = program.address_scenario(time_of_day)
+        if scenario != current_scenario:
+            program.apply_address_corrections(time_of_day)
+            if scenario not in timelines:
+                timelines[scenario] = program.simulate_day()
+            timeline = timelines[scenario]
+            current_scenario = scenario
+
+        if package_id is None:
+            package_ids = program.package_ids
+        else:
+            package_ids = [package_id]
+
+        for result_id in package_ids:
+            package = program.package_hashtable.search(result_id)
+            status = timeline.status_at(result_id, time_of_day)
+            truck_id, delivery_time = timeline.delivery(result_id)
+            write([format_time(time_of_day), result_id,
+                   package.delivery_address, package.delivery_city,
+                   package.delivery_zipcode, package.delivery_deadline,
+                   status, truck_id,
+                   str(delivery_time) if status == DELIVERED else ""])
+
+    return errors
+
@@ -0,0 +1,363 @@
+"""
+Benchmarks for the WGUPS Routing Program.
+
+Run from the main directory:
+
+    python benchmarks.py
+    python benchmarks.py --suites hashtable --sizes 1000 10000 100000 1000000
+    python benchmarks.py --output new.json --baseline old.json
+
+Every suite runs at several data sizes. Each measurement is the best of
+--repeat runs. --output writes the results as JSON, and --baseline compares
+them with an earlier results file and exits with status 1 if any
+measurement is slower by more than --threshold.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+from generator import ScenarioSettings, generate_scenario
+from hashtable import ChainingHashTable, OpenAddressingHashTable
+from main import Main, string_to_timedelta
+from trucks import Truck
+
+HASH_TABLES = [ChainingHashTable, OpenAddressingHashTable]
+
+
+# Name: time_call
+# Function: Returns the number of seconds a call to function takes. Garbage
+# collection is paused so it does not land in the measurement
+# Time Complexity: O(f) for the cost f of function
+# Space Complexity: O(1)
+def time_call(function) -> float:
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        function()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+# Name: best_time
+# Function: Runs setup and then times run on what setup returned, repeat
+# times. Returns the fastest time in seconds. A fresh setup each time keeps
+# runs that change their data (i.e. removing keys) comparable
+# Time Complexity: O(r * (s + f)) for r repeats
+# Space Complexity: O(s)
+def best_time(setup: Callable, run: Callable, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        state = setup()
+        best = min(best, time_call(lambda: run(state)))
+    return best
+
+
+# Name: result
+# Function: Returns one measurement in the format written to the results file
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def result(name: str, size: int, value: float, unit: str = "ns/op") -> dict:
+    return {"name": name, "size": size, "value": value, "unit": unit}
+
+
+# Name: build_program
+# Function: Generates a scenario in a temporary directory and returns a Main
+# object with its data loaded
+# Time Complexity: O(n^2 + p) for n locations and p packages
+# Space Complexity: O(n^2 + p)
+def build_program(locations: int, packages: int, seed: int = 0) -> Main:
+    with tempfile.TemporaryDirectory() as directory:
+        generate_scenario(directory, ScenarioSettings(
+            locations, packages, seed,
+            grid_size=max(100, int(locations ** 0.5) * 4)))
+        program = Main()
+        program.data_directory = directory
+        program.warn_late = False
+        program.load_data()
+    return program
+
+
+# Name: load_truck
+# Function: Returns a truck holding every package of the program, so one
+# truck delivers them all without going through the load planner
+# Time Complexity: O(p)
+# Space Complexity: O(p)
+def load_truck(program: Main) -> Truck:
+    truck = Truck(truck_id=1)
+    for package_id in program.package_ids:
+        package = program.package_hashtable.search(package_id)
+        package.truck_id = truck.truck_id
+        truck.package_collection.append(package)
+        truck.package_id_collection.append(package_id)
+        truck.package_visual_collection.append(package_id)
+    return truck
+
+
+# Name: benchmark_hashtable
+# Function: Times insert, search, remove and resize of size package ids on
+# one hash table class and measures the memory the filled table holds
+# Time Complexity: O(r * n) for r repeats
+# Space Complexity: O(n)
+def benchmark_hashtable(table_class, size: int, repeat: int = 1,
+                        seed: int = 0) -> list[dict]:
+    package_ids = list(range(1, size + 1))
+    random.Random(seed).shuffle(package_ids)
+    name = f"hashtable.{table_class.__name__}"
+
+    def empty():
+        return table_class()
+
+    def filled():
+        table = table_class()
+        insert_all(table)
+        return table
+
+    def insert_all(table):
+        for package_id in package_ids:
+            table.insert(package_id, package_id)
+
+    def search_all(table):
+        for package_id in package_ids:
+            table.search(package_id)
+
+    def remove_all(table):
+        for package_id in package_ids:
+            table.remove(package_id)
+
+    results = [
+        result(f"{name}.insert", size,
+               best_time(empty, insert_all, repeat) / size * 1e9),
+        result(f"{name}.search", size,
+               best_time(filled, search_all, repeat) / size * 1e9),
+        result(f"{name}.remove", size,
+               best_time(filled, remove_all, repeat) / size * 1e9),
+        # One resize of a full table, per item moved
+        result(f"{name}.resize", size,
+               best_time(filled, lambda table: table.resize(), repeat)
+               / size * 1e9),
+    ]
+
+    # Measure memory on a separate table because tracemalloc slows down the
+    # code it traces
+    tracemalloc.start()
+    table = filled()
+    results.append(result(f"{name}.memory", size,
+                          tracemalloc.get_traced_memory()[0] / size,
+                          "bytes/item"))
+    tracemalloc.stop()
+    del table
+    return results
+
+
+# Name: benchmark_hashtables
+# Function: Benchmarks every hash table class at one size
+# Time Complexity: O(t * r * n) for t hash table classes
+# Space Complexity: O(n)
+def benchmark_hashtables(size: int, repeat: int) -> list[dict]:
+    results = []
+    for table_class in HASH_TABLES:
+        results.extend(benchmark_hashtable(table_class, size, repeat))
+    return results
+
+
+# Name: benchmark_distances
+# Function: Times Main.calculate_distance on random pairs of locations and
+# Main.min_distance_from_address with a truck-sized set of pending stops,
+# on a map with size locations
+# Time Complexity: O(n^2 log n) to build the map
+# Space Complexity: O(n^2)
+def benchmark_distances(size: int, repeat: int) -> list[dict]:
+    program = build_program(size, 1)
+    rng = random.Random(0)
+    calls = 100000
+    pairs = [(rng.randrange(size), rng.randrange(size)) for _ in range(calls)]
+    # A truck visits up to 16 stops. The queries share 1000 pending sets, so
+    # large maps do not need a set per query
+    pending_sets = [program.distance_matrix.pending_set(
+                        rng.sample(range(size), min(16, size)))
+                    for _ in range(1000)]
+    queries = [(rng.randrange(size), pending_sets[query % 1000])
+               for query in range(calls)]
+
+    def distance_all(_):
+        calculate_distance = program.calculate_distance
+        for l1, l2 in pairs:
+            calculate_distance(l1, l2)
+
+    def nearest_all(_):
+        min_distance_from_address = program.min_distance_from_address
+        for location, pending in queries:
+            min_distance_from_address(location, pending)
+
+    return [
+        result("main.calculate_distance", size,
+               best_time(lambda: None, distance_all, repeat) / calls * 1e9),
+        result("main.min_distance_from_address", size,
+               best_time(lambda: None, nearest_all, repeat) / calls * 1e9),
+    ]
+
+
+# Name: benchmark_delivery
+# Function: Times one truck_deliver_packages run that delivers size
+# packages, per package delivered
+# Time Complexity: O(r * p^2) for r repeats, because delivered packages are
+# removed from the truck's list one at a time
+# Space Complexity: O(n^2 + p)
+def benchmark_delivery(size: int, repeat: int) -> list[dict]:
+    program = build_program(min(max(27, size // 4), 1000), size)
+
+    def run(truck):
+        program.truck_deliver_packages(truck)
+
+    return [result("main.truck_deliver_packages", size,
+                   best_time(lambda: load_truck(program), run, repeat)
+                   / size * 1e9)]
+
+
+# Name: benchmark_time_parsing
+# Function: Times string_to_timedelta on size valid HH:MM strings
+# Time Complexity: O(r * n)
+# Space Complexity: O(n)
+def benchmark_time_parsing(size: int, repeat: int) -> list[dict]:
+    rng = random.Random(0)
+    texts = [f"{rng.randrange(24)}:{rng.randrange(60):02d}"
+             for _ in range(size)]
+
+    def parse_all(_):
+        for text in texts:
+            string_to_timedelta(text)
+
+    return [result("main.string_to_timedelta", size,
+                   best_time(lambda: None, parse_all, repeat) / size * 1e9)]
+
+
+# Name: benchmark_reports
+# Function: Times the report loops of print_package_status and
+# lookup_all_packages over size delivered packages, per package. Output goes
+# to a string buffer so the terminal does not land in the measurement
+# Time Complexity: O(r * p)
+# Space Complexity: O(p)
+def benchmark_reports(size: int, repeat: int) -> list[dict]:
+    program = build_program(27, size)
+    program.truck_deliver_packages(load_truck(program))
+
+    def report(method):
+        def run(_):
+            with contextlib.redirect_stdout(io.StringIO()):
+                method()
+        return run
+
+    return [
+        result("main.print_package_status", size,
+               best_time(lambda: None, report(program.print_package_status),
+                         repeat) / size * 1e9),
+        result("main.lookup_all_packages", size,
+               best_time(lambda: None, report(program.lookup_all_packages),
+                         repeat) / size * 1e9),
+    ]
+
+
+# Every suite, with the function that runs it at one size and its default
+# sizes
+SUITES = {
+    "hashtable": (benchmark_hashtables, [1000, 10000, 100000]),
+    "distance": (benchmark_distances, [27, 300, 1000]),
+    "delivery": (benchmark_delivery, [40, 1000, 5000]),
+    "time": (benchmark_time_parsing, [1000, 100000]),
+    "reports": (benchmark_reports, [40, 1000, 10000]),
+}
+
+
+# Name: run_suites
+# Function: Runs the suites at their sizes (or the given sizes) and prints
+# each result as it is measured. Returns every result
+# Time Complexity: O(sum of the suites' costs)
+# Space Complexity: O(r) for r results
+def run_suites(names: list[str], sizes: list[int] | None,
+               repeat: int) -> list[dict]:
+    results = []
+    print(f"{'Benchmark':<48} {'Size':>9} {'Value':>12} Unit")
+    for name in names:
+        function, default_sizes = SUITES[name]
+        for size in sizes or default_sizes:
+            for measurement in function(size, repeat):
+                results.append(measurement)
+                print(f"{measurement['name']:<48} {measurement['size']:>9} "
+                      f"{measurement['value']:>12.1f} {measurement['unit']}")
+    return results
+
+
+# Name: compare
+# Function: Prints each result next to the same measurement in the
+# baseline. Returns the number of measurements that got worse by more than
+# threshold (i.e. 0.1 for 10%)
+# Time Complexity: O(r)
+# Space Complexity: O(r)
+def compare(results: list[dict], baseline: list[dict],
+            threshold: float) -> int:
+    previous = {(entry["name"], entry["size"]): entry["value"]
+                for entry in baseline}
+    regressions = 0
+    print(f"\n{'Benchmark':<48} {'Size':>9} {'Baseline':>12} "
+          f"{'Now':>12} {'Change':>8}")
+    for entry in results:
+        old = previous.get((entry["name"], entry["size"]))
+        if old is None or old == 0:
+            continue
+        change = entry["value"] / old - 1
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = " REGRESSION"
+        print(f"{entry['name']:<48} {entry['size']:>9} {old:>12.1f} "
+              f"{entry['value']:>12.1f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WGUPS benchmarks")
+    parser.add_argument("--suites", nargs="+", choices=list(SUITES),
+                        default=list(SUITES), help="suites to run")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        help="data sizes to run every chosen suite at "
+                             "(default: each suite's own sizes)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per measurement; the fastest is kept")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write the results to FILE as JSON")
+    parser.add_argument("--baseline", metavar="FILE",
+                        help="compare the results with an earlier --output "
+                             "file")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="slowdown that counts as a regression "
+                             "(default: 0.1 for 10%%)")
+    args = parser.parse_args()
+
+    results = run_suites(args.suites, args.sizes, max(1, args.repeat))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"python": platform.python_version(),
+                       "platform": platform.platform(),
+                       "cpus": os.cpu_count(),
+                       "repeat": args.repeat,
+                       "results": results}, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        sys.exit(1 if compare(results, baseline, args.threshold) else 0)
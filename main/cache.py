@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Hashable
+
+from timeline import DeliveryTimeline
+
+
+class SimulationCache:
+    """
+    A least recently used (LRU) cache of simulated days.
+
+    Each entry maps the inputs of a scenario to the delivery timeline the
+    scenario produced. The inputs are the routing settings and, for every
+    truck, its departure time and the id, location id, deadline, weight and
+    notes of every package loaded onto it. Because every input is part of
+    the key, a changed package never finds a stale day, and both addresses
+    of package 9 are cached side by side.
+
+    === Instance Attributes ===
+    capacity: The most scenarios kept before the least recently used one is
+    evicted
+
+    hits: The number of lookups that found a cached scenario
+
+    misses: The number of lookups that did not find a cached scenario
+
+    === Private Attributes ===
+    _entries: Maps a scenario key to its delivery timeline, ordered from least
+    to most recently used
+    """
+    capacity: int
+    hits: int
+    misses: int
+    _entries: OrderedDict
+
+    # Name: __init__
+    # Function: Initializes simulation cache object
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __init__(self, capacity: int = 16) -> None:
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    # Name: get
+    # Function: Returns the timeline cached for a scenario key, or None if the
+    # scenario has not been simulated
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def get(self, key: Hashable) -> DeliveryTimeline | None:
+        timeline = self._entries.get(key)
+        if timeline is None:
+            self.misses += 1
+            return None
+
+        # Mark the scenario as the most recently used
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return timeline
+
+    # Name: put
+    # Function: Caches the timeline of a scenario and evicts the least
+    # recently used scenario if the cache is full
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def put(self, key: Hashable, timeline: DeliveryTimeline) -> None:
+        self._entries[key] = timeline
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    # Name: clear
+    # Function: Removes every cached scenario
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def clear(self) -> None:
+        self._entries.clear()
+
+    # Name: __len__
+    # Function: Returns the number of cached scenarios
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+# Trucks drive 18 miles per hour, so a mile takes 200 seconds
+SECONDS_PER_MILE = 200
+# The time drivers start, in seconds since midnight
+DAY_START = 8 * 3600
+
+
+# Name: travel_seconds
+# Function: Returns the number of seconds a truck takes to drive a number of
+# miles. Distances are given in tenths of a mile, and a tenth of a mile
+# takes exactly 20 seconds, so no time is lost to rounding
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def travel_seconds(miles: float) -> int:
+    return round(miles * SECONDS_PER_MILE)
+
+
+# Name: to_seconds
+# Function: Converts a timedelta to whole seconds
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def to_seconds(time: timedelta) -> int:
+    return round(time.total_seconds())
+
+
+# Name: to_timedelta
+# Function: Converts seconds to a timedelta, for reports
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def to_timedelta(seconds: int) -> timedelta:
+    return timedelta(seconds=seconds)
+
+
+# Name: deadline_seconds
+# Function: Converts a deadline from the package file (i.e. 10:30:00 or EOD)
+# to seconds since midnight. EOD returns None
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def deadline_seconds(deadline: str) -> int | None:
+    if deadline.strip().upper() == "EOD":
+        return None
+    parts = deadline.split(':')
+    return int(parts[0]) * 3600 + int(parts[1]) * 60
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import heapq
+
+from clock import DAY_START, travel_seconds
+from distances import DistanceMatrix
+
+
+class Dispatcher:
+    """
+    Assigns drivers to trucks with a priority queue of the times drivers are
+    available at the hub and a priority queue of the trucks waiting for a
+    driver. Times are in seconds since midnight.
+
+    Whenever a driver is available, they take the waiting truck that is
+    ready to leave first, with the lowest truck id breaking ties. The truck
+    leaves once both that driver and its packages are ready. When the
+    truck's trip ends, its driver is available again.
+
+    === Instance Attributes ===
+    drivers: The number of drivers
+
+    === Private Attributes ===
+    _available: A heap of (time, driver number) pairs, one per driver at
+    the hub. Drivers on a trip are not in the heap
+
+    _waiting: A heap of (earliest departure, truck id, item) triples, one
+    per truck waiting for a driver. item is whatever the caller keeps for
+    the truck, and is handed back by dispatch
+
+    _on_trip: The number of drivers on a trip
+    """
+    drivers: int
+    _available: list[tuple[int, int]]
+    _waiting: list[tuple[int, int, object]]
+    _on_trip: int
+
+    # Name: __init__
+    # Function: Initializes dispatcher object with every driver available at
+    # start_time
+    # Time Complexity: O(d)
+    # Space Complexity: O(d)
+    def __init__(self, drivers: int, start_time: int = DAY_START) -> None:
+        if drivers < 1:
+            raise ValueError("At least one driver is needed.")
+        self.drivers = drivers
+        # Every driver starts at the same time, so the list is already a heap
+        self._available = [(start_time, driver) for driver in range(drivers)]
+        self._waiting = []
+        self._on_trip = 0
+
+    # Name: next_available
+    # Function: Returns the time the next driver at the hub is available, or
+    # None if every driver is on a trip
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def next_available(self) -> int | None:
+        if not self._available:
+            return None
+        return self._available[0][0]
+
+    # Name: assign
+    # Function: Gives the first available driver to a truck that can leave
+    # no earlier than earliest_departure. Returns the driver and the time the
+    # truck leaves
+    # Time Complexity: O(log d)
+    # Space Complexity: O(1)
+    def assign(self, earliest_departure: int) -> tuple[int, int]:
+        if not self._available:
+            raise ValueError("Every driver is already on a trip.")
+        available, driver = heapq.heappop(self._available)
+        self._on_trip += 1
+        return driver, max(available, earliest_departure)
+
+    # Name: add_truck
+    # Function: Adds a truck that waits for a driver and can leave no earlier
+    # than earliest_departure. item is returned by dispatch with the truck
+    # Time Complexity: O(log t) for t waiting trucks
+    # Space Complexity: O(1)
+    def add_truck(self, earliest_departure: int, truck_id: int,
+                  item=None) -> None:
+        heapq.heappush(self._waiting, (earliest_departure, truck_id, item))
+
+    # Name: waiting
+    # Function: Returns the number of trucks waiting for a driver
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def waiting(self) -> int:
+        return len(self._waiting)
+
+    # Name: dispatch
+    # Function: Gives the first available driver to the waiting truck that
+    # is ready first. Returns the truck's item, the driver and the time the
+    # truck leaves
+    # Time Complexity: O(log d + log t) for d drivers and t waiting trucks
+    # Space Complexity: O(1)
+    def dispatch(self) -> tuple[object, int, int]:
+        if not self._waiting:
+            raise ValueError("No truck is waiting for a driver.")
+        earliest_departure, _, item = heapq.heappop(self._waiting)
+        driver, departure = self.assign(earliest_departure)
+        return item, driver, departure
+
+    # Name: release
+    # Function: Marks a driver as available again at a time, i.e. when their
+    # truck is back at the hub
+    # Time Complexity: O(log d)
+    # Space Complexity: O(1)
+    def release(self, driver: int, time: int) -> None:
+        self._on_trip -= 1
+        heapq.heappush(self._available, (time, driver))
+
+    # Name: on_trip
+    # Function: Returns the number of drivers on a trip
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def on_trip(self) -> int:
+        return self._on_trip
+
+
+# Name: return_travel
+# Function: Returns the miles and the seconds it takes to drive from the
+# last stop of a route back to the hub
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def return_travel(matrix: DistanceMatrix, hub: int,
+                  route: list[int]) -> tuple[float, int]:
+    if not route:
+        return 0.0, 0
+    miles = matrix.distance(route[-1], hub)
+    return miles, travel_seconds(miles)
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import csv
+from array import array
+from typing import Iterable
+
+
+class DistanceMatrix:
+    """
+    A symmetric matrix of the distances (in miles) between every pair of
+    locations.
+
+    The distances file only stores the lower triangle of the matrix as text.
+    The matrix is parsed once when it is loaded and mirrored into a full
+    square so that a distance can be read directly with any index order.
+    The values are kept in one contiguous array of floats in row-major order.
+
+    === Instance Attributes ===
+    size: The number of locations (rows and columns) in the matrix
+
+    values: A flat array of floats that holds the distance between location
+    i and location j at index i * size + j
+
+    neighbors: A flat array of location ids. Row i (starting at index
+    i * size) lists every location ordered from nearest to farthest from
+    location i. Location i itself always comes first. It is None until
+    build_neighbor_index is called
+
+    === Representation Invariants ===
+    - values has exactly size * size elements.
+    - The distance from a location to itself is 0.
+    - The distance from location i to location j is equal to the distance from
+    location j to location i.
+    - No distance is negative.
+    """
+    size: int
+    values: array
+    neighbors: array | None
+
+    # Name: __init__
+    # Function: Initializes distance matrix object
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __init__(self, size: int, values: array) -> None:
+        """
+        Initialize distance matrix.
+
+        The constructor takes the number of locations and an already filled,
+        full (not triangular) array of distances.
+        """
+        self.size = size
+        self.values = values
+        self.neighbors = None
+
+    # Name: from_lower_triangle
+    # Function: Builds a full symmetric matrix from rows of a lower triangle
+    # Time Complexity: O(n^2)
+    # Space Complexity: O(n^2)
+    @classmethod
+    def from_lower_triangle(cls, rows: list[list[str]]) -> DistanceMatrix:
+        size = len(rows)
+        values = array('d', bytes(8 * size * size))
+
+        for i, row in enumerate(rows):
+            # Every row must hold the distances up to and including the
+            # diagonal. Anything after the diagonal is ignored.
+            if len(row) <= i:
+                raise ValueError(f"Distance row {i} is missing values.")
+
+            for j in range(i + 1):
+                cell = row[j].strip()
+                if cell == '':
+                    raise ValueError(
+                        f"Missing distance between locations {i} and {j}.")
+
+                distance = float(cell)
+                if distance < 0:
+                    raise ValueError(
+                        f"Negative distance between locations {i} and {j}.")
+                if i == j and distance != 0:
+                    raise ValueError(
+                        f"Distance from location {i} to itself is not 0.")
+
+                # Mirror the value into the upper triangle
+                values[i * size + j] = distance
+                values[j * size + i] = distance
+
+        return cls(size, values)
+
+    # Name: read_csv
+    # Function: Reads a lower-triangular distance CSV file into a matrix
+    # Time Complexity: O(n^2)
+    # Space Complexity: O(n^2)
+    @classmethod
+    def read_csv(cls, filename: str) -> DistanceMatrix:
+        with open(filename) as distances:
+            rows = [row for row in csv.reader(distances, delimiter=',')]
+        return cls.from_lower_triangle(rows)
+
+    # Name: distance
+    # Function: Returns the distance between location i and location j
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def distance(self, i: int, j: int) -> float:
+        return self.values[i * self.size + j]
+
+    # Name: row
+    # Function: Returns a copy of the distances from location i to every
+    # location
+    # Time Complexity: O(n)
+    # Space Complexity: O(n)
+    def row(self, i: int) -> array:
+        start = i * self.size
+        return self.values[start:start + self.size]
+
+    # Name: build_neighbor_index
+    # Function: Sorts the other locations by distance for every location so
+    # the nearest location can be found without scanning a whole row
+    # Time Complexity: O(n^2 log n)
+    # Space Complexity: O(n^2)
+    def build_neighbor_index(self) -> None:
+        size = self.size
+        neighbors = array('i')
+
+        for i in range(size):
+            row = self.row(i)
+            # Sorting is stable, so locations at the same distance stay
+            # ordered by their id
+            order = sorted(range(size), key=row.__getitem__)
+            # Put the location itself first even if another location is
+            # also 0 miles away
+            order.remove(i)
+            neighbors.append(i)
+            neighbors.extend(order)
+
+        self.neighbors = neighbors
+
+    # Name: pending_set
+    # Function: Returns a pending set for nearest_pending and closest: a
+    # bytearray with one byte per location, set to 1 for every location in
+    # locations. A location is checked or removed by indexing it directly
+    # Time Complexity: O(n)
+    # Space Complexity: O(n)
+    def pending_set(self, locations: Iterable[int]) -> bytearray:
+        pending = bytearray(self.size)
+        for location in locations:
+            pending[location] = 1
+        return pending
+
+    # Name: nearest_pending
+    # Function: Returns the nearest location to location i that is set in
+    # the pending set, or -1 if no location is pending
+    # Time Complexity: O(n) in the worst case, O(1) when a pending location
+    # is close to location i
+    # Space Complexity: O(1)
+    def nearest_pending(self, i: int, pending: bytearray) -> int:
+        if self.neighbors is None:
+            self.build_neighbor_index()
+
+        neighbors = self.neighbors
+        start = i * self.size
+        for k in range(start, start + self.size):
+            location = neighbors[k]
+            if pending[location]:
+                return location
+        return -1
+
+    # Name: closest
+    # Function: Returns up to k of the nearest locations to location i. If a
+    # pending set is given, only locations set in it are returned
+    # Time Complexity: O(n)
+    # Space Complexity: O(k)
+    def closest(self, i: int, k: int,
+                pending: bytearray | None = None) -> list[int]:
+        if self.neighbors is None:
+            self.build_neighbor_index()
+
+        result = []
+        neighbors = self.neighbors
+        start = i * self.size
+        for index in range(start, start + self.size):
+            if len(result) == k:
+                break
+            location = neighbors[index]
+            if pending is None or pending[location]:
+                result.append(location)
+        return result
+
+    # Name: __len__
+    # Function: Returns the number of locations in the matrix
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __len__(self) -> int:
+        return self.size
@@ -0,0 +1,341 @@
+"""
+Synthetic scenario generator for the WGUPS Routing Program.
+
+Writes locations.csv, distances.csv and packages.csv in the same format as
+the files in the data directory. Run from the main directory:
+
+    python generator.py ../scenarios/large --locations 500 --packages 10000
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import random
+from typing import TextIO
+
+# Location 0 is always the hub, at the address the program expects
+HUB_NAME = "Western Governors University"
+HUB_ADDRESS = "4001 South 700 East"
+
+# The notes used for each kind of special package. The planner reads these
+# the same way as the notes in the real package file
+TRUCK_NOTE = "Can only be on truck {truck}"
+DELAYED_NOTE = "Delayed on flight---will not arrive to depot until 9:05 am"
+WRONG_ADDRESS_NOTE = "Wrong address listed"
+WITH_NOTE = "Must be delivered with {packages}"
+
+# The most packages a truck carries. No truck is given more packages that
+# can only be on it
+TRUCK_CAPACITY = 16
+
+# Packages due before the delayed flight lands cannot be delayed
+DELAY_SAFE_DEADLINES = {"10:30:00", "EOD"}
+
+# The default share of packages with each deadline. The rest are due by the
+# end of day
+DEFAULT_DEADLINES = {"9:00:00": 0.025, "10:30:00": 0.35}
+
+
+class ScenarioSettings:
+    """
+    The parameters of a generated scenario.
+
+    === Instance Attributes ===
+    locations: The number of locations, including the hub
+
+    packages: The number of packages
+
+    seed: The seed of the random number generator. The same settings and
+    seed always write the same files
+
+    deadlines: The share (0 to 1) of packages due at each deadline. Packages
+    not given a deadline are due by the end of day (EOD)
+
+    truck_note_rate: The share of packages that can only be on one truck
+
+    trucks: The number of trucks the scenario is run with. Packages that can
+    only be on one truck are spread over the trucks
+
+    delayed_rate: The share of packages delayed on a flight until 9:05 AM
+
+    wrong_address_rate: The share of packages with a wrong address
+
+    group_rate: The share of packages that must be delivered with two other
+    packages
+
+    grid_size: The width and height of the map in tenths of a mile
+
+    === Representation Invariants ===
+    - locations >= 2
+    - trucks >= 1
+    - Every rate is between 0 and 1, and the deadline shares add up to at
+    most 1.
+    """
+    locations: int
+    packages: int
+    seed: int
+    deadlines: dict[str, float]
+    truck_note_rate: float
+    delayed_rate: float
+    wrong_address_rate: float
+    group_rate: float
+    grid_size: int
+    trucks: int
+
+    # Name: __init__
+    # Function: Initializes scenario settings object
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __init__(self, locations: int = 27, packages: int = 40,
+                 seed: int = 0, deadlines: dict[str, float] | None = None,
+                 truck_note_rate: float = 0.1, delayed_rate: float = 0.1,
+                 wrong_address_rate: float = 0.025, group_rate: float = 0.075,
+                 grid_size: int = 100, trucks: int = 3) -> None:
+        self.locations = locations
+        self.packages = packages
+        self.seed = seed
+        self.deadlines = dict(DEFAULT_DEADLINES if deadlines is None
+                              else deadlines)
+        self.truck_note_rate = truck_note_rate
+        self.delayed_rate = delayed_rate
+        self.wrong_address_rate = wrong_address_rate
+        self.group_rate = group_rate
+        self.grid_size = grid_size
+        self.trucks = trucks
+
+        if locations < 2:
+            raise ValueError("A scenario needs the hub and one more location.")
+        if packages < 0:
+            raise ValueError("The number of packages cannot be negative.")
+        if trucks < 1:
+            raise ValueError("A scenario needs at least one truck.")
+        rates = [truck_note_rate, delayed_rate, wrong_address_rate,
+                 group_rate, *self.deadlines.values()]
+        if any(rate < 0 or rate > 1 for rate in rates) or \
+                sum(self.deadlines.values()) > 1:
+            raise ValueError("Rates must be between 0 and 1.")
+        # Every location needs its own point on the grid
+        if (grid_size + 1) ** 2 < locations:
+            raise ValueError("The grid is too small for that many locations.")
+
+
+# Name: generate_points
+# Function: Places every location on a different point of the grid. The hub
+# is placed in the middle
+# Time Complexity: O(n)
+# Space Complexity: O(n)
+def generate_points(settings: ScenarioSettings,
+                    rng: random.Random) -> list[tuple[int, int]]:
+    middle = settings.grid_size // 2
+    points = [(middle, middle)]
+    used = {points[0]}
+    while len(points) < settings.locations:
+        point = (rng.randint(0, settings.grid_size),
+                 rng.randint(0, settings.grid_size))
+        if point not in used:
+            used.add(point)
+            points.append(point)
+    return points
+
+
+# Name: point_address
+# Function: Returns a street address for a point on the grid, in the style
+# of Salt Lake City's grid addresses. Different points get different
+# addresses
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def point_address(point: tuple[int, int], middle: int) -> str:
+    x, y = point
+    east = (x - middle) * 100
+    south = (y - middle) * 100
+    # Every point gets a unique house number from its row, on the street of
+    # its column
+    street = f"{abs(east)} {'E' if east >= 0 else 'W'}"
+    return f"{abs(south) + 1} {'S' if south >= 0 else 'N'} {street}"
+
+
+# Name: write_locations
+# Function: Writes the location file. Returns the address of every location
+# Time Complexity: O(n)
+# Space Complexity: O(n)
+def write_locations(file: TextIO, points: list[tuple[int, int]],
+                    middle: int) -> list[str]:
+    writer = csv.writer(file, lineterminator='\n')
+    addresses = [HUB_ADDRESS]
+    writer.writerow([0, HUB_NAME, HUB_ADDRESS])
+    for location_id in range(1, len(points)):
+        address = point_address(points[location_id], middle)
+        addresses.append(address)
+        writer.writerow([location_id, f"Location {location_id}", address])
+    return addresses
+
+
+# Name: write_distances
+# Function: Writes the lower triangle of the distance matrix, one row at a
+# time. Distances are the grid (Manhattan) distance between the points in
+# tenths of a mile, so they are exact at one decimal place and follow the
+# triangle inequality. Only the points are kept in memory, never the matrix
+# Time Complexity: O(n^2)
+# Space Complexity: O(n)
+def write_distances(file: TextIO, points: list[tuple[int, int]]) -> None:
+    size = len(points)
+    for i, (x, y) in enumerate(points):
+        cells = []
+        for j in range(i):
+            other_x, other_y = points[j]
+            tenths = abs(x - other_x) + abs(y - other_y)
+            cells.append(f"{tenths // 10}.{tenths % 10}")
+        cells.append("0")
+        # Pad the row with empty cells like the upper triangle of the
+        # original file
+        file.write(",".join(cells) + "," * (size - i - 1) + "\n")
+
+
+# Name: write_packages
+# Function: Writes the package file. Each package goes to a random location
+# other than the hub, with a deadline and special notes drawn from the
+# settings
+# Time Complexity: O(p)
+# Space Complexity: O(p)
+def write_packages(file: TextIO, settings: ScenarioSettings,
+                   addresses: list[str], points: list[tuple[int, int]],
+                   rng: random.Random) -> None:
+    deadlines = list(settings.deadlines)
+    shares = list(settings.deadlines.values())
+    deadlines.append("EOD")
+    shares.append(1 - sum(shares))
+
+    count = settings.packages
+    notes = ["N/A"] * count
+    package_deadlines = rng.choices(deadlines, shares, k=count)
+
+    # Pick the packages that are grouped first. Each group is three packages
+    # in a row, and grouped packages get no other note so a group never has
+    # conflicting constraints
+    grouped = set()
+    package = 0
+    while package + 2 < count:
+        if rng.random() < settings.group_rate:
+            members = [package, package + 1, package + 2]
+            for member in members:
+                others = [str(other + 1) for other in members
+                          if other != member]
+                notes[member] = WITH_NOTE.format(
+                    packages=" & ".join(others))
+                grouped.add(member)
+            package += 3
+        else:
+            package += 1
+
+    # Packages that can only be on one truck go to the trucks in turn,
+    # starting with truck 2 like the original file, so no truck is given
+    # more of them than it can carry
+    trucks = settings.trucks
+    pinned = 0
+    for package in range(count):
+        if package in grouped:
+            continue
+        roll = rng.random()
+        if roll < settings.truck_note_rate:
+            if pinned < trucks * TRUCK_CAPACITY:
+                notes[package] = TRUCK_NOTE.format(
+                    truck=(pinned % trucks + 1) % trucks + 1)
+                pinned += 1
+            continue
+        roll -= settings.truck_note_rate
+        if roll < settings.delayed_rate:
+            if package_deadlines[package] in DELAY_SAFE_DEADLINES:
+                notes[package] = DELAYED_NOTE
+            continue
+        roll -= settings.delayed_rate
+        if roll < settings.wrong_address_rate:
+            notes[package] = WRONG_ADDRESS_NOTE
+            package_deadlines[package] = "EOD"
+
+    middle = settings.grid_size // 2
+    writer = csv.writer(file, lineterminator='\n')
+    for package in range(count):
+        location_id = rng.randrange(1, len(addresses))
+        x, y = points[location_id]
+        # Split the map into zip code areas of 20 by 20 tenths of a mile
+        zipcode = 84100 + (x // 20) * 10 + (y // 20) % 10
+        city = "Salt Lake City" if abs(x - middle) + abs(y - middle) < \
+            middle else "Millcreek"
+        # End every row with a comma like the original file
+        writer.writerow([package + 1, addresses[location_id], city, "UT",
+                         zipcode, package_deadlines[package],
+                         rng.randint(1, 88), notes[package], ""])
+
+
+# Name: generate_scenario
+# Function: Writes locations.csv, distances.csv and packages.csv for the
+# settings into a directory, creating it if needed
+# Time Complexity: O(n^2 + p) for n locations and p packages
+# Space Complexity: O(n + p)
+def generate_scenario(directory: str, settings: ScenarioSettings) -> None:
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(settings.seed)
+    points = generate_points(settings, rng)
+    middle = settings.grid_size // 2
+
+    with open(os.path.join(directory, "locations.csv"), "w",
+              newline='') as file:
+        addresses = write_locations(file, points, middle)
+    with open(os.path.join(directory, "distances.csv"), "w",
+              newline='') as file:
+        write_distances(file, points)
+    with open(os.path.join(directory, "packages.csv"), "w",
+              newline='') as file:
+        write_packages(file, settings, addresses, points, rng)
+
+
+# Name: parse_deadlines
+# Function: Parses a deadline mix such as "9:00:00=0.05,10:30:00=0.3"
+# Time Complexity: O(n)
+# Space Complexity: O(n)
+def parse_deadlines(text: str) -> dict[str, float]:
+    deadlines = {}
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        deadline, _, share = part.partition('=')
+        try:
+            deadlines[deadline.strip()] = float(share)
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                f"Expected DEADLINE=SHARE but found {part!r}")
+    return deadlines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic WGUPS scenario")
+    parser.add_argument("directory", help="directory to write the files to")
+    parser.add_argument("--locations", type=int, default=27,
+                        help="number of locations, including the hub")
+    parser.add_argument("--packages", type=int, default=40,
+                        help="number of packages")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--deadlines", type=parse_deadlines,
+                        default=DEFAULT_DEADLINES,
+                        help="share of packages due at each deadline, i.e. "
+                             "9:00:00=0.025,10:30:00=0.35 (the rest are EOD)")
+    parser.add_argument("--truck-note-rate", type=float, default=0.1)
+    parser.add_argument("--trucks", type=int, default=3,
+                        help="number of trucks the packages that can only "
+                             "be on one truck are spread over (default: 3)")
+    parser.add_argument("--delayed-rate", type=float, default=0.1)
+    parser.add_argument("--wrong-address-rate", type=float, default=0.025)
+    parser.add_argument("--group-rate", type=float, default=0.075)
+    parser.add_argument("--grid-size", type=int, default=100,
+                        help="width of the map in tenths of a mile")
+    args = parser.parse_args()
+
+    try:
+        generate_scenario(args.directory, ScenarioSettings(
+            args.locations, args.packages, args.seed, args.deadlines,
+            args.truck_note_rate, args.delayed_rate, args.wrong_address_rate,
+            args.group_rate, args.grid_size, args.trucks))
+    except ValueError as e:
+        parser.error(str(e))
@@ -149,6 +149,222 @@ class ChainingHashTable:
                 self.insert(key, item)
 
 
+class OpenAddressingHashTable:
+    """
+    An open addressing hash table with the same interface as
+    ChainingHashTable. Keys and values are stored in two parallel lists
+    instead of a list of [key, value] lists per bucket, so no list is
+    allocated per item.
+    This type of hash table uses linear probing to handle collisions. If the
+    slot the hash function returns is occupied by another key, the next slot
+    is tried, and so on.
+    The hash of a key is scrambled with Fibonacci hashing (multiplying by
+    2^64 divided by the golden ratio and keeping the top bits) so that runs of
+    consecutive package ids do not fill runs of consecutive slots. This
+    needs the capacity to be a power of two.
+    A removed item leaves a tombstone behind so that searches for keys placed
+    after it keep probing past the removed slot.
+
+    === Instance Attributes ===
+    keys: A list that holds the key in each slot. A slot is empty if it holds
+    EMPTY and removed if it holds TOMBSTONE
+
+    values: A list that holds the value for the key in the same slot of keys
+
+    capacity: An integer that represents the number of slots in the hash
+    table. It is always a power of two
+
+    size: An integer that represents the number of items in the hash table
+
+    used: An integer that represents the number of slots that are not empty
+    (items and tombstones)
+
+    shift: The number of bits to drop from a 64 bit scrambled hash to get a
+    slot index
+
+    MAX_LOAD_FACTOR: A float constant that represents the load factor: the
+    ratio between the number of used slots and the capacity of the hash table
+    """
+    keys: list
+    values: list
+    capacity: int
+    size: int
+    used: int
+    shift: int
+    MAX_LOAD_FACTOR: float  # Constant value: The load factor threshold
+
+    # Markers for empty and removed slots. They are unique objects so they
+    # can never be equal to a real key
+    EMPTY = object()
+    TOMBSTONE = object()
+
+    # 2^64 divided by the golden ratio, used to scramble hashes
+    FIBONACCI = 11400714819323198485
+    MASK_64 = (1 << 64) - 1
+
+    # Name: __init__
+    # Function: Initializes constructor for OpenAddressingHashTable class
+    # Time Complexity: O(n)
+    # Space Complexity: O(n)
+    def __init__(self, capacity: int = 10):
+        """
+        Initialize open addressing hash table.
+
+        Every slot starts empty. If no capacity is inputted, the hash table
+        will default to start with 16 slots (10 rounded up to a power of two).
+        """
+        self.MAX_LOAD_FACTOR = 0.75
+        self._allocate(capacity)
+        self.size = 0
+        self.used = 0
+
+    # Name: _allocate
+    # Function: Creates empty key and value lists with at least capacity
+    # slots, rounded up to a power of two
+    # Time Complexity: O(n)
+    # Space Complexity: O(n)
+    def _allocate(self, capacity: int) -> None:
+        bits = max(3, (capacity - 1).bit_length())
+        self.capacity = 1 << bits
+        self.shift = 64 - bits
+        self.keys = [self.EMPTY] * self.capacity
+        self.values = [None] * self.capacity
+
+    # Name: _find_slot
+    # Function: Returns the slot that holds the key, or -1 if the key is not
+    # in the hash table
+    # Time Complexity: O(1) average
+    # Space Complexity: O(1)
+    def _find_slot(self, key) -> int:
+        keys = self.keys
+        mask = self.capacity - 1
+        slot = (hash(key) * self.FIBONACCI & self.MASK_64) >> self.shift
+        empty = self.EMPTY
+        tombstone = self.TOMBSTONE
+
+        # Probe until the key or an empty slot is found. Tombstones are
+        # skipped. The load factor guarantees an empty slot exists
+        while True:
+            current = keys[slot]
+            if current is empty:
+                return -1
+            if current is not tombstone and current == key:
+                return slot
+            slot = (slot + 1) & mask
+
+    # Name: insert
+    # Function: Inserts key-value pair into hash table
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def insert(self, key, item):
+        keys = self.keys
+        mask = self.capacity - 1
+        slot = (hash(key) * self.FIBONACCI & self.MASK_64) >> self.shift
+        empty = self.EMPTY
+        tombstone = self.TOMBSTONE
+        # The first tombstone passed while probing, which the item can reuse
+        free = -1
+
+        while True:
+            current = keys[slot]
+            if current is empty:
+                break
+            if current is tombstone:
+                if free == -1:
+                    free = slot
+            elif current == key:
+                # Update the value associated with the key if the key is
+                # already in the hash table
+                self.values[slot] = item
+                return True
+            slot = (slot + 1) & mask
+
+        # The key is not in the hash table. Place the item in the first
+        # removed slot passed, or else the empty slot that ended the probe
+        if free == -1:
+            free = slot
+            self.used += 1
+        keys[free] = key
+        self.values[free] = item
+        self.size += 1
+
+        # Tombstones slow down probing as much as items do, so they count
+        # towards the load factor
+        if self.used / self.capacity > self.MAX_LOAD_FACTOR:
+            self.resize()
+        return True
+
+    # Name: search
+    # Function: Find and return the value associated with the key
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def search(self, key):
+        # Search is the most frequent operation, so the probe loop of
+        # _find_slot is repeated here to save a method call
+        keys = self.keys
+        mask = self.capacity - 1
+        slot = (hash(key) * self.FIBONACCI & self.MASK_64) >> self.shift
+        empty = self.EMPTY
+        tombstone = self.TOMBSTONE
+
+        while True:
+            current = keys[slot]
+            if current is empty:
+                return None
+            if current is not tombstone and current == key:
+                return self.values[slot]
+            slot = (slot + 1) & mask
+
+    # Name: remove
+    # Function: Find key-value pair in hashtable and delete it
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def remove(self, key):
+        slot = self._find_slot(key)
+        if slot == -1:
+            return
+
+        # Leave a tombstone so searches keep probing past this slot
+        self.keys[slot] = self.TOMBSTONE
+        self.values[slot] = None
+        self.size -= 1
+
+    # Name: resize
+    # Function: Doubles the capacity of the hash table (or keeps it if most
+    # used slots are tombstones) and places every item into the new slots
+    # directly, without going through insert. Tombstones are dropped
+    # Time Complexity: O(n)
+    # Space Complexity: O(n)
+    def resize(self):
+        new_capacity = self.capacity * 2
+        if self.size / self.capacity <= self.MAX_LOAD_FACTOR / 2:
+            new_capacity = self.capacity
+
+        old_keys = self.keys
+        old_values = self.values
+        self._allocate(new_capacity)
+
+        keys = self.keys
+        values = self.values
+        mask = self.capacity - 1
+        shift = self.shift
+        fibonacci = self.FIBONACCI
+        mask_64 = self.MASK_64
+        empty = self.EMPTY
+        tombstone = self.TOMBSTONE
+
+        for index, key in enumerate(old_keys):
+            if key is empty or key is tombstone:
+                continue
+            slot = (hash(key) * fibonacci & mask_64) >> shift
+            while keys[slot] is not empty:
+                slot = (slot + 1) & mask
+            keys[slot] = key
+            values[slot] = old_values[index]
+
+        self.used = self.size
+
+
 # Test
 """
 bestMovies = [
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import cProfile
+import functools
+import io
+import json
+import pstats
+import time
+from typing import Callable
+
+from hashtable import ChainingHashTable
+import truck_jobs
+
+# Only this many durations are kept per timer, so a long batch run does not
+# grow the report without bound
+MAX_DURATIONS = 1000
+
+
+class Instrumentation:
+    """
+    Opt-in timers and counters for one run of the program.
+
+    Nothing in the program checks whether instrumentation is on. Instead,
+    attach replaces the methods being measured on the program's own objects
+    with wrappers that time or count them. A run without instrumentation
+    runs the original methods and pays nothing.
+
+    === Instance Attributes ===
+    timers: Maps a timer name to its number of calls, total and longest
+    duration in seconds, and the duration of each call (up to MAX_DURATIONS)
+
+    counters: Maps a counter name to its count
+
+    profiler: The cProfile profiler of the run, or None if the run is not
+    profiled
+
+    started: The time (from time.perf_counter) the instrumentation started
+    """
+    timers: dict[str, dict]
+    counters: dict[str, int]
+    profiler: cProfile.Profile | None
+    started: float
+
+    # Name: __init__
+    # Function: Initializes instrumentation object. If profile is True,
+    # cProfile starts recording right away
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __init__(self, profile: bool = False) -> None:
+        self.timers = {}
+        self.counters = {}
+        self.profiler = None
+        self.started = time.perf_counter()
+        if profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    # Name: record
+    # Function: Adds one call of a timer that took seconds
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def record(self, name: str, seconds: float, label=None) -> None:
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+                     "durations": []}
+            self.timers[name] = timer
+        timer["calls"] += 1
+        timer["total_seconds"] += seconds
+        timer["max_seconds"] = max(timer["max_seconds"], seconds)
+        if len(timer["durations"]) < MAX_DURATIONS:
+            if label is None:
+                timer["durations"].append(seconds)
+            else:
+                timer["durations"].append({"label": label,
+                                           "seconds": seconds})
+
+    # Name: count
+    # Function: Adds amount to a counter
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    # Name: time_method
+    # Function: Replaces a method of one object with a wrapper that records
+    # every call under a timer. label (if given) is called with the method's
+    # arguments to name each call, i.e. with the id of a truck
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def time_method(self, target, method: str, name: str,
+                    label: Callable | None = None) -> None:
+        original = getattr(target, method)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start,
+                            None if label is None else label(*args, **kwargs))
+
+        setattr(target, method, timed)
+
+    # Name: count_method
+    # Function: Replaces a method of one object with a wrapper that counts
+    # its calls
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def count_method(self, target, method: str, name: str) -> None:
+        original = getattr(target, method)
+        counters = self.counters
+        counters.setdefault(name, 0)
+
+        @functools.wraps(original)
+        def counted(*args, **kwargs):
+            counters[name] += 1
+            return original(*args, **kwargs)
+
+        setattr(target, method, counted)
+
+    # Name: count_chaining_probes
+    # Function: Wraps the insert, search and remove methods of a chaining
+    # hash table so every key compared in a bucket is counted as a probe,
+    # and counts its resizes. The items a resize inserts again are not
+    # counted as probes or inserts
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def count_chaining_probes(self, table, name: str) -> None:
+        counters = self.counters
+        probes = f"{name}.probes"
+        counters.setdefault(probes, 0)
+
+        # Name: bucket_probes
+        # Function: Returns the number of keys compared to find key
+        def bucket_probes(key) -> int:
+            bucket = table.table[hash(key) % len(table.table)]
+            for position, key_value in enumerate(bucket):
+                if key_value[0] == key:
+                    return position + 1
+            return len(bucket)
+
+        unprobed_insert = table.insert
+        for method in ("insert", "search", "remove"):
+            original = getattr(table, method)
+
+            def probed(key, *args, original=original):
+                counters[probes] += bucket_probes(key)
+                return original(key, *args)
+
+            setattr(table, method, probed)
+            self.count_method(table, method, f"{name}.{method}")
+
+        # resize inserts every item again through table.insert, so the
+        # original insert is put back while it runs
+        resize = table.resize
+
+        @functools.wraps(resize)
+        def rehash(*args, **kwargs):
+            counted_insert = table.insert
+            table.insert = unprobed_insert
+            try:
+                return resize(*args, **kwargs)
+            finally:
+                table.insert = counted_insert
+
+        table.resize = rehash
+        self.count_method(table, "resize", f"{name}.resizes")
+
+    # Name: attach
+    # Function: Instruments a program: timers around data loading, load
+    # planning, the route planning and delivery of every truck and the
+    # reports, and counters for distance lookups and the package hash table.
+    # Routes planned in worker processes (--pool process) are not timed.
+    # Call before the program loads its data
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def attach(self, program) -> None:
+        self.time_method(program, "load_data", "load_data")
+        self.time_method(program, "truck_load_packages", "load_planning")
+        self.time_method(program, "truck_deliver_packages",
+                         "truck_deliver_packages",
+                         lambda truck, *args: f"truck {truck.truck_id}")
+        # Routes are planned by truck_jobs before truck_deliver_packages is
+        # called, so planning has a timer of its own
+        self.time_method(truck_jobs, "route_job", "plan_route",
+                         lambda job, *args: f"truck {job.truck.truck_id}")
+        self.time_method(program, "simulate_day", "simulate_day")
+        for report in ("print_package_status", "lookup_package",
+                       "lookup_all_packages"):
+            self.time_method(program, report, f"report.{report}")
+
+        self.count_method(program, "calculate_distance", "calculate_distance")
+        # Probes are only counted for the chaining hash table, not for the
+        # columnar package store
+        if isinstance(program.package_hashtable, ChainingHashTable):
+            self.count_chaining_probes(program.package_hashtable,
+                                       "package_hashtable")
+
+        # The matrix only exists once the data is loaded, so its lookups are
+        # counted from then on
+        load_map = program.read_map_data
+
+        @functools.wraps(load_map)
+        def read_map_data(*args, **kwargs):
+            load_map(*args, **kwargs)
+            self.count_method(program.distance_matrix, "distance",
+                              "distance_matrix.distance")
+            self.count_method(program.distance_matrix, "nearest_pending",
+                              "distance_matrix.nearest_pending")
+
+        program.read_map_data = read_map_data
+
+    # Name: report
+    # Function: Returns everything recorded as a dictionary that can be
+    # written as JSON. If the run is profiled, the functions with the most
+    # cumulative time are included
+    # Time Complexity: O(t + c + f) for t timers, c counters and f profiled
+    # functions
+    # Space Complexity: O(t + c + f)
+    def report(self, top: int = 25) -> dict:
+        result = {"wall_seconds": time.perf_counter() - self.started,
+                  "timers": self.timers,
+                  "counters": self.counters}
+
+        if self.profiler is not None:
+            self.profiler.disable()
+            stats = pstats.Stats(self.profiler, stream=io.StringIO())
+            entries = []
+            for (filename, line, function), (_, calls, own, cumulative, _) \
+                    in stats.stats.items():
+                entries.append({"function": f"{filename}:{line}({function})",
+                                "calls": calls, "own_seconds": own,
+                                "cumulative_seconds": cumulative})
+            entries.sort(key=lambda entry: -entry["cumulative_seconds"])
+            result["profile"] = entries[:top]
+            self.profiler.enable()
+        return result
+
+    # Name: dump
+    # Function: Writes the report to a JSON file. If profile_file is given,
+    # the full cProfile statistics are also written there for pstats or
+    # snakeviz
+    # Time Complexity: O(size of the report)
+    # Space Complexity: O(size of the report)
+    def dump(self, filename: str, profile_file: str | None = None) -> None:
+        with open(filename, "w") as file:
+            json.dump(self.report(), file, indent=2)
+        if self.profiler is not None and profile_file is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(profile_file)
@@ -5,15 +5,43 @@ Student ID: 011130244
 """
 from __future__ import annotations
 
-import csv
+import argparse
+import atexit
+import os
+import sys
 import time
+from bisect import insort
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
 from datetime import timedelta
 
+from clock import DAY_START, to_seconds, to_timedelta, travel_seconds
+from distances import DistanceMatrix
 from hashtable import ChainingHashTable
+from instrumentation import Instrumentation
+from manifest import load_manifest
+from matrix_cache import load_map
+from multistart import multistart_routes
+from package_index import PackageIndex
+from package_store import PackageStore
 from packages import Package
+from planner import TRUCK_MAX_WEIGHT, LoadPlanner
+from replanning import CANCELLATION, NEW_PACKAGE, ReplanEvent, Replanner
+from routing import plan_route
+from timeline import CANCELLED, DeliveryTimeline
+from truck_jobs import TruckJob, init_worker, run_truck_jobs, stop_deadlines
 from trucks import Truck
+from batch import run_batch
+from cache import SimulationCache
 from colors import Colors
 
+# The address of the hub every truck leaves from
+HUB_ADDRESS = "4001 South 700 East"
+# The time the correct address of package 9 becomes known
+ADDRESS_CORRECTION_TIME = timedelta(hours=10, minutes=20)
+# A time after every package has been delivered
+END_OF_DAY = timedelta(days=1)
+
 
 # Name: string_to_timedelta
 # Function: Converts a string to timedelta type
@@ -43,46 +71,95 @@ def string_to_timedelta(time_str: str) -> timedelta:
         raise ValueError("Invalid input. Please enter time in HH:MM format.")
 
 
-# Name: add_time_to_truck
-# Function: Add time to time_truck attribute of truck
-# Time Complexity: O(1)
-# Space Complexity: O(1)
-def add_time_to_truck(truck: Truck, time_elapsed: timedelta) -> None:
-
-    # Time_elapsed is the amount of time taken to travel between addresses
-
-    # Add the additional time, time_elapsed, to the initial time of the truck
-    truck.time_truck += time_elapsed
-
-
-# Function: time_elapsed_between_packages
-# Function: This will calculate how much time has elapsed between loading_time
-# time of delivery for the package. Update the time tracker for package.
-# Add this time to the truck to update time tracker for truck the package is on
-# Time Complexity: O(1)
-# Space Complexity: O(1)
-def time_elapsed_between_packages(distance: float) -> timedelta:
-
-    # Convert the time you will be adding to the truck_time to timedelta obj
-    additional_time = timedelta(minutes=distance)
-
-    return additional_time
-
-
 class Main:
     """
     The main class where the WGUPS program is run.
 
-    distance_matrix: A 2D array that holds all distance values between addresses
+    distance_matrix: A symmetric matrix of floats that holds all distance
+    values between addresses
     package_hashtable: A hashtable that holds all package data and updates
-    as the trucks deliver packages
+    as the trucks deliver packages. A PackageStore can be used in its place
+    package_ids: A sorted list of the ids of every package in the package
+    hashtable
+    package_index: Indexes the packages in the package hashtable by status,
+    truck, deadline, zipcode and address. It is updated whenever the
+    program changes one of them
     location_list: A list that holds all possible package addresses
+    location_index: A dictionary that maps every address in location_list to
+    its index, which is also its row in the distance matrix
+    simulation_cache: A cache of the delivery timelines of the scenarios
+    that have been simulated
+    routing_mode: The algorithm used to order the stops on a truck. Either
+    "nearest" (nearest neighbor), "improve" (nearest neighbor followed by
+    2-opt and Or-opt local search), "exact" (Held-Karp), "multistart"
+    (the best of many randomized nearest neighbor plans) or "deadline"
+    (cheapest insertion that keeps every stop on time where it can)
+    exact_stop_limit: The largest number of stops the exact solver is used
+    for. Trucks with more stops fall back to the "improve" heuristic
+    improve_iterations: The most improving moves the local search makes on
+    one route
+    improve_time_budget: The most seconds the local search spends on one
+    route
+    multistart_starts: The number of plans multi-start routing tries
+    multistart_choices: The number of nearest stops multi-start routing
+    picks the next stop from
+    multistart_slack: How much farther (i.e. 0.2 for 20%) than the nearest
+    stop another stop can be and still be picked by multi-start routing
+    multistart_time_budget: The most seconds multi-start routing searches
+    for (per worker), or None for no limit
+    data_directory: The directory the distance, location and package files
+    are read from
+    workers: The number of threads or processes that route trucks at the
+    same time, or 0 to route them one at a time
+    pool: The kind of worker pool, "thread" or "process"
+    executor: The worker pool, created the first time it is needed
+    truck_count: The number of trucks
+    drivers: The number of drivers. A truck only leaves with a driver, so
+    the trucks after the first drivers wait for a driver to return
+    departure_times: Maps the id of a truck to the earliest time it may
+    leave the hub. Trucks without one may leave at 8:00 AM
+    max_weight: The most kilograms a truck can carry, or None if weight is
+    not limited
+    return_to_hub: Whether trucks drive back to the hub after their last
+    delivery before their driver takes another truck
+    warn_late: Whether the packages a planned route cannot deliver by their
+    deadline are reported on standard error
+    ready_times: The earliest time each truck's packages were ready to leave
+    the hub in the last simulated day
+    replanner: Re-plans the day started with start_replanning, or None
+    replanned_timeline: The timeline of the day being re-planned, with
+    every event applied so far
 
     """
-    distance_matrix: list[list[str]]
-    package_hashtable: ChainingHashTable
-    updated_package_hashtable: ChainingHashTable
+    distance_matrix: DistanceMatrix | None
+    package_hashtable: ChainingHashTable | PackageStore
+    updated_package_hashtable: ChainingHashTable | PackageStore
+    package_ids: list[int]
+    package_index: PackageIndex
     location_list: list[str]
+    location_index: dict[str, int]
+    simulation_cache: SimulationCache
+    routing_mode: str
+    exact_stop_limit: int
+    improve_iterations: int
+    improve_time_budget: float
+    multistart_starts: int
+    multistart_choices: int
+    multistart_slack: float
+    multistart_time_budget: float | None
+    data_directory: str
+    workers: int
+    pool: str
+    executor: Executor | None
+    truck_count: int
+    drivers: int
+    departure_times: dict[int, timedelta]
+    max_weight: int | None
+    return_to_hub: bool
+    warn_late: bool
+    ready_times: dict[int, timedelta]
+    replanner: Replanner | None
+    replanned_timeline: DeliveryTimeline | None
 
     # Name: __init__
     # Function: Initializes main class object
@@ -94,35 +171,69 @@ class Main:
         structures that will hold crucial information necessary to run the
         program.
         """
-        self.distance_matrix = []
+        self.distance_matrix = None
         self.package_hashtable = ChainingHashTable()
         self.updated_package_hashtable = ChainingHashTable()
         self.updated_package_hashtable = self.package_hashtable
+        self.package_ids = []
+        self.package_index = PackageIndex()
         self.location_list = []
+        self.location_index = {}
+        self.simulation_cache = SimulationCache()
+        self.routing_mode = "nearest"
+        # A full truck holds 16 packages, so the exact solver covers every
+        # load. It takes O(2^n * n^2) time: about 2 seconds per truck at 16
+        # stops and a third of a second at 14
+        self.exact_stop_limit = 16
+        self.improve_iterations = 1000
+        self.improve_time_budget = 0.5
+        self.multistart_starts = 256
+        self.multistart_choices = 3
+        self.multistart_slack = 0.2
+        self.multistart_time_budget = None
+        self.data_directory = '../data'
+        # Trucks are routed one at a time unless workers is set
+        self.workers = 0
+        self.pool = "thread"
+        self.executor = None
+        # Three trucks and two drivers, and truck 2 waits for the packages
+        # that arrive at 9:05 AM
+        self.truck_count = 3
+        self.drivers = 2
+        self.departure_times = {2: timedelta(hours=9, minutes=5)}
+        self.max_weight = TRUCK_MAX_WEIGHT
+        self.return_to_hub = False
+        self.warn_late = True
+        self.ready_times = {}
+        self.replanner = None
+        self.replanned_timeline = None
+
+    # Name: load_data
+    # Function: Reads the distance, location and package files
+    # Time Complexity: O(n^2 log n)
+    # Space Complexity: O(n^2)
+    def load_data(self) -> None:
+        # Load distance data into distance matrix and address data into
+        # location list. This must happen before the packages are read so
+        # each package can resolve its location id
+        self.read_map_data(os.path.join(self.data_directory, 'distances.csv'),
+                           os.path.join(self.data_directory, 'locations.csv'))
+        # Load package data into hashtable
+        self.read_package_data(os.path.join(self.data_directory,
+                                            'packages.csv'))
 
     # Name: main
     # Function: This method runs the program and its user interface
     # Time Complexity: O(n^2)
     # Space Complexity: O(n)
     def main(self) -> None:
-        # Load package data into hashtable
-        self.read_package_data('../data/packages.csv')
-        # Load distance data into distance 2D array
-        self.read_distance_data('../data/distances.csv')
-        # Load address data into location list
-        self.read_location_data('../data/locations.csv')
+        # Load distance, location and package data
+        self.load_data()
 
         print("\nWelcome to the WGUPS Routing System!")
 
         while True:
 
-            # Store 9:05 AM in timedelta object to hold the late leave time
-            late_leave_time = timedelta(hours=9, minutes=5)
-
-            # Create truck objects
-            t1 = Truck()
-            t2 = Truck(late_leave_time)
-            t3 = Truck()
             print("\nOptions")
             print("1: Print All Package Status and Total Mileage")
             print("2: Get a Single Package Status with a Time")
@@ -135,48 +246,41 @@ class Main:
                 case "1":
 
                     # Update package 9 address to the correct address
-                    pkg_9 = self.package_hashtable.search(9)
-                    pkg_9.delivery_address = "410 S State St"
-                    pkg_9.delivery_city = "Salt Lake City"
-                    pkg_9.delivery_state = "UT"
-                    pkg_9.delivery_zipcode = 84111
-
-                    # Update package information in package hashtable
-                    self.package_hashtable.insert(pkg_9.package_id, pkg_9)
+                    self.apply_address_corrections(END_OF_DAY)
 
-                    # Start delivery process
-                    self.package_delivery_process(t1, t2, t3)
+                    # Get the simulated day for the corrected address
+                    timeline = self.simulate_day()
 
                     # Print all truck distances travelled and total distance
                     # of all trucks
-                    total_distance = t1.distance_travelled + \
-                                     t2.distance_travelled + \
-                                     t3.distance_travelled
-
-                    print("\nTruck 1 Statistics\n")
-                    print(f"Departure Time: {t1.loading_time}")
-                    print(f"Trip Completed Time: {t1.time_truck}")
-                    print(f"Time Elapsed: {t1.time_truck - t1.loading_time}")
-                    print(f"Truck 1 Total Distance: "
-                          f"{round(t1.distance_travelled, 2)} miles \n")
-
-                    print(f"Truck 2 Statistics\n")
-                    print(f"Departure Time: {t2.loading_time}")
-                    print(f"Trip Completed Time: {t2.time_truck}")
-                    print(f"Time Elapsed: {t2.time_truck - t2.loading_time}")
-                    print(f"Truck 2 Total Distance: "
-                          f"{round(t2.distance_travelled, 2)} miles\n")
-
-                    print(f"Truck 3 Statistics\n")
-                    print(f"Departure Time: {t3.loading_time}")
-                    print(f"Trip Completed Time: {t3.time_truck}")
-                    print(f"Time Elapsed: {t3.time_truck - t3.loading_time}")
-                    print(f"Truck 3 Total Distance: "
-                          f"{round(t3.distance_travelled, 2)} miles \n")
+                    total_distance = timeline.total_distance
+
+                    print()
+                    for truck in timeline.trucks:
+                        print(f"Truck {truck.truck_id} Statistics\n")
+                        print(f"Departure Time: {truck.loading_time}")
+                        print(f"Trip Completed Time: {truck.finish_time}")
+                        print(f"Time Elapsed: "
+                              f"{truck.finish_time - truck.loading_time}")
+                        print(f"Truck {truck.truck_id} Total Distance: "
+                              f"{round(truck.distance_travelled, 2)} miles\n")
 
                     print(f"Total Distance Travelled: "
                           f"{round(total_distance, 2)} miles\n")
 
+                    # Warn about every package that misses its deadline
+                    late_packages = self.late_packages(timeline)
+                    if late_packages:
+                        print(Colors.color_text(
+                            "Delivered after their deadline: " +
+                            ", ".join(str(package_id)
+                                      for package_id in late_packages),
+                            Colors.RED) + "\n")
+
+                    # Every package has been delivered at the end of the day
+                    self.apply_timeline(timeline, END_OF_DAY,
+                                        self.package_ids)
+
                     # Print status of every package after trucks have
                     # delivered all packages
                     self.print_package_status()
@@ -227,38 +331,18 @@ class Main:
                             print(e)
 
                     # If correct format is inputted then update pkg 9
-                    # to the correct information is the time is
-                    # inputted by the user is greater than 10:20 AM
-
-                    # Package 9 will update if the user inputted time
-                    # is greater than 10:20 AM Else, the WGUPS
-                    # program will act like it does not know the
-                    # correct address for package 9 before 10:20 AM
-                    pkg_9 = self.package_hashtable.search(9)
-                    if time_delta >= timedelta(hours=10, minutes=20):
-                        pkg_9.delivery_address = "410 S State St"
-                        pkg_9.delivery_city = "Salt Lake City"
-                        pkg_9.delivery_state = "UT"
-                        pkg_9.delivery_zipcode = 84111
-
-                    # Else, return package 9 back to its original info
-                    else:
-                        pkg_9.delivery_address = "300 State St"
-                        pkg_9.delivery_city = "Salt Lake City"
-                        pkg_9.delivery_state = "UT"
-                        pkg_9.delivery_zipcode = 84103
-
-                    # Update package information in package hashtable with its
-                    # respective info to time
-                    self.package_hashtable.insert(pkg_9.package_id, pkg_9)
-
-                    # Start delivery process
-                    self.package_delivery_process(t1, t2, t3)
-
-                    # Update statuses on all trucks for time inputted by user
-                    self.update_packages_for_truck(time_input, t1)
-                    self.update_packages_for_truck(time_input, t2)
-                    self.update_packages_for_truck(time_input, t3)
+                    # to the correct information for the time inputted by
+                    # the user
+                    self.apply_address_corrections(time_delta)
+
+                    # Get the simulated day for package 9's address. The
+                    # routes are only computed once per address
+                    timeline = self.simulate_day()
+
+                    # Update the status of the package for the time inputted
+                    # by user
+                    self.apply_timeline(timeline, time_delta,
+                                        [package_id_input])
 
                     # Return info for package looked up by user (printed)
                     self.lookup_package(package_id_input)
@@ -283,36 +367,16 @@ class Main:
                         except ValueError as e:
                             print(e)
 
-                    # Package 9 will update if the user inputted time
-                    # is greater than 10:20 AM Else, the WGUPS
-                    # program will act like it does not know the
-                    # correct address for package 9 before 10:20 AM
-                    pkg_9 = self.package_hashtable.search(9)
-                    if time_delta >= timedelta(hours=10, minutes=20):
-                        pkg_9.delivery_address = "410 S State St"
-                        pkg_9.delivery_city = "Salt Lake City"
-                        pkg_9.delivery_state = "UT"
-                        pkg_9.delivery_zipcode = 84111
-
-                    # Else, return package 9 back to its original info
-                    else:
-                        pkg_9.delivery_address = "300 State St"
-                        pkg_9.delivery_city = "Salt Lake City"
-                        pkg_9.delivery_state = "UT"
-                        pkg_9.delivery_zipcode = 84103
-
-                    # Update package information in package
-                    # hashtable
-                    self.package_hashtable.insert(pkg_9.package_id,
-                                                  pkg_9)
-
-                    # Start delivery process
-                    self.package_delivery_process(t1, t2, t3)
-
-                    # Update statuses on all trucks for time inputted by user
-                    self.update_packages_for_truck(time_input, t1)
-                    self.update_packages_for_truck(time_input, t2)
-                    self.update_packages_for_truck(time_input, t3)
+                    # Update pkg 9 to the correct information for the time
+                    # inputted by the user
+                    self.apply_address_corrections(time_delta)
+
+                    # Get the simulated day for package 9's address. The
+                    # routes are only computed once per address
+                    timeline = self.simulate_day()
+
+                    # Update statuses on all packages for time inputted by user
+                    self.apply_timeline(timeline, time_delta, self.package_ids)
 
                     # Print package data for all packages
                     self.lookup_all_packages()
@@ -329,48 +393,85 @@ class Main:
                     print("Invalid option. Please enter a number between 1 "
                           "and 4.")
 
-    # Name: package_delivery_process
-    # Function: Deliver all packages loaded on each truck
-    # Time Complexity: O(n^2)
+    # Name: batch
+    # Function: Answers status queries read from a file (or standard input if
+    # the filename is "-") without the interactive menu. Results are written
+    # to standard output as CSV or JSON lines. Returns the number of queries
+    # that could not be answered
+    # Time Complexity: O(q log k) for q results, plus one simulation per
+    # scenario
     # Space Complexity: O(n)
-    def package_delivery_process(self, t1: Truck, t2: Truck, t3: Truck) -> None:
-        # Store 9:05 AM in timedelta object to hold the late departing time
-        late_leave_time = timedelta(hours=9, minutes=5)
-        # Make Truck objects
-        # t1 = Truck()
-        # t2 = Truck(late_leave_time)
-        # t3 = Truck()
-
-        # Load Trucks with packages
-        self.truck_load_packages(t1, t2, t3)
-
-        # Update all pkgs loading time for truck 2 because they are leaving late
-        # i.e. 9:05 AM
-
-        for package in t2.package_collection:
-            package.loading_time = late_leave_time
-
-        # Deliver packages on trucks t1 and t2
-        self.truck_deliver_packages(t1)
-        self.truck_deliver_packages(t2)
-
-        # Find the truck that delivered all of its packages the fastest
-        # and set the loading time of truck t3 to the time tracker
-        # of the fastest truck between t1 and t2
-        # Set each package on the truck's loading time and initial time tracker
-        # to the time the fastest truck is finished delivering its packages
+    def batch(self, filename: str, output_format: str = "csv") -> int:
+        self.load_data()
 
-        t3.loading_time = min(t1.time_truck, t2.time_truck)
-        t3.time_truck = min(t1.time_truck, t2.time_truck)
+        if filename == "-":
+            return run_batch(self, sys.stdin, sys.stdout, output_format,
+                             string_to_timedelta)
+        with open(filename) as queries:
+            return run_batch(self, queries, sys.stdout, output_format,
+                             string_to_timedelta)
 
-        for package in t3.package_collection:
-            package.loading_time = t3.time_truck
-
-        # If the truck time for truck 3 is greater than 10:20, update the
-        # package stats to reflect the new address
-
-        # Deliver packages on truck t3
-        self.truck_deliver_packages(t3)
+    # Name: package_delivery_process
+    # Function: Deliver all packages loaded on each truck. ready_times holds
+    # the earliest time each truck can leave, as returned by
+    # truck_load_packages. The first driver available at the hub takes the
+    # waiting truck that is ready first (and never leaves before its
+    # loading time or ready time). With workers, trucks on the road at the
+    # same time (or the starts of multi-start routing) are routed at the
+    # same time
+    # Time Complexity: O(n^2)
+    # Space Complexity: O(n)
+    def package_delivery_process(self, trucks: list[Truck],
+                                 ready_times: dict[int, timedelta]) -> None:
+        jobs = [TruckJob(truck, to_seconds(ready_times[truck.truck_id]))
+                for truck in trucks]
+        hub = self.resolve_location(HUB_ADDRESS)
+
+        # Multi-start routing picks the routes of every truck together,
+        # because a truck waiting for a driver leaves when another truck's
+        # route ends
+        routes = None
+        if self.routing_mode == "multistart":
+            routes = multistart_routes(self.distance_matrix, hub, jobs,
+                                       self.multistart_starts,
+                                       self.multistart_choices,
+                                       self.multistart_slack,
+                                       self.multistart_time_budget,
+                                       self.get_executor(), self.workers,
+                                       self.drivers, self.return_to_hub)
+
+        run_truck_jobs(jobs, self.distance_matrix, hub, self.route_settings(),
+                       self.truck_deliver_packages, self.get_executor(),
+                       routes, self.drivers, self.return_to_hub)
+
+    # Name: route_settings
+    # Function: Returns the routing settings passed to routing.plan_route
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def route_settings(self) -> tuple:
+        return (self.routing_mode, self.exact_stop_limit,
+                self.improve_iterations, self.improve_time_budget)
+
+    # Name: get_executor
+    # Function: Returns the pool that routes trucks, creating it on first
+    # use, or None if trucks are routed one at a time. Worker processes load
+    # the distance matrix from the memory-mapped cache when they start
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def get_executor(self) -> Executor | None:
+        if self.workers <= 0:
+            return None
+        if self.executor is None:
+            if self.pool == "process":
+                self.executor = ProcessPoolExecutor(
+                    self.workers, initializer=init_worker,
+                    initargs=(os.path.join(self.data_directory,
+                                           'distances.csv'),
+                              os.path.join(self.data_directory,
+                                           'locations.csv')))
+            else:
+                self.executor = ThreadPoolExecutor(self.workers)
+        return self.executor
 
     # Name: print_package_status
     # Function: Print out every package status for case 1
@@ -385,7 +486,7 @@ class Main:
             f"{headers[0]:<12} {headers[1]:<25} {headers[2]:<12} "
             f"{headers[3]:<15}")
 
-        for package_id in range(1, 41):
+        for package_id in self.package_ids:
             package = self.package_hashtable.search(package_id)
 
             package_id = package.package_id
@@ -393,21 +494,8 @@ class Main:
             deadline = package.delivery_deadline
             delivery_status = package.delivery_status
             delivery_time = package.time_tracker
-
-            t1_package_list = [4, 5, 7, 12, 13, 14, 15, 16, 19, 20,
-                               21, 29, 31, 34, 37, 40]
-
-            t2_package_list = [1, 2, 3, 6, 8, 10, 17, 18, 27, 28, 30, 32,
-                               33, 35, 36, 38]
-
-            # t3_package_list = [9, 11, 22, 23, 24, 25, 26, 39]
-
-            if package_id in t1_package_list:
-                truck_num = 1
-            elif package_id in t2_package_list:
-                truck_num = 2
-            else:
-                truck_num = 3
+            # The truck the load planner put the package on
+            truck_num = package.truck_id
 
             # Convert delivery_time to string if it's a timedelta
             if isinstance(delivery_time, timedelta):
@@ -419,15 +507,32 @@ class Main:
             if len(address) > 25:
                 address = address[:21] + "..."
 
-            # Create delivery status statement so its readable for user
-            delivery_statement = \
-                f"{Colors.color_text(delivery_status, Colors.GREEN)} " \
-                f"by Truck {truck_num} at {delivery_time_str} "
+            # Create delivery status statement so its readable for user. A
+            # cancelled package has no truck or delivery time
+            if delivery_status == CANCELLED:
+                delivery_statement = self.cancellation_statement(package_id)
+            else:
+                delivery_statement = \
+                    f"{Colors.color_text(delivery_status, Colors.GREEN)} " \
+                    f"by Truck {truck_num} at {delivery_time_str} "
 
             # Print the specific columns for each package
             print(f"{package_id:<12} {address:<25} {deadline:<12} "
                   f"{delivery_statement:<15}")
 
+    # Name: cancellation_statement
+    # Function: Returns the status statement of a cancelled package, with
+    # the time it was cancelled in the day being re-planned
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def cancellation_statement(self, package_id: int) -> str:
+        statement = Colors.color_text(CANCELLED, Colors.GRAY)
+        if self.replanned_timeline is not None:
+            cancelled = self.replanned_timeline.cancelled_at(package_id)
+            if cancelled is not None:
+                statement += f" at {cancelled}"
+        return statement
+
     # Name: lookup_package
     # Function: This function returns the package info for the package and time
     # requested by the user in the main method for option 2
@@ -446,24 +551,8 @@ class Main:
         weight = package.weight
         delivery_status = package.delivery_status
         delivery_time = package.time_tracker
-
-        t1_package_list = [4, 5, 7, 12, 13, 14, 15, 16, 19, 20,
-                           21, 29, 31, 34, 37, 40]
-
-        t2_package_list = [1, 2, 3, 6, 8, 10, 17, 18, 27, 28, 30, 32,
-                           33, 35, 36, 38]
-
-        # t3_package_list = [9, 11, 22, 23, 24, 25, 26, 39]
-
-        # Initialize truck_num
-        if p_id in t1_package_list:
-            truck_num = 1
-
-        elif p_id in t2_package_list:
-            truck_num = 2
-
-        else:
-            truck_num = 3
+        # The truck the load planner put the package on
+        truck_num = package.truck_id
 
         # Color the status text
         # Use if statement to output the correct delivery status statement
@@ -491,6 +580,14 @@ class Main:
                   f"{Colors.color_text(delivery_status, Colors.YELLOW)} "
                   f"on Truck {truck_num}")
 
+        # For delivery status == CANCELLED, print when it was cancelled
+        elif delivery_status == CANCELLED:
+            print(f"\nPackage ID: {package_id}, Delivery Address: {address}, "
+                  f"City: {city}, State: {state}, Zipcode: {zipcode}, "
+                  f"Deadline: {deadline}, Weight: {weight}, "
+                  f"Delivery Status: "
+                  f"{self.cancellation_statement(package_id)}")
+
         # For delivery status == DELIVERED, make delivery_status green
         else:
             print(f"\nPackage ID: {package_id}, Delivery Address: {address}, "
@@ -514,7 +611,7 @@ class Main:
                       f"{headers[7]:<15}"
         print(header_line)
 
-        for package_id in range(1, 41):
+        for package_id in self.package_ids:
             package = self.updated_package_hashtable.search(package_id)
 
             package_id = package.package_id
@@ -528,21 +625,8 @@ class Main:
             delivery_status = package.delivery_status
             # delivery_time can be str or timedelta
             delivery_time = package.time_tracker
-
-            t1_package_list = [4, 5, 7, 12, 13, 14, 15, 16, 19, 20, 21, 29, 31,
-                               34, 37, 40]
-            t2_package_list = [1, 2, 3, 6, 8, 10, 17, 18, 27, 28, 30, 32, 33,
-                               35, 36, 38]
-            # t3_package_list = [9, 11, 22, 23, 24, 25, 26, 39]
-
-            truck_num = None
-
-            if package_id in t1_package_list:
-                truck_num = 1
-            elif package_id in t2_package_list:
-                truck_num = 2
-            else:
-                truck_num = 3
+            # The truck the load planner put the package on
+            truck_num = package.truck_id
 
             # Convert delivery time (timedelta) to a string
             if isinstance(delivery_time, timedelta):
@@ -567,6 +651,9 @@ class Main:
                 delivery_status = f"{Colors.color_text(delivery_status, Colors.YELLOW)} " \
                                   f"on Truck {truck_num}"
 
+            elif delivery_status == CANCELLED:
+                delivery_status = self.cancellation_statement(package_id)
+
             else:
                 delivery_status = \
                     f"{Colors.color_text(delivery_status, Colors.GREEN)} " \
@@ -581,318 +668,570 @@ class Main:
             print(f"{data[0]:<12} {data[1]:<25} {data[2]:<20} {data[3]:<10} "
                   f"{data[4]:<10} {data[5]:<12} {data[6]:<8} {data[7]:<15}")
 
-    # Name: update_packages_for_trucks
-    # Function: Updates package hash table
-    # for each package depending on the time entered by the user
+    # Name: simulate_day
+    # Function: Loads every package and returns the delivery timeline of the
+    # day. The trucks are only routed if the scenario is not in the
+    # simulation cache
+    # Time Complexity: O(n log n) if the scenario is cached, O(n^2) otherwise
+    # Space Complexity: O(n)
+    def simulate_day(self) -> DeliveryTimeline:
+        # Create truck objects, numbered from 1. A truck leaves no earlier
+        # than its departure time, or 8:00 AM if it has none
+        trucks = [Truck(self.departure_times.get(truck_id,
+                                                 to_timedelta(DAY_START)),
+                        truck_id)
+                  for truck_id in range(1, self.truck_count + 1)]
+
+        # Load Trucks with packages
+        ready_times = self.truck_load_packages(trucks)
+        self.ready_times = ready_times
+
+        key = self.scenario_key(trucks, ready_times)
+        timeline = self.simulation_cache.get(key)
+        if timeline is not None:
+            # Loading may have changed the truck of a package
+            self.index_packages(self.package_ids)
+            return timeline
+
+        # Start delivery process
+        self.package_delivery_process(trucks, ready_times)
+
+        packages = [self.package_hashtable.search(package_id)
+                    for package_id in self.package_ids]
+        timeline = DeliveryTimeline(packages, trucks)
+        self.simulation_cache.put(key, timeline)
+
+        # Delivering changed the status of every package
+        self.index_packages(self.package_ids)
+        return timeline
+
+    # Name: start_replanning
+    # Function: Starts re-planning a simulated day. Events are then applied
+    # with replan
+    # Time Complexity: O(n)
+    # Space Complexity: O(n)
+    def start_replanning(self, timeline: DeliveryTimeline) -> None:
+        packages = {package_id: self.package_hashtable.search(package_id)
+                    for package_id in self.package_ids}
+        earliest_departures = {
+            record.truck_id: max(self.departure_times.get(
+                record.truck_id, to_timedelta(DAY_START)),
+                self.ready_times.get(record.truck_id, to_timedelta(DAY_START)))
+            for record in timeline.trucks}
+        self.replanner = Replanner(self.distance_matrix,
+                                   self.resolve_location(HUB_ADDRESS),
+                                   timeline, packages, earliest_departures,
+                                   self.route_settings(), self.drivers,
+                                   self.return_to_hub)
+        self.replanned_timeline = timeline
+
+    # Name: replan
+    # Function: Applies an event to the day started with start_replanning.
+    # Only the truck the event affects is routed again, from where it is at
+    # the time of the event, and only the packages of the trucks that change
+    # are updated. Change the address of a package with
+    # update_package_address before its event. Returns the new timeline
+    # Time Complexity: O(n) to copy the timeline, plus the cost of routing
+    # one truck
+    # Space Complexity: O(n)
+    def replan(self, event: ReplanEvent) -> DeliveryTimeline:
+        if self.replanner is None:
+            raise ValueError("Call start_replanning before replan.")
+
+        package = event.package
+        if event.kind == NEW_PACKAGE:
+            if package.location_id == -1:
+                package.location_id = self.resolve_location(
+                    package.delivery_address)
+            if self.package_hashtable.search(package.package_id) is not None:
+                raise ValueError(
+                    f"Package {package.package_id} already exists.")
+
+        changed = self.replanner.apply(event)
+
+        if event.kind == NEW_PACKAGE:
+            self.package_hashtable.insert(package.package_id, package)
+            insort(self.package_ids, package.package_id)
+
+        packages, trucks = self.replanner.publish(changed)
+        for changed_package in packages:
+            self.package_hashtable.insert(changed_package.package_id,
+                                          changed_package)
+            self.package_changed(changed_package.package_id)
+        cancelled = {}
+        if event.kind == CANCELLATION:
+            cancelled[package.package_id] = event.time
+            # Set before the index is updated, so find_packages(
+            # status="CANCELLED") finds the package
+            package.delivery_status = CANCELLED
+        self.package_changed(package.package_id)
+        self.replanned_timeline = self.replanned_timeline.replace(
+            packages, trucks, cancelled)
+        return self.replanned_timeline
+
+    # Name: late_packages
+    # Function: Returns the ids of the packages delivered after their
+    # deadline in a simulated (or re-planned) day
     # Time Complexity: O(n)
+    # Space Complexity: O(n)
+    def late_packages(self, timeline: DeliveryTimeline) -> list[int]:
+        late = []
+        for package_id in self.package_ids:
+            package = self.package_hashtable.search(package_id)
+            deadline = package.deadline_seconds
+            # A cancelled package is never delivered, so it is never late
+            delivered = timeline.delivery_seconds(package_id)
+            if deadline is not None and delivered is not None and \
+                    delivered > deadline:
+                late.append(package_id)
+        return late
+
+    # Name: scenario_key
+    # Function: Returns a hashable key of everything a simulated day depends
+    # on once the trucks are loaded: the data directory, the routing and
+    # dispatch settings (with the time budgets) and, for every truck, its
+    # departure time and the location, deadline, weight and notes of every
+    # package on it. A cached day can therefore never be stale
+    # Time Complexity: O(n)
+    # Space Complexity: O(n)
+    def scenario_key(self, trucks: list[Truck],
+                     ready_times: dict[int, timedelta]) -> tuple:
+        return (self.data_directory, self.routing_mode,
+                self.exact_stop_limit, self.improve_iterations,
+                self.improve_time_budget, self.multistart_starts,
+                self.multistart_choices, self.multistart_slack,
+                self.multistart_time_budget, self.drivers,
+                self.return_to_hub,
+                tuple((truck.truck_id, truck.loading_time,
+                       ready_times[truck.truck_id],
+                       tuple((package.package_id, package.location_id,
+                              package.deadline_seconds, package.weight,
+                              package.notes)
+                             for package in truck.package_collection))
+                      for truck in trucks))
+
+    # Name: package_changed
+    # Function: Updates the package index for a package that changed. Every
+    # method that changes a package calls this. Every package field a
+    # simulated day reads is part of the scenario key, so the simulation
+    # cache needs no update and both addresses of package 9 stay cached
+    # Time Complexity: O(1)
     # Space Complexity: O(1)
+    def package_changed(self, package_id: int) -> None:
+        self.package_index.update(self.package_hashtable.search(package_id))
 
-    def update_packages_for_truck(self, user_time: str, truck: Truck) -> None:
-
-        # Use a for loop to loop through list of package_id (i.e.
-        # truck_1_package_ids - [2, 4, 7, 12, 13, 14, 15, 16, 17, 19, 20, 21,
-        # 28, 33, 39, 40]).
-        # We use a list of id,s instead of a list of packages to loop through
-        # b/c the list of packages on the truck is empty after every package
-        # has been delivered
-        for i in truck.package_id_collection:
-            original_package = self.package_hashtable.search(i)
-            updated_package = original_package
-            time_user_input = string_to_timedelta(user_time)
-
-            # The flight with packages will arrive at 9:05 AM
-            flight_arrival_time = timedelta(hours=9, minutes=5)
-
-            delay = "Delayed on flight---will not arrive to depot until 9:05 am"
-
-            if original_package.notes == delay and \
-                    time_user_input < flight_arrival_time:
-                updated_package.delivery_status = "DELAYED - ON FLIGHT TO DEPOT"
-
-            elif time_user_input <= original_package.loading_time:
-                updated_package.delivery_status = "AT THE HUB"
-
-            elif time_user_input < original_package.time_tracker:
-                updated_package.delivery_status = "EN ROUTE"
-
-            elif time_user_input >= original_package.time_tracker:
-                updated_package.delivery_status = "DELIVERED"
+    # Name: index_packages
+    # Function: Updates the package index for packages whose status, truck,
+    # deadline or address may have changed
+    # Time Complexity: O(n)
+    # Space Complexity: O(1)
+    def index_packages(self, package_ids: list[int]) -> None:
+        for package_id in package_ids:
+            self.package_index.update(
+                self.package_hashtable.search(package_id))
+
+    # Name: find_packages
+    # Function: Returns the packages that match every criterion, in order of
+    # package id, i.e. find_packages(status="EN ROUTE", truck_id=7) or
+    # find_packages(zipcode=84115). The criteria are status, truck_id,
+    # deadline (any time in the hour of the deadline, or None for EOD),
+    # zipcode and address
+    # Time Complexity: O(k log k) for k matching packages
+    # Space Complexity: O(k)
+    def find_packages(self, **criteria) -> list[Package]:
+        return [self.package_hashtable.search(package_id)
+                for package_id in self.package_index.find(**criteria)]
+
+    # Name: apply_timeline
+    # Function: Updates the status, truck and delivery time of the packages
+    # in the package hash table to their values at a time of day
+    # Time Complexity: O(n log k) for n packages and k status changes
+    # Space Complexity: O(1)
+    def apply_timeline(self, timeline: DeliveryTimeline,
+                       time_of_day: timedelta,
+                       package_ids: list[int]) -> None:
+        for package_id in package_ids:
+            package = self.package_hashtable.search(package_id)
+            package.delivery_status = timeline.status_at(package_id,
+                                                         time_of_day)
+            package.truck_id, package.time_tracker = \
+                timeline.delivery(package_id)
+            self.package_changed(package_id)
 
             # Add updated package to the updated hashtable of packages
-            self.updated_package_hashtable.insert(updated_package.package_id,
-                                                  updated_package)
+            self.updated_package_hashtable.insert(package.package_id, package)
 
     # Name: read_package_data
-    # Function: Reads package data from a CSV file into a chaining hash table
-    # Time Complexity: O(n)
+    # Function: Reads package data from a CSV file into a chaining hash table.
+    # The file is streamed in chunks, and bad rows are reported with their
+    # line numbers and skipped instead of stopping the program
+    # Time Complexity: O(n log n)
     # Space Complexity: O(n)
     def read_package_data(self, filename: str) -> None:
-        # Open the CSV file
-        with open(filename) as packages:
-            package_data = csv.reader(packages, delimiter=',')
-            # For each row in csv file, separate data points into variables
-            for package in package_data:
-                package_id = int(package[0])
-                package_address = str(package[1])
-                package_city = str(package[2])
-                package_state = str(package[3])
-                package_zipcode = int(package[4])
-                package_deadline = str(package[5])
-                package_weight = int(package[6])
-                package_notes = str(package[7])
-
-                # Place data into Package object
-
-                p = Package(package_id, package_address, package_city,
-                            package_state, package_zipcode, package_deadline,
-                            package_weight, package_notes)
-
-                # Insert new Package object into hashtable
-                self.package_hashtable.insert(package_id, p)
-
-    # Name: read_distance_data
-    # Function: This method reads distance data from a CSV file into a 2D array
-    # Time Complexity: O(n^2)
+        package_ids = load_manifest(filename, self.package_hashtable,
+                                    self.resolve_location)
+        self.package_ids.extend(package_ids)
+        self.package_ids.sort()
+        self.index_packages(package_ids)
+
+    # Name: read_map_data
+    # Function: Reads the distance and location files through the binary
+    # cache kept next to them. The CSV files are only parsed when they have
+    # changed since the cache was written
+    # Time Complexity: O(n^2) to hash the files when the cache is valid
     # Space Complexity: O(n^2)
-    def read_distance_data(self, filename: str) -> None:
-
-        # Open CSV file
-        with open(filename) as distances:
-            distance_data = csv.reader(distances, delimiter=',')
-
-            # For every row in CSV file, convert each element to a float and
-            # append the row to 2D array
-            for row in distance_data:
-                distance_row = []
-                for distance in row:
-                    distance_row.append(distance)
-                self.distance_matrix.append(distance_row)
-
-    # Name: read_location_data
-    # Function: Reads data from locations/addresses file and stores it in
-    # in a list
-    # Time Complexity: O(n)
-    # Space Complexity: O(n)
-    def read_location_data(self, filename: str) -> None:
-
-        # Open CSV file and read it to a variable
-        with open(filename) as locations:
-            location_data = csv.reader(locations, delimiter=',')
+    def read_map_data(self, distance_file: str, location_file: str) -> None:
+        self.distance_matrix, locations = load_map(distance_file,
+                                                   location_file)
+        for _, location in locations:
+            self.location_index[location] = len(self.location_list)
+            self.location_list.append(location)
 
-            # For each row in the CSV file, take the third value at the index
-            # of the row, and add it to the location_list
-            for row in location_data:
-                location = row[2]
-                self.location_list.append(location)
+        self.check_locations()
 
-    # Name: calculate_distance
-    # Function: Calculates the distance between two addresses
+    # Name: check_locations
+    # Function: Checks that every location has a row in the distance matrix
     # Time Complexity: O(1)
     # Space Complexity: O(1)
-    def calculate_distance(self, a1: str, a2: str) -> float:
-
-        # Store the indexes of a1 and a2 in location_list
-        i = self.location_list.index(a1)
-        j = self.location_list.index(a2)
+    def check_locations(self) -> None:
+        if self.distance_matrix is not None and \
+                len(self.location_list) != len(self.distance_matrix):
+            raise ValueError(
+                f"{len(self.location_list)} locations were read but the "
+                f"distance matrix has {len(self.distance_matrix)} rows.")
+
+    # Name: resolve_location
+    # Function: Returns the location id (index in location_list) of an address
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def resolve_location(self, address: str) -> int:
+        try:
+            return self.location_index[address]
+        except KeyError:
+            raise ValueError(f"Unknown delivery address: {address}")
+
+    # Name: address_scenario
+    # Function: Returns a key for the package addresses WGUPS knows at a time
+    # of day. Two times with the same key have the same package data
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def address_scenario(self, time_of_day: timedelta) -> bool:
+        # Is the correct address of package 9 known?
+        return time_of_day >= ADDRESS_CORRECTION_TIME
+
+    # Name: apply_address_corrections
+    # Function: Sets package 9 to the address WGUPS knows at a time of day.
+    # The correct address is only known from 10:20 AM. Nothing changes if the
+    # package file has no such correction
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def apply_address_corrections(self, time_of_day: timedelta) -> None:
+        # Other package files (i.e. generated scenarios) do not have the
+        # addresses of package 9, so there is nothing to correct
+        if self.package_hashtable.search(9) is None or \
+                "410 S State St" not in self.location_index or \
+                "300 State St" not in self.location_index:
+            return
+
+        # Package 9 will update if the time is at least 10:20 AM. Else, the
+        # WGUPS program will act like it does not know the correct address
+        # for package 9 before 10:20 AM
+        if self.address_scenario(time_of_day):
+            self.update_package_address(9, "410 S State St",
+                                        "Salt Lake City", "UT", 84111)
+
+        # Else, return package 9 back to its original info
+        else:
+            self.update_package_address(9, "300 State St",
+                                        "Salt Lake City", "UT", 84103)
 
-        # Set distance variable
-        distance = self.distance_matrix[i][j]
+    # Name: update_package_address
+    # Function: Changes the address of a package in the package hashtable and
+    # re-resolves its location id
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def update_package_address(self, package_id: int, address: str, city: str,
+                               state: str, zipcode: int) -> None:
+        package = self.package_hashtable.search(package_id)
+        # The location id is part of the simulation cache key, so cached
+        # scenarios stay valid when the address changes
+        package.update_address(address, city, state, zipcode,
+                               self.resolve_location(address))
+
+        # Update package information in package hashtable
+        self.package_hashtable.insert(package.package_id, package)
+        self.package_changed(package_id)
 
-        # If distance is equal to an empty string in the csv file, flip
-        # the indexes because distance[i][j] = distance[j][i]
-        if distance == '':
-            distance = self.distance_matrix[j][i]
+    # Name: calculate_distance
+    # Function: Calculates the distance between two locations given their
+    # location ids
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def calculate_distance(self, l1: int, l2: int) -> float:
 
-        return float(distance)
+        # The matrix is symmetric, so the order of the indexes does not matter
+        return self.distance_matrix.distance(l1, l2)
 
     # Name: min_distance_from_address
-    # Function: Return the closest address to the inputted address
-    # Time Complexity: O(n)
-    # Space Complexity: O(n)
-    def min_distance_from_address(self, a1: str, truck: Truck) -> \
-            list[str, float, Package]:
-
-        # Set minimum distance to a very high value
-        min_distance = 5000.0
-        # Set min_address (nearest address) to an empty string
-        min_address = ""
-        # Set the pkg that needs to be delivered to the nearest address to None
-        p = None
-
-        # Iterate through every package's delivery address and find the closest
-        # address to address a1
-        for package in truck.package_collection:
-            a2 = package.delivery_address
-            distance = self.calculate_distance(a1, a2)
+    # Function: Return the location id of the closest pending stop to the
+    # inputted location id. pending is a pending set from
+    # DistanceMatrix.pending_set, with location i set while it still has
+    # packages to deliver
+    # Time Complexity: O(1) when a pending stop is near l1, O(n) worst case
+    # Space Complexity: O(1)
+    def min_distance_from_address(self, l1: int, pending: bytearray) -> \
+            list[int, float]:
 
-            if distance < min_distance:
-                min_distance = distance
-                min_address = a2
-                p = package
+        # Walk the locations sorted by distance from l1 and stop at the first
+        # one that still has packages waiting for delivery
+        min_address = self.distance_matrix.nearest_pending(l1, pending)
+        min_distance = self.calculate_distance(l1, min_address)
 
-        result = [min_address, min_distance, p]
+        result = [min_address, min_distance]
 
-        # Return the nearest address to a1, the distance between a1 and the
-        # nearest address, a2, and the package that is being delivered to
-        # the nearest address
+        # Return the nearest location to l1 and the distance between l1 and
+        # the nearest location
         return result
 
+    # Name: plan_route
+    # Function: Returns the order to visit the stops on the truck using the
+    # routing mode of the program, as routing.plan_route orders them, and
+    # the stops the route reaches after their deadline. Those need the time
+    # the truck leaves and the deadlines of the stops
+    # Time Complexity: O(n^2) for nearest neighbor, O(2^n * n^2) for exact,
+    # O(n^3) for deadline
+    # Space Complexity: O(n) for nearest neighbor, O(2^n * n) for exact
+    def plan_route(self, start: int, stops: list[int],
+                   departure: int = DAY_START,
+                   deadlines: dict[int, int] | None = None) -> \
+            tuple[list[int], list[int]]:
+        return plan_route(self.distance_matrix, start, stops,
+                          *self.route_settings(), departure, deadlines)
+
+    # Name: report_late_stops
+    # Function: Prints (to standard error) the packages a truck's route
+    # cannot deliver by their deadline, as soon as the route is planned.
+    # late_packages holds the packages of each late stop
+    # Time Complexity: O(n)
+    # Space Complexity: O(n)
+    def report_late_stops(self, truck: Truck,
+                          late_packages: list[list[Package]]) -> None:
+        package_ids = sorted(package.package_id
+                             for packages in late_packages
+                             for package in packages
+                             if package.deadline_seconds is not None)
+        noun = "package" if len(package_ids) == 1 else "packages"
+        print(f"Truck {truck.truck_id} cannot deliver {noun} "
+              f"{', '.join(str(package_id) for package_id in package_ids)} "
+              f"by their deadline.", file=sys.stderr)
+
     # Name: truck_deliver_packages
-    # Function: Deliver all packages on truck using nearest neighbor algorithm
+    # Function: Deliver all packages on truck along route, or the route
+    # chosen by plan_route if no route is given. The packages at the late
+    # stops of the route are reported before the truck leaves.
     # Update the time travelled by the truck after each package is delivered in
     # the package hash table and update delivery time and status
     # of each package on the truck
     # Time Complexity: O(n^2)
     # Space Complexity: O(n)
-    def truck_deliver_packages(self, truck: Truck) -> None:
+    def truck_deliver_packages(self, truck: Truck,
+                               route: list[int] | None = None,
+                               late: list[int] | None = None) -> None:
 
         # Deliver the rest of the packages on the truck
-        # Set hub address
-        hub = "4001 South 700 East"
+        # Set hub location
+        hub = self.resolve_location(HUB_ADDRESS)
+
+        # Group the packages on the truck by location, keeping the order they
+        # were loaded in. Each location is one stop no matter how many
+        # packages are delivered there
+        stop_packages = {}
+        for package in truck.package_collection:
+            stop_packages.setdefault(package.location_id, []).append(package)
+
+        if route is None:
+            route, late = self.plan_route(
+                hub, list(stop_packages), to_seconds(truck.time_truck),
+                stop_deadlines(truck.package_collection))
+        truck.route = route
+        if late and self.warn_late:
+            self.report_late_stops(truck, [stop_packages[location]
+                                           for location in late])
+
+        # Keep the truck's clock in seconds while it delivers, so no time
+        # objects are created per package. It is converted back to a
+        # timedelta once the truck is done
+        clock = to_seconds(truck.time_truck)
 
         # Initialize previous_address with hub address
-        previous_address = [hub, 0]
-        while len(truck.package_collection) > 0:
-            # For the closest address to the previous address,
-            # the nearest address is stored in nearest_address[0] and
-            # the package_id of the package that will
-            # be delivered there is stored in nearest_address[1]
-
-            # Find the nearest address to the previous address
-            nearest_address = self.min_distance_from_address(
-                previous_address[0], truck)
-
-            next_package = nearest_address[2]
-
-            # Calculate the distance between the previous address and
-            # nearest address
-            first_distance = self.calculate_distance(previous_address[0],
-                                                     nearest_address[0])
-            # Make truck travel to the nearest address and update the total
-            # distance the truck has travelled
-            truck.distance_travelled += first_distance
-
-            # Calculate the amount of time the truck took to
-            # reach the nearest address IN MINUTES
-            # Note that 18 miles per hour = 0.3 miles per minute
-            time_to_deliver = float(first_distance / 0.3)
-
-            # Update time of time_tracker attribute for package ON the truck
-            # to determine the time the package arrived at its destination
-            # This line calculates the amount of time passed between the
-            # previous address and the next nearest address and will be used to
-            # update time tracker for truck
-
-            truck_distance_travelled = \
-                time_elapsed_between_packages(time_to_deliver)
-
-            # Update time of truck_time attribute of truck which is used to
-            # track time for the truck after its travelled to a new address
-            add_time_to_truck(truck, truck_distance_travelled)
-
-            # Update package delivery time to the CURRENT truck time after the
-            # package has been delivered
-            next_package.time_tracker = truck.time_truck
-
-            # Update status of the delivered package to "DELIVERED"
-            # ON the truck
-            next_package.delivery_status = "DELIVERED"
-
-            # Store address of the package that was delivered
-            previous_address = nearest_address
-
-            # Insert delivered package into original hashtable
-            self.package_hashtable.insert(next_package.package_id, next_package)
-
-            # Find which package on the truck has the same delivery address
-            # as the nearest address and remove it from the truck because it has
-            # been delivered
-
-            # Remove package from truck
-            truck.package_collection.remove(next_package)
-            # Remove in visual package collection for debugger
-            truck.package_visual_collection.remove(next_package.package_id)
-
-    # Run this function in main method and use it as input for package lookup
-    # If the user inputs the time in the wrong format, raise an error
+        previous_address = hub
+        for location in route:
+            for next_package in stop_packages[location]:
+                # Calculate the distance between the previous address and
+                # the next stop. Packages after the first one at a stop are
+                # 0 miles away
+                first_distance = self.calculate_distance(previous_address,
+                                                         location)
+                # Make truck travel to the next stop and update the total
+                # distance the truck has travelled
+                truck.distance_travelled += first_distance
+
+                # Add the seconds the truck took to reach the next stop to
+                # its clock. Note that 18 miles per hour = 200 seconds per
+                # mile
+                clock += travel_seconds(first_distance)
+
+                # Update package delivery time to the CURRENT truck time after
+                # the package has been delivered
+                next_package.delivery_seconds = clock
+
+                # Update status of the delivered package to "DELIVERED"
+                # ON the truck
+                next_package.delivery_status = "DELIVERED"
+
+                # Store address of the package that was delivered
+                previous_address = location
+
+                # Insert delivered package into original hashtable
+                self.package_hashtable.insert(next_package.package_id,
+                                              next_package)
+
+                # Remove package from truck
+                truck.package_collection.remove(next_package)
+                # Remove in visual package collection for debugger
+                truck.package_visual_collection.remove(
+                    next_package.package_id)
+
+        # The time the truck delivered its last package
+        truck.time_truck = to_timedelta(clock)
 
     # Name: truck_load_packages
-    # Function: This function loads packages onto all trucks
-    # Time Complexity: O(1)
-    # Space Complexity: O(1)
-    def truck_load_packages(self, t1: Truck, t2: Truck, t3: Truck) -> None:
-
-        # Assign every package to a package variable
-
-        p1 = self.package_hashtable.search(1)
-        p2 = self.package_hashtable.search(2)
-        p3 = self.package_hashtable.search(3)
-        p4 = self.package_hashtable.search(4)
-        p5 = self.package_hashtable.search(5)
-        p6 = self.package_hashtable.search(6)
-        p7 = self.package_hashtable.search(7)
-        p8 = self.package_hashtable.search(8)
-        p9 = self.package_hashtable.search(9)
-        p10 = self.package_hashtable.search(10)
-        p11 = self.package_hashtable.search(11)
-        p12 = self.package_hashtable.search(12)
-        p13 = self.package_hashtable.search(13)
-        p14 = self.package_hashtable.search(14)
-        p15 = self.package_hashtable.search(15)
-        p16 = self.package_hashtable.search(16)
-        p17 = self.package_hashtable.search(17)
-        p18 = self.package_hashtable.search(18)
-        p19 = self.package_hashtable.search(19)
-        p20 = self.package_hashtable.search(20)
-        p21 = self.package_hashtable.search(21)
-        p22 = self.package_hashtable.search(22)
-        p23 = self.package_hashtable.search(23)
-        p24 = self.package_hashtable.search(24)
-        p25 = self.package_hashtable.search(25)
-        p26 = self.package_hashtable.search(26)
-        p27 = self.package_hashtable.search(27)
-        p28 = self.package_hashtable.search(28)
-        p29 = self.package_hashtable.search(29)
-        p30 = self.package_hashtable.search(30)
-        p31 = self.package_hashtable.search(31)
-        p32 = self.package_hashtable.search(32)
-        p33 = self.package_hashtable.search(33)
-        p34 = self.package_hashtable.search(34)
-        p35 = self.package_hashtable.search(35)
-        p36 = self.package_hashtable.search(36)
-        p37 = self.package_hashtable.search(37)
-        p38 = self.package_hashtable.search(38)
-        p39 = self.package_hashtable.search(39)
-        p40 = self.package_hashtable.search(40)
-
-        # Load Truck 1
-        t1.package_collection = [p4, p5, p7, p12, p13, p14, p15, p16, p19,
-                                 p20, p21, p29, p31, p34, p37, p40]
-
-        t1.package_id_collection = [4, 5, 7, 12, 13, 14, 15, 16, 19, 20,
-                                    21, 29, 31, 34, 37, 40]
-
-        t1.package_visual_collection = [4, 5, 7, 12, 13, 14, 15, 16, 19, 20,
-                                        21, 29, 31, 34, 37, 40]
-
-        # Load Truck 2
-        t2.package_collection = [p1, p2, p3, p6, p8, p10, p17, p18,
-                                 p27, p28, p30, p32, p33, p35, p36, p38]
-
-        t2.package_id_collection = [1, 2, 3, 6, 8, 10, 17, 18, 27, 28, 30, 32,
-                                    33, 35, 36, 38]
-
-        t2.package_visual_collection = [1, 2, 3, 6, 8, 10, 17, 18, 27, 28, 30,
-                                        32, 33, 35, 36, 38]
-
-        # Load Truck 3
-        t3.package_collection = [p9, p11, p22, p23, p24, p25, p26, p39]
-
-        t3.package_id_collection = [9, 11, 22, 23, 24, 25, 26, 39]
-
-        t3.package_visual_collection = [9, 11, 22, 23, 24, 25, 26, 39]
+    # Function: This function loads packages onto all trucks using the load
+    # planner. The first trucks leave with the drivers and the rest wait for
+    # a driver to return. Returns the earliest time each truck can leave the
+    # hub
+    # Time Complexity: O(n log n)
+    # Space Complexity: O(n)
+    def truck_load_packages(self, trucks: list[Truck]) -> \
+            dict[int, timedelta]:
+
+        # Collect every package from the package hashtable
+        packages = [self.package_hashtable.search(package_id)
+                    for package_id in self.package_ids]
+
+        # The correct address for package 9 is known at 10:20 AM
+        planner = LoadPlanner(self.distance_matrix,
+                              self.resolve_location(HUB_ADDRESS),
+                              max_weight=self.max_weight,
+                              drivers=self.drivers,
+                              address_correction_time=ADDRESS_CORRECTION_TIME)
+        return planner.plan(packages, trucks)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WGUPS Routing Program")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer TIME,PACKAGE_ID (or TIME,*) queries from "
+                             "FILE, or standard input if FILE is -, instead "
+                             "of showing the menu")
+    parser.add_argument("--format", choices=["csv", "json"], default="csv",
+                        help="output format of --batch (default: csv)")
+    parser.add_argument("--routing",
+                        choices=["nearest", "improve", "exact", "multistart",
+                                 "deadline"],
+                        default="nearest",
+                        help="algorithm used to order the stops on a truck "
+                             "(default: nearest)")
+    parser.add_argument("--exact-limit", type=int, default=16,
+                        help="most stops --routing exact solves exactly; "
+                             "trucks with more stops use --routing improve "
+                             "(default: 16)")
+    parser.add_argument("--data", metavar="DIR", default="../data",
+                        help="directory with the distance, location and "
+                             "package files (default: ../data)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="route independent trucks at the same time on "
+                             "this many workers (default: 0, one at a time)")
+    parser.add_argument("--pool", choices=["thread", "process"],
+                        default="thread",
+                        help="kind of worker pool used by --workers "
+                             "(default: thread)")
+    parser.add_argument("--starts", type=int, default=256,
+                        help="plans tried by --routing multistart "
+                             "(default: 256)")
+    parser.add_argument("--time-budget", type=float,
+                        help="most seconds --routing multistart searches for")
+    parser.add_argument("--trucks", type=int, default=3,
+                        help="number of trucks (default: 3)")
+    parser.add_argument("--drivers", type=int, default=2,
+                        help="number of drivers (default: 2)")
+    parser.add_argument("--max-weight", type=int, default=TRUCK_MAX_WEIGHT,
+                        help="most kilograms a truck can carry "
+                             f"(default: {TRUCK_MAX_WEIGHT})")
+    parser.add_argument("--depart", metavar="TRUCK=HH:MM", action="append",
+                        help="earliest time a truck may leave the hub; may "
+                             "be repeated (default: 2=09:05)")
+    parser.add_argument("--return-to-hub", action="store_true",
+                        help="trucks drive back to the hub after their last "
+                             "delivery, which adds to their miles and delays "
+                             "their driver's next truck")
+    parser.add_argument("--store", choices=["hashtable", "columnar"],
+                        default="hashtable",
+                        help="keep the packages in a chaining hash table or "
+                             "in a columnar package store "
+                             "(default: hashtable)")
+    parser.add_argument("--instrument", metavar="FILE",
+                        help="time the main steps, count distance lookups "
+                             "and hash table probes, and write them to FILE "
+                             "as JSON when the program exits")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="with --instrument, also run cProfile, add the "
+                             "slowest functions to the JSON and write the "
+                             "full statistics to FILE")
+    args = parser.parse_args()
+    if args.profile and not args.instrument:
+        parser.error("--profile requires --instrument")
+    if args.trucks < 1 or args.drivers < 1:
+        parser.error("--trucks and --drivers must be at least 1")
+    if args.max_weight < 1:
+        parser.error("--max-weight must be at least 1")
+    if args.exact_limit < 0:
+        parser.error("--exact-limit must not be negative")
+    departure_times = {2: timedelta(hours=9, minutes=5)}
+    if args.depart:
+        departure_times = {}
+        for departure in args.depart:
+            truck_id, _, time_text = departure.partition("=")
+            try:
+                departure_times[int(truck_id)] = \
+                    string_to_timedelta(time_text)
+            except ValueError:
+                parser.error(f"--depart expects TRUCK=HH:MM, not {departure}")
+
     main = Main()
+    main.multistart_starts = args.starts
+    main.multistart_time_budget = args.time_budget
+    main.workers = args.workers
+    main.pool = args.pool
+    main.routing_mode = args.routing
+    main.exact_stop_limit = args.exact_limit
+    main.data_directory = args.data
+    main.truck_count = args.trucks
+    main.drivers = args.drivers
+    main.departure_times = departure_times
+    main.max_weight = args.max_weight
+    main.return_to_hub = args.return_to_hub
+    if args.store == "columnar":
+        # The store takes the place of the hash table before any package is
+        # read into it
+        main.package_hashtable = PackageStore()
+        main.updated_package_hashtable = main.package_hashtable
+    if args.instrument:
+        # Instrumentation replaces the measured methods of this program only,
+        # so runs without it are not slowed down at all
+        instrumentation = Instrumentation(profile=bool(args.profile))
+        instrumentation.attach(main)
+        atexit.register(instrumentation.dump, args.instrument, args.profile)
+    if args.batch:
+        sys.exit(1 if main.batch(args.batch, args.format) else 0)
     main.main()
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import csv
+import sys
+from typing import Callable, Iterator, TextIO
+
+from packages import Package
+from package_store import PackageStore
+from planner import parse_deadline
+
+# The number of columns in a package row. Columns past the notes (i.e. the
+# empty column left by the comma that ends every row) are ignored
+COLUMNS = 8
+
+# A parsed package row: id, address, city, state, zipcode, deadline, weight
+# and notes
+PackageRow = tuple[int, str, str, str, int, str, int, str]
+
+
+# Name: report_to_stderr
+# Function: The default way bad rows are reported. Prints the line number
+# and the problem to standard error
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def report_to_stderr(line_number: int, message: str) -> None:
+    print(f"Line {line_number}: {message}", file=sys.stderr)
+
+
+# Name: parse_row
+# Function: Checks one package row and converts its fields to their types.
+# Raises ValueError describing the first problem found
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def parse_row(row: list[str]) -> PackageRow:
+    if len(row) < COLUMNS:
+        raise ValueError(f"Expected {COLUMNS} columns but found {len(row)}.")
+
+    try:
+        package_id = int(row[0])
+    except ValueError:
+        raise ValueError(f"Invalid package id: {row[0]!r}")
+    try:
+        zipcode = int(row[4])
+    except ValueError:
+        raise ValueError(f"Invalid zip code: {row[4]!r}")
+    try:
+        weight = int(row[6])
+    except ValueError:
+        raise ValueError(f"Invalid weight: {row[6]!r}")
+    try:
+        parse_deadline(row[5])
+    except (ValueError, IndexError):
+        raise ValueError(f"Invalid deadline: {row[5]!r}")
+
+    if package_id <= 0:
+        raise ValueError(f"Invalid package id: {package_id}")
+    if weight < 0:
+        raise ValueError(f"Invalid weight: {weight}")
+    if not row[1].strip():
+        raise ValueError("Missing address.")
+
+    return (package_id, row[1], row[2], row[3], zipcode, row[5], weight,
+            row[7])
+
+
+# Name: parse_chunk
+# Function: Converts a chunk of rows in bulk, one column at a time. If any
+# row in the chunk is bad, the chunk is parsed again row by row so every bad
+# row can be reported. Returns the parsed rows with their line numbers
+# Time Complexity: O(c) for c rows in the chunk
+# Space Complexity: O(c)
+def parse_chunk(rows: list[list[str]], line_numbers: list[int],
+                on_error: Callable[[int, str], None]) -> \
+        list[tuple[int, PackageRow]]:
+    try:
+        if min(map(len, rows)) < COLUMNS:
+            raise ValueError
+        package_ids = list(map(int, [row[0] for row in rows]))
+        zipcodes = list(map(int, [row[4] for row in rows]))
+        weights = list(map(int, [row[6] for row in rows]))
+        # Deadlines repeat a lot, so each distinct one is only checked once
+        for deadline in {row[5] for row in rows}:
+            parse_deadline(deadline)
+        if min(package_ids, default=1) <= 0 or min(weights, default=0) < 0 \
+                or not all(row[1].strip() for row in rows):
+            raise ValueError
+    except (ValueError, IndexError):
+        parsed = []
+        for line_number, row in zip(line_numbers, rows):
+            try:
+                parsed.append((line_number, parse_row(row)))
+            except ValueError as e:
+                on_error(line_number, str(e))
+        return parsed
+
+    return [(line_number, (package_id, row[1], row[2], row[3], zipcode,
+                           row[5], weight, row[7]))
+            for line_number, row, package_id, zipcode, weight
+            in zip(line_numbers, rows, package_ids, zipcodes, weights)]
+
+
+# Name: read_manifest
+# Function: Reads a package file and yields its valid rows in chunks of up
+# to chunk_size, each paired with its line number. Only one chunk of raw
+# text is held at a time. Bad rows (including repeated package ids) are
+# passed to on_error and skipped instead of stopping the read
+# Time Complexity: O(n)
+# Space Complexity: O(c + n) for chunk size c, since the package ids seen so
+# far are kept to catch repeats
+def read_manifest(file: TextIO, chunk_size: int = 10000,
+                  on_error: Callable[[int, str], None] = report_to_stderr) \
+        -> Iterator[list[tuple[int, PackageRow]]]:
+    if chunk_size <= 0:
+        raise ValueError("The chunk size must be positive.")
+
+    seen = set()
+    rows = []
+    line_numbers = []
+
+    # Name: flush
+    # Function: Parses the buffered rows and drops repeated package ids
+    def flush() -> list[tuple[int, PackageRow]]:
+        parsed = []
+        for line_number, row in parse_chunk(rows, line_numbers, on_error):
+            if row[0] in seen:
+                on_error(line_number, f"Package {row[0]} is listed again.")
+                continue
+            seen.add(row[0])
+            parsed.append((line_number, row))
+        rows.clear()
+        line_numbers.clear()
+        return parsed
+
+    reader = csv.reader(file)
+    for row in reader:
+        # Skip blank lines
+        if not row or not any(field.strip() for field in row):
+            continue
+        rows.append(row)
+        line_numbers.append(reader.line_num)
+        if len(rows) >= chunk_size:
+            chunk = flush()
+            if chunk:
+                yield chunk
+
+    if rows:
+        chunk = flush()
+        if chunk:
+            yield chunk
+
+
+# Name: load_manifest
+# Function: Streams a package file into a hash table of Package objects or a
+# PackageStore. resolve_location maps an address to its location id; a row
+# whose address it rejects with ValueError is reported and skipped. Returns
+# the ids of the packages loaded, in file order
+# Time Complexity: O(n)
+# Space Complexity: O(n)
+def load_manifest(filename: str, table,
+                  resolve_location: Callable[[str], int] | None = None,
+                  chunk_size: int = 10000,
+                  on_error: Callable[[int, str], None] = report_to_stderr) \
+        -> list[int]:
+    package_ids = []
+    locations = {}
+    to_store = isinstance(table, PackageStore)
+
+    with open(filename, newline='') as file:
+        for chunk in read_manifest(file, chunk_size, on_error):
+            for line_number, row in chunk:
+                location_id = -1
+                if resolve_location is not None:
+                    # Many packages share an address, so each address is
+                    # only resolved once
+                    address = row[1]
+                    location_id = locations.get(address)
+                    if location_id is None:
+                        try:
+                            location_id = resolve_location(address)
+                        except ValueError as e:
+                            on_error(line_number, str(e))
+                            continue
+                        locations[address] = location_id
+
+                if to_store:
+                    table.append(*row, location_id)
+                else:
+                    table.insert(row[0], Package(*row, location_id))
+                package_ids.append(row[0])
+
+    return package_ids
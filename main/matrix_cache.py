@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+from distances import DistanceMatrix
+
+# The cache file starts with this header:
+# magic, version, number of locations, SHA-256 of the two CSV files, then the
+# byte offsets of the distance matrix, the neighbor index and the address
+# table, and the length of the address table
+HEADER = struct.Struct('<8sII32sQQQQ')
+MAGIC = b'WGUPSMAP'
+VERSION = 1
+
+
+# Name: align
+# Function: Rounds an offset up to a multiple of 8 so that arrays in the
+# cache file can be read in place
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+# Name: files_digest
+# Function: Returns the SHA-256 of the contents of the distance and location
+# files. Hashing the text is much faster than parsing it
+# Time Complexity: O(b) for b bytes in the files
+# Space Complexity: O(1)
+def files_digest(distance_file: str, location_file: str) -> bytes:
+    digest = hashlib.sha256()
+    for filename in (distance_file, location_file):
+        with open(filename, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        # Separate the files so moving bytes between them changes the hash
+        digest.update(b'\0')
+    return digest.digest()
+
+
+# Name: cache_filename
+# Function: Returns the name of the cache file, which is kept next to the
+# distance file
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def cache_filename(distance_file: str) -> str:
+    return os.path.splitext(distance_file)[0] + '.bin'
+
+
+# Name: read_locations
+# Function: Reads the location file into a list of (name, address) pairs,
+# ordered by location id
+# Time Complexity: O(n)
+# Space Complexity: O(n)
+def read_locations(filename: str) -> list[tuple[str, str]]:
+    with open(filename) as locations:
+        return [(row[1], row[2]) for row in csv.reader(locations)]
+
+
+# Name: write_cache
+# Function: Writes the matrix, its neighbor index and the locations to a
+# cache file. The file is written under a temporary name and renamed, so a
+# reader never sees a half written file
+# Time Complexity: O(n^2)
+# Space Complexity: O(n)
+def write_cache(filename: str, digest: bytes, matrix: DistanceMatrix,
+                locations: list[tuple[str, str]]) -> None:
+    if matrix.neighbors is None:
+        matrix.build_neighbor_index()
+
+    size = matrix.size
+    table = json.dumps(locations).encode('utf-8')
+    matrix_offset = align(HEADER.size)
+    neighbors_offset = align(matrix_offset + 8 * size * size)
+    locations_offset = align(neighbors_offset + 4 * size * size)
+
+    temporary = f"{filename}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, size, digest,
+                                   matrix_offset, neighbors_offset,
+                                   locations_offset, len(table)))
+            file.seek(matrix_offset)
+            matrix.values.tofile(file)
+            file.seek(neighbors_offset)
+            matrix.neighbors.tofile(file)
+            file.seek(locations_offset)
+            file.write(table)
+        os.replace(temporary, filename)
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+# Name: open_cache
+# Function: Maps a cache file into memory and returns the matrix and the
+# locations it holds. The matrix and neighbor index are read straight from
+# the mapped pages, so nothing is parsed or copied and processes that open
+# the same file share its memory. Returns None if the file is missing, is
+# not a cache file or was built from different CSV files
+# Time Complexity: O(n) for the address table
+# Space Complexity: O(n), plus the shared mapping
+def open_cache(filename: str, digest: bytes) -> \
+        tuple[DistanceMatrix, list[tuple[str, str]]] | None:
+    try:
+        with open(filename, 'rb') as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # ValueError is raised when mapping an empty file
+        return None
+
+    if len(mapping) < HEADER.size:
+        mapping.close()
+        return None
+    magic, version, size, file_digest, matrix_offset, neighbors_offset, \
+        locations_offset, locations_length = HEADER.unpack_from(mapping)
+    if magic != MAGIC or version != VERSION or file_digest != digest or \
+            len(mapping) < locations_offset + locations_length:
+        mapping.close()
+        return None
+
+    view = memoryview(mapping)
+    cells = size * size
+    values = view[matrix_offset:matrix_offset + 8 * cells].cast('d')
+    neighbors = view[neighbors_offset:neighbors_offset + 4 * cells].cast('i')
+    table = bytes(view[locations_offset:locations_offset + locations_length])
+    locations = [tuple(location)
+                 for location in json.loads(table.decode('utf-8'))]
+
+    matrix = DistanceMatrix(size, values)
+    matrix.neighbors = neighbors
+    return matrix, locations
+
+
+# Name: load_map
+# Function: Returns the distance matrix (with its neighbor index) and the
+# locations for a distance and location file. The cache file next to the
+# distance file is used if it matches the contents of both files. Otherwise
+# the CSV files are parsed and the cache is rebuilt. If the cache cannot be
+# written (i.e. a read-only directory), the parsed data is still returned
+# Time Complexity: O(b) for b bytes in the files when the cache is valid,
+# O(n^2 log n) otherwise
+# Space Complexity: O(n^2)
+def load_map(distance_file: str, location_file: str) -> \
+        tuple[DistanceMatrix, list[tuple[str, str]]]:
+    digest = files_digest(distance_file, location_file)
+    filename = cache_filename(distance_file)
+
+    cached = open_cache(filename, digest)
+    if cached is not None:
+        return cached
+
+    matrix = DistanceMatrix.read_csv(distance_file)
+    matrix.build_neighbor_index()
+    locations = read_locations(location_file)
+    try:
+        write_cache(filename, digest, matrix, locations)
+    except OSError:
+        pass
+    return matrix, locations
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import random
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+import truck_jobs
+from clock import to_seconds, travel_seconds
+from dispatcher import Dispatcher, return_travel
+from distances import DistanceMatrix
+from truck_jobs import TruckJob
+
+# A truck's trip as seen by the search: truck id, loading time, ready time,
+# stops, and the deadlines of the packages at each stop (None for EOD). Times
+# are in seconds since midnight
+Trip = tuple[int, int, int, list[int], dict[int, list[int | None]]]
+
+
+# Name: randomized_route
+# Function: Returns a nearest neighbor route that moves to a random one of
+# the k nearest pending stops at every step. Only stops at most slack (i.e.
+# 0.2 for 20%) farther than the nearest one are chosen from, because picking
+# a much farther stop almost never leads to a shorter route. With k = 1 it
+# is the plain nearest neighbor route
+# Time Complexity: O(n^2) in the worst case
+# Space Complexity: O(n)
+def randomized_route(matrix: DistanceMatrix, start: int, stops: list[int],
+                     k: int, slack: float, rng: random.Random) -> list[int]:
+    pending = matrix.pending_set(stops)
+    remaining = len(set(stops))
+
+    route = []
+    previous = start
+    while remaining:
+        if k == 1:
+            previous = matrix.nearest_pending(previous, pending)
+        else:
+            candidates = matrix.closest(previous, k, pending)
+            limit = matrix.distance(previous, candidates[0]) * (1 + slack)
+            previous = rng.choice([location for location in candidates
+                                   if matrix.distance(previous, location)
+                                   <= limit])
+        route.append(previous)
+        pending[previous] = 0
+        remaining -= 1
+    return route
+
+
+# Name: build_trips
+# Function: Converts truck jobs into the trips the search works on. Only
+# plain data is kept, so the trips can be sent to worker processes
+# Time Complexity: O(n)
+# Space Complexity: O(n)
+def build_trips(jobs: list[TruckJob]) -> list[Trip]:
+    trips = []
+    for job in jobs:
+        deadlines = {}
+        for package in job.truck.package_collection:
+            deadlines.setdefault(package.location_id, []).append(
+                package.deadline_seconds)
+        trips.append((job.truck.truck_id, to_seconds(job.truck.loading_time),
+                      job.ready_time, job.stops, deadlines))
+    return trips
+
+
+# Name: evaluate_plan
+# Function: Replays the day for a route per truck the same way the trucks
+# deliver (18 miles per hour, each driver takes the waiting truck that is
+# ready first, and drives back to the hub if return_to_hub is True). Returns
+# the total miles and the number of packages delivered after their deadline
+# Time Complexity: O(n + t log t + t log d) for t trucks and d drivers
+# Space Complexity: O(d)
+def evaluate_plan(matrix: DistanceMatrix, start: int, trips: list[Trip],
+                  routes: dict[int, list[int]], drivers: int = 2,
+                  return_to_hub: bool = False) -> tuple[float, int]:
+    dispatcher = Dispatcher(drivers)
+    for trip in trips:
+        dispatcher.add_truck(max(trip[1], trip[2]), trip[0], trip)
+
+    total = 0.0
+    late = 0
+    while dispatcher.waiting():
+        trip, driver, clock = dispatcher.dispatch()
+        truck_id, _, _, _, deadlines = trip
+        previous = start
+        for location in routes[truck_id]:
+            distance = matrix.distance(previous, location)
+            total += distance
+            clock += travel_seconds(distance)
+            for deadline in deadlines[location]:
+                if deadline is not None and clock > deadline:
+                    late += 1
+            previous = location
+        if return_to_hub:
+            miles, travel = return_travel(matrix, start, routes[truck_id])
+            total += miles
+            clock += travel
+        dispatcher.release(driver, clock)
+    return total, late
+
+
+# Name: search_seeds
+# Function: Builds and scores one plan per seed and returns the best as
+# (late packages, miles, seed, routes). Seed 0 is the plain nearest neighbor
+# plan. The search stops early once time_budget seconds have passed, but
+# always finishes its first seed. drivers and return_to_hub are passed to
+# evaluate_plan
+# Time Complexity: O(s * n^2) for s seeds
+# Space Complexity: O(n)
+def search_seeds(matrix: DistanceMatrix, start: int, trips: list[Trip],
+                 seeds: list[int], k: int, slack: float,
+                 time_budget: float | None = None, drivers: int = 2,
+                 return_to_hub: bool = False) -> tuple:
+    deadline = None
+    if time_budget is not None:
+        deadline = time.perf_counter() + time_budget
+
+    best = None
+    for seed in seeds:
+        if best is not None and deadline is not None and \
+                time.perf_counter() > deadline:
+            break
+        rng = random.Random(seed)
+        choices = 1 if seed == 0 else k
+        routes = {trip[0]: randomized_route(matrix, start, trip[3], choices,
+                                            slack, rng)
+                  for trip in trips}
+        miles, late = evaluate_plan(matrix, start, trips, routes, drivers,
+                                    return_to_hub)
+        # A plan that meets every deadline always beats one that does not
+        candidate = (late, round(miles, 6), seed, routes)
+        if best is None or candidate[:3] < best[:3]:
+            best = candidate
+    return best
+
+
+# Name: search_in_worker
+# Function: Runs search_seeds with the distance matrix of the worker process
+# Time Complexity: O(s * n^2)
+# Space Complexity: O(n)
+def search_in_worker(start: int, trips: list[Trip], seeds: list[int], k: int,
+                     slack: float, time_budget: float | None, drivers: int,
+                     return_to_hub: bool) -> tuple:
+    return search_seeds(truck_jobs.worker_matrix, start, trips, seeds, k,
+                        slack, time_budget, drivers, return_to_hub)
+
+
+# Name: multistart_routes
+# Function: Returns the routes of the best of starts randomized plans. The
+# seeds are split across the workers of the executor (or run here if there
+# is none). The best plan meets every deadline with the fewest miles; if no
+# plan meets every deadline, the one with the fewest late packages wins.
+# Ties go to the lowest seed, so a fixed number of starts always gives the
+# same plan
+# Time Complexity: O(starts * n^2), divided among the workers
+# Space Complexity: O(w * n) for w workers
+def multistart_routes(matrix: DistanceMatrix, start: int,
+                      jobs: list[TruckJob], starts: int, k: int,
+                      slack: float, time_budget: float | None = None,
+                      executor: Executor | None = None,
+                      workers: int = 1, drivers: int = 2,
+                      return_to_hub: bool = False) -> dict[int, list[int]]:
+    trips = build_trips(jobs)
+    seeds = list(range(max(1, starts)))
+
+    if executor is None:
+        return search_seeds(matrix, start, trips, seeds, k, slack,
+                            time_budget, drivers, return_to_hub)[3]
+
+    chunks = [seeds[i::workers] for i in range(workers) if seeds[i::workers]]
+    if isinstance(executor, ProcessPoolExecutor):
+        futures = [executor.submit(search_in_worker, start, trips, chunk, k,
+                                   slack, time_budget, drivers, return_to_hub)
+                   for chunk in chunks]
+    else:
+        futures = [executor.submit(search_seeds, matrix, start, trips, chunk,
+                                   k, slack, time_budget, drivers,
+                                   return_to_hub)
+                   for chunk in chunks]
+    return min((future.result() for future in futures),
+               key=lambda result: result[:3])[3]
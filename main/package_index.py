@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from packages import Package
+
+# The fields packages are indexed by, in the order of the keys of a package
+FIELDS = ("status", "truck_id", "deadline", "zipcode", "address")
+# Deadlines are indexed by the hour they fall in
+DEADLINE_BUCKET_SECONDS = 3600
+
+
+# Name: deadline_bucket
+# Function: Returns the start (in seconds since midnight) of the hour a
+# deadline falls in, or None for packages due by the end of day
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def deadline_bucket(deadline_seconds: int | None) -> int | None:
+    if deadline_seconds is None:
+        return None
+    return deadline_seconds - deadline_seconds % DEADLINE_BUCKET_SECONDS
+
+
+# Name: index_keys
+# Function: Returns the keys a package is indexed under, one per field in
+# FIELDS
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def index_keys(package: Package) -> tuple:
+    return (package.delivery_status, package.truck_id,
+            deadline_bucket(package.deadline_seconds),
+            package.delivery_zipcode, package.delivery_address)
+
+
+class PackageIndex:
+    """
+    Secondary indexes over packages by delivery status, truck, deadline
+    hour, zipcode and delivery address.
+
+    Each index maps a key to the set of ids of the packages with that key.
+    The index does not watch the packages, so call update whenever the
+    status, truck, deadline or address of a package changes. Only the
+    indexes whose key changed are touched.
+
+    A query (i.e. every package EN ROUTE on truck 7) looks up one set per
+    field and checks the ids of the smallest set against the others, so it
+    takes time proportional to the result, not to every package.
+
+    === Instance Attributes ===
+    indexes: Maps each field in FIELDS to its index, a dictionary from a key
+    to the ids of the packages with that key. Packages that are not loaded
+    have the truck id None, and packages due by the end of day have the
+    deadline None
+
+    === Private Attributes ===
+    _keys: Maps the id of every indexed package to the keys it is indexed
+    under, so they can be found again when the package changes
+    """
+    indexes: dict[str, dict[object, set[int]]]
+    _keys: dict[int, tuple]
+
+    # Name: __init__
+    # Function: Initializes an empty package index object
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __init__(self) -> None:
+        self.indexes = {field: {} for field in FIELDS}
+        self._keys = {}
+
+    # Name: update
+    # Function: Indexes a package, or moves it to its new keys if it is
+    # already indexed. Nothing changes if its keys are the same
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def update(self, package: Package) -> None:
+        package_id = package.package_id
+        keys = index_keys(package)
+        old_keys = self._keys.get(package_id)
+        if keys == old_keys:
+            return
+
+        for position, field in enumerate(FIELDS):
+            key = keys[position]
+            if old_keys is not None:
+                if old_keys[position] == key:
+                    continue
+                self._discard(field, old_keys[position], package_id)
+            self.indexes[field].setdefault(key, set()).add(package_id)
+        self._keys[package_id] = keys
+
+    # Name: remove
+    # Function: Removes a package from every index. Nothing happens if it is
+    # not indexed
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def remove(self, package_id: int) -> None:
+        old_keys = self._keys.pop(package_id, None)
+        if old_keys is None:
+            return
+        for field, key in zip(FIELDS, old_keys):
+            self._discard(field, key, package_id)
+
+    # Name: _discard
+    # Function: Removes a package id from one key of an index. Keys left
+    # without packages are dropped
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def _discard(self, field: str, key, package_id: int) -> None:
+        index = self.indexes[field]
+        package_ids = index[key]
+        package_ids.discard(package_id)
+        if not package_ids:
+            del index[key]
+
+    # Name: _matching_sets
+    # Function: Returns the set of package ids for every field in criteria,
+    # smallest first. A deadline is looked up by the hour it falls in
+    # Time Complexity: O(f log f) for f fields
+    # Space Complexity: O(f)
+    def _matching_sets(self, criteria: dict) -> list[set[int]]:
+        if not criteria:
+            raise ValueError("Give at least one of: " + ", ".join(FIELDS))
+
+        matching = []
+        for field, key in criteria.items():
+            if field not in self.indexes:
+                raise ValueError(f"Packages are not indexed by {field}.")
+            if field == "deadline":
+                key = deadline_bucket(key)
+            matching.append(self.indexes[field].get(key, set()))
+        matching.sort(key=len)
+        return matching
+
+    # Name: find
+    # Function: Returns the ids, in order, of the packages that match every
+    # criterion, i.e. find(status="EN ROUTE", truck_id=7) or
+    # find(zipcode=84115)
+    # Time Complexity: O(k log k + k * f) for k packages in the smallest
+    # matching set and f fields
+    # Space Complexity: O(k)
+    def find(self, **criteria) -> list[int]:
+        smallest, *others = self._matching_sets(criteria)
+        return sorted(package_id for package_id in smallest
+                      if all(package_id in other for other in others))
+
+    # Name: count
+    # Function: Returns the number of packages that match every criterion.
+    # A single criterion is counted without looking at its packages
+    # Time Complexity: O(1) for one field, O(k * f) otherwise
+    # Space Complexity: O(1)
+    def count(self, **criteria) -> int:
+        smallest, *others = self._matching_sets(criteria)
+        if not others:
+            return len(smallest)
+        return sum(1 for package_id in smallest
+                   if all(package_id in other for other in others))
+
+    # Name: counts
+    # Function: Returns the number of packages under every key of one field,
+    # i.e. the number of packages per status
+    # Time Complexity: O(u) for u distinct keys
+    # Space Complexity: O(u)
+    def counts(self, field: str) -> dict:
+        if field not in self.indexes:
+            raise ValueError(f"Packages are not indexed by {field}.")
+        return {key: len(package_ids)
+                for key, package_ids in self.indexes[field].items()}
+
+    # Name: __len__
+    # Function: Returns the number of indexed packages
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __len__(self) -> int:
+        return len(self._keys)
@@ -0,0 +1,442 @@
+from __future__ import annotations
+
+from array import array
+from datetime import timedelta
+from typing import Iterable, Iterator
+
+from clock import DAY_START, deadline_seconds
+from packages import Package
+from timeline import AT_THE_HUB, CANCELLED, DELAYED, DELIVERED, EN_ROUTE
+
+# Statuses are stored as small integer codes
+STATUSES = [AT_THE_HUB, EN_ROUTE, DELIVERED, DELAYED, CANCELLED]
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Stored in place of a deadline for packages due by the end of day, and in
+# place of a truck id for packages that are not loaded
+NONE = -1
+
+
+class StringTable:
+    """
+    A table of distinct strings. Every string is stored once and referred to
+    by its index, so repeated values such as city names cost one integer per
+    package.
+
+    === Instance Attributes ===
+    strings: The distinct strings, in the order they were added
+
+    indexes: Maps each string to its index in strings
+    """
+    strings: list[str]
+    indexes: dict[str, int]
+
+    # Name: __init__
+    # Function: Initializes string table object
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __init__(self) -> None:
+        self.strings = []
+        self.indexes = {}
+
+    # Name: intern
+    # Function: Returns the index of a string, adding it if it is new
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def intern(self, string: str) -> int:
+        index = self.indexes.get(string)
+        if index is None:
+            index = len(self.strings)
+            self.indexes[string] = index
+            self.strings.append(string)
+        return index
+
+
+# Name: column
+# Function: Returns a property of PackageView that reads and writes one
+# integer column of the store
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def column(name: str) -> property:
+    def get(view: PackageView) -> int:
+        return getattr(view.store, name)[view.row]
+
+    def set(view: PackageView, value: int) -> None:
+        getattr(view.store, name)[view.row] = value
+
+    return property(get, set)
+
+
+# Name: string_column
+# Function: Returns a property of PackageView that reads and writes one
+# column of string table indexes of the store
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def string_column(name: str) -> property:
+    def get(view: PackageView) -> str:
+        return view.store.strings.strings[getattr(view.store, name)[view.row]]
+
+    def set(view: PackageView, value: str) -> None:
+        getattr(view.store, name)[view.row] = view.store.strings.intern(value)
+
+    return property(get, set)
+
+
+# Name: time_column
+# Function: Returns a property of PackageView that reads and writes one
+# column of times (in seconds) of the store as timedelta objects. None (the
+# time of a cancelled package) is stored as NONE
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def time_column(name: str) -> property:
+    def get(view: PackageView) -> timedelta | None:
+        seconds = getattr(view.store, name)[view.row]
+        return None if seconds == NONE else timedelta(seconds=seconds)
+
+    def set(view: PackageView, value: timedelta | None) -> None:
+        getattr(view.store, name)[view.row] = NONE if value is None \
+            else round(value.total_seconds())
+
+    return property(get, set)
+
+
+class PackageView:
+    """
+    A lightweight view of one package in a PackageStore. It has the same
+    attributes and methods as a Package, but reads and writes them in the
+    store's columns instead of holding them itself. Two views of the same
+    row are equal.
+
+    === Instance Attributes ===
+    store: The store that holds the package
+
+    row: The row of the package in the store
+    """
+    __slots__ = ('store', 'row')
+
+    store: PackageStore
+    row: int
+
+    # Name: __init__
+    # Function: Initializes package view object
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __init__(self, store: PackageStore, row: int) -> None:
+        self.store = store
+        self.row = row
+
+    package_id = column('package_ids')
+    location_id = column('location_ids')
+    delivery_zipcode = column('zipcodes')
+    weight = column('weights')
+    delivery_address = string_column('addresses')
+    delivery_city = string_column('cities')
+    delivery_state = string_column('states')
+    delivery_deadline = string_column('deadline_texts')
+    notes = string_column('notes')
+    loading_time = time_column('loading_times')
+    time_tracker = time_column('delivery_times')
+    delivery_seconds = column('delivery_times')
+
+    # Name: deadline_seconds
+    # Function: Returns the delivery deadline of the package in seconds since
+    # midnight, or None if it is due by the end of day
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    @property
+    def deadline_seconds(self) -> int | None:
+        deadline = self.store.deadlines[self.row]
+        return None if deadline == NONE else deadline
+
+    # Name: delivery_status
+    # Function: Returns the delivery status of the package
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    @property
+    def delivery_status(self) -> str:
+        return STATUSES[self.store.statuses[self.row]]
+
+    @delivery_status.setter
+    def delivery_status(self, status: str) -> None:
+        self.store.statuses[self.row] = STATUS_CODES[status]
+
+    # Name: truck_id
+    # Function: Returns the number of the truck the package is loaded onto,
+    # or None if it has not been loaded
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    @property
+    def truck_id(self) -> int | None:
+        truck_id = self.store.truck_ids[self.row]
+        return None if truck_id == NONE else truck_id
+
+    @truck_id.setter
+    def truck_id(self, truck_id: int | None) -> None:
+        self.store.truck_ids[self.row] = NONE if truck_id is None \
+            else truck_id
+
+    # Name: update_address
+    # Function: Changes the delivery address of the package along with the
+    # location id the new address resolves to
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def update_address(self, address: str, city: str, state: str,
+                       zipcode: int, location_id: int) -> None:
+        self.delivery_address = address
+        self.delivery_city = city
+        self.delivery_state = state
+        self.delivery_zipcode = zipcode
+        self.location_id = location_id
+
+    # Name: update_deadline
+    # Function: Changes the delivery deadline of the package (i.e. 10:30:00
+    # or EOD) along with the deadline in seconds it is parsed to
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def update_deadline(self, deadline: str) -> None:
+        self.delivery_deadline = deadline
+        deadline_time = deadline_seconds(deadline)
+        self.store.deadlines[self.row] = NONE if deadline_time is None \
+            else deadline_time
+
+    # Name: __eq__
+    # Function: Returns whether another object is a view of the same row of
+    # the same store
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PackageView) and \
+            other.store is self.store and other.row == self.row
+
+    # Name: __hash__
+    # Function: Returns the hash of the row the view refers to
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __hash__(self) -> int:
+        return hash(self.row)
+
+    # Name: __str__
+    # Function: Provides a readable String representation of the package
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __str__(self):
+        return Package.__str__(self)
+
+    # Name: __repr__
+    # Function: Provides a String representation of the PackageView object
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __repr__(self):
+        return f"PackageView(id_num={self.package_id}, " \
+               f"address='{self.delivery_address}', " \
+               f"delivery_status='{self.delivery_status}', " \
+               f"time tracker={self.time_tracker})"
+
+
+class PackageStore:
+    """
+    A columnar store of packages. Each attribute of every package is kept in
+    its own typed array, with one row per package. Text columns hold indexes
+    into a shared string table. Deadlines and times are stored as whole
+    seconds since midnight.
+
+    Bulk scans (i.e. every late package) read the arrays directly without
+    creating a Python object per package. PackageView gives attribute access
+    to a single row for code written against Package.
+
+    === Instance Attributes ===
+    package_ids, location_ids, zipcodes, weights: Integer columns
+
+    deadlines: The deadline of each package in seconds, or NONE for EOD
+
+    statuses: The status code of each package (an index into STATUSES)
+
+    truck_ids: The truck each package is loaded onto, or NONE
+
+    loading_times, delivery_times: The time each package leaves the hub and
+    is delivered, in seconds
+
+    addresses, cities, states, deadline_texts, notes: Indexes of the text of
+    each package in strings
+
+    strings: The string table shared by every text column
+
+    rows: Maps a package id to its row
+    """
+    package_ids: array
+    location_ids: array
+    zipcodes: array
+    weights: array
+    deadlines: array
+    statuses: array
+    truck_ids: array
+    loading_times: array
+    delivery_times: array
+    addresses: array
+    cities: array
+    states: array
+    deadline_texts: array
+    notes: array
+    strings: StringTable
+    rows: dict[int, int]
+
+    # Name: __init__
+    # Function: Initializes an empty package store object
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __init__(self) -> None:
+        self.package_ids = array('q')
+        self.location_ids = array('i')
+        self.zipcodes = array('i')
+        self.weights = array('i')
+        self.deadlines = array('i')
+        self.statuses = array('b')
+        self.truck_ids = array('i')
+        self.loading_times = array('i')
+        self.delivery_times = array('i')
+        self.addresses = array('i')
+        self.cities = array('i')
+        self.states = array('i')
+        self.deadline_texts = array('i')
+        self.notes = array('i')
+        self.strings = StringTable()
+        self.rows = {}
+
+    # Name: append
+    # Function: Adds a package to the store and returns its row. The package
+    # starts at the hub, unloaded, with a loading time of 8:00 AM
+    # Time Complexity: O(1) amortized
+    # Space Complexity: O(1)
+    def append(self, package_id: int, address: str, city: str, state: str,
+               zipcode: int, deadline: str, weight: int, notes: str,
+               location_id: int = -1) -> int:
+        if package_id in self.rows:
+            raise ValueError(f"Package {package_id} is already in the store.")
+
+        intern = self.strings.intern
+        deadline_time = deadline_seconds(deadline)
+        # Loading time and time tracker both start at 8:00 AM like Package
+        start = DAY_START
+
+        row = len(self.package_ids)
+        self.package_ids.append(package_id)
+        self.location_ids.append(location_id)
+        self.zipcodes.append(zipcode)
+        self.weights.append(weight)
+        self.deadlines.append(NONE if deadline_time is None
+                              else deadline_time)
+        self.statuses.append(STATUS_CODES[AT_THE_HUB])
+        self.truck_ids.append(NONE)
+        self.loading_times.append(start)
+        self.delivery_times.append(start)
+        self.addresses.append(intern(address))
+        self.cities.append(intern(city))
+        self.states.append(intern(state))
+        self.deadline_texts.append(intern(deadline))
+        self.notes.append(intern(notes))
+        self.rows[package_id] = row
+        return row
+
+    # Name: from_packages
+    # Function: Builds a store holding a copy of every package
+    # Time Complexity: O(n)
+    # Space Complexity: O(n)
+    @classmethod
+    def from_packages(cls, packages: Iterable[Package]) -> PackageStore:
+        store = cls()
+        for package in packages:
+            store.insert(package.package_id, package)
+        return store
+
+    # Name: insert
+    # Function: Copies a package (a Package or a view of any store) into the
+    # store. A package id that is already in the store has its row updated,
+    # like the insert of a hash table, so the store can be used in place of
+    # the package hash table
+    # Time Complexity: O(1) amortized
+    # Space Complexity: O(1)
+    def insert(self, package_id: int, package: Package) -> bool:
+        row = self.rows.get(package_id)
+        if row is None:
+            row = self.append(package_id, package.delivery_address,
+                              package.delivery_city, package.delivery_state,
+                              package.delivery_zipcode,
+                              package.delivery_deadline, package.weight,
+                              package.notes, package.location_id)
+        else:
+            view = PackageView(self, row)
+            # A view of the row itself has nothing to copy
+            if view == package:
+                return True
+            view.update_address(package.delivery_address,
+                                package.delivery_city, package.delivery_state,
+                                package.delivery_zipcode, package.location_id)
+            view.update_deadline(package.delivery_deadline)
+            view.weight = package.weight
+            view.notes = package.notes
+
+        view = PackageView(self, row)
+        view.delivery_status = package.delivery_status
+        view.truck_id = package.truck_id
+        view.loading_time = package.loading_time
+        view.time_tracker = package.time_tracker
+        return True
+
+    # Name: search
+    # Function: Returns a view of the package with the id, or None if it is
+    # not in the store
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def search(self, package_id: int) -> PackageView | None:
+        row = self.rows.get(package_id)
+        if row is None:
+            return None
+        return PackageView(self, row)
+
+    # Name: view_row
+    # Function: Returns a view of the package in a row
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def view_row(self, row: int) -> PackageView:
+        return PackageView(self, row)
+
+    # Name: late_packages
+    # Function: Yields the id of every delivered package that was delivered
+    # after its deadline
+    # Time Complexity: O(n)
+    # Space Complexity: O(1)
+    def late_packages(self) -> Iterator[int]:
+        delivered = STATUS_CODES[DELIVERED]
+        deadlines = self.deadlines
+        delivery_times = self.delivery_times
+        statuses = self.statuses
+        for row, package_id in enumerate(self.package_ids):
+            deadline = deadlines[row]
+            if deadline != NONE and statuses[row] == delivered and \
+                    delivery_times[row] > deadline:
+                yield package_id
+
+    # Name: with_status
+    # Function: Yields the id of every package with a delivery status
+    # Time Complexity: O(n)
+    # Space Complexity: O(1)
+    def with_status(self, status: str) -> Iterator[int]:
+        code = STATUS_CODES[status]
+        package_ids = self.package_ids
+        for row, current in enumerate(self.statuses):
+            if current == code:
+                yield package_ids[row]
+
+    # Name: count_status
+    # Function: Returns the number of packages with a delivery status
+    # Time Complexity: O(n)
+    # Space Complexity: O(1)
+    def count_status(self, status: str) -> int:
+        return self.statuses.count(STATUS_CODES[status])
+
+    # Name: __len__
+    # Function: Returns the number of packages in the store
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __len__(self) -> int:
+        return len(self.package_ids)
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from datetime import timedelta
 
+from clock import DAY_START, deadline_seconds
+
 
 class Package:
     """
@@ -16,33 +18,52 @@ class Package:
 
     delivery_zipcode: The zipcode the package is delivered to
 
+    location_id: The index of the delivery address in the location list. It
+    is resolved when the package is read and whenever its address changes
+
     weight: The weight of the package (in kilograms)
 
     delivery_status: The delivery status of the package (i.e. AT THE HUB,
     EN ROUTE, DELIVERED, DELAYED - ON FLIGHT TO DEPOT)
 
+    truck_id: The number of the truck the package is loaded onto, or None if
+    it has not been loaded yet
+
     loading_time: The time the package is loaded onto the truck
 
     time_tracker: The time the package is delivered
+
+    deadline_seconds: The delivery deadline in seconds since midnight, or
+    None if the package is due by the end of day. It is parsed once, when
+    the package is created
+
+    delivery_seconds: The time the package is delivered in seconds since
+    midnight. The simulation keeps its clock in seconds and only reports
+    convert it to a timedelta
     """
     package_id: int
     delivery_address: str
     delivery_city: str
     delivery_state: str
     delivery_zipcode: int
+    location_id: int
     delivery_deadline: str
     weight: int
     notes: str
     delivery_status: str
+    truck_id: int | None
     loading_time: timedelta
     time_tracker: timedelta
+    deadline_seconds: int | None
+    delivery_seconds: int
 
     # Name: __init__
     # Function: Initializes package object
     # Time Complexity: O(1)
     # Space Complexity: O(1)
     def __init__(self, id_num: int, address: str, city: str, state: str,
-                 zipcode: int, deadline: str, weight: int, notes: str) -> None:
+                 zipcode: int, deadline: str, weight: int, notes: str,
+                 location_id: int = -1) -> None:
         """
         Initialize package.
 
@@ -61,11 +82,14 @@ class Package:
         self.delivery_city = city
         self.delivery_state = state
         self.delivery_zipcode = zipcode
+        # -1 means the address has not been resolved to a location yet
+        self.location_id = location_id
         self.delivery_deadline = deadline
         self.notes = notes
         self.weight = weight
 
         self.delivery_status = 'AT THE HUB'
+        self.truck_id = None
         # Loading time is the time the packages are loaded onto the track
         self.loading_time = timedelta(hours=8, minutes=0)
         # Time tracker acts as a counter to track the time that passes as the
@@ -73,6 +97,30 @@ class Package:
         # the same value as the loading time and has time added to it everytime
         # a package is delivered
         self.time_tracker = self.loading_time
+        self.deadline_seconds = deadline_seconds(deadline)
+        self.delivery_seconds = DAY_START
+
+    # Name: update_address
+    # Function: Changes the delivery address of the package along with the
+    # location id the new address resolves to
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def update_address(self, address: str, city: str, state: str,
+                       zipcode: int, location_id: int) -> None:
+        self.delivery_address = address
+        self.delivery_city = city
+        self.delivery_state = state
+        self.delivery_zipcode = zipcode
+        self.location_id = location_id
+
+    # Name: update_deadline
+    # Function: Changes the delivery deadline of the package (i.e. 10:30:00
+    # or EOD) along with the deadline in seconds it is parsed to
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def update_deadline(self, deadline: str) -> None:
+        self.delivery_deadline = deadline
+        self.deadline_seconds = deadline_seconds(deadline)
 
     # Name: __str__
     # Function: Provides a readable String representation of the Package object
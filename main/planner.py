@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import re
+from datetime import timedelta
+
+from clock import deadline_seconds
+from distances import DistanceMatrix
+from packages import Package
+from trucks import Truck
+
+# Patterns for the special notes in the package file
+TRUCK_NOTE = re.compile(r"Can only be on truck (\d+)", re.IGNORECASE)
+DELAYED_NOTE = re.compile(r"Delayed on flight.*?(\d{1,2}):(\d{2})\s*([ap]m)?",
+                          re.IGNORECASE)
+WITH_NOTE = re.compile(r"Must be delivered with ([\d ,&and]+)", re.IGNORECASE)
+WRONG_ADDRESS_NOTE = re.compile(r"Wrong address", re.IGNORECASE)
+
+# The most kilograms a truck carries. Packages weigh at most 88 kilograms, so
+# a full truck of 16 heavy packages is over the limit, while the bundled
+# loads weigh at most 349 kilograms
+TRUCK_MAX_WEIGHT = 1000
+
+
+# Name: parse_deadline
+# Function: Converts a deadline from the package file (i.e. 10:30:00 or EOD)
+# to a timedelta. EOD returns None
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def parse_deadline(deadline: str) -> timedelta | None:
+    seconds = deadline_seconds(deadline)
+    return None if seconds is None else timedelta(seconds=seconds)
+
+
+# Name: parse_flight_arrival
+# Function: Returns the time a delayed package arrives at the hub from its
+# notes, or None if the package is not delayed
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def parse_flight_arrival(notes: str) -> timedelta | None:
+    match = DELAYED_NOTE.search(notes)
+    if not match:
+        return None
+    hours = int(match.group(1)) % 12
+    if (match.group(3) or "am").lower() == "pm":
+        hours += 12
+    return timedelta(hours=hours, minutes=int(match.group(2)))
+
+
+class InfeasibleLoad(ValueError):
+    """
+    Raised when the packages cannot all be loaded onto the trucks, i.e. when
+    there are more packages than the trucks can carry, or a package must be
+    on a truck that does not exist.
+    """
+
+
+class LoadUnit:
+    """
+    A group of packages that must be loaded onto the same truck.
+
+    === Instance Attributes ===
+    packages: The packages in the group
+
+    truck_id: The id of the only truck the group can be loaded onto, or None
+    if any truck can be used
+
+    available_time: The earliest time every package in the group is at the
+    hub
+
+    deadline: The earliest delivery deadline in the group, or None if every
+    package is due by the end of day
+
+    wrong_address: True if a package in the group has a wrong address that
+    will only be corrected later in the day
+    """
+    packages: list[Package]
+    truck_id: int | None
+    available_time: timedelta
+    deadline: timedelta | None
+    wrong_address: bool
+
+    # Name: __init__
+    # Function: Initializes load unit object
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __init__(self) -> None:
+        self.packages = []
+        self.truck_id = None
+        self.available_time = timedelta(hours=0)
+        self.deadline = None
+        self.wrong_address = False
+
+    # Name: add
+    # Function: Adds a package to the group and merges its constraints
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def add(self, package: Package) -> None:
+        self.packages.append(package)
+        notes = package.notes
+
+        match = TRUCK_NOTE.search(notes)
+        if match:
+            truck_id = int(match.group(1))
+            if self.truck_id is not None and self.truck_id != truck_id:
+                raise InfeasibleLoad(
+                    f"Package {package.package_id} must be on truck "
+                    f"{truck_id} but is grouped with packages for truck "
+                    f"{self.truck_id}.")
+            self.truck_id = truck_id
+
+        arrival = parse_flight_arrival(notes)
+        if arrival is not None:
+            self.available_time = max(self.available_time, arrival)
+
+        if WRONG_ADDRESS_NOTE.search(notes):
+            self.wrong_address = True
+
+        deadline = parse_deadline(package.delivery_deadline)
+        if deadline is not None and \
+                (self.deadline is None or deadline < self.deadline):
+            self.deadline = deadline
+
+
+class LoadPlanner:
+    """
+    Assigns packages to trucks from the special notes in the package file,
+    the delivery deadlines, the truck capacity and the package weights.
+
+    The first trucks (one per driver) leave the hub at their loading time.
+    The remaining trucks leave once a driver returns, so their departure time
+    is not known while loading. Packages are loaded in this order:
+
+    1. Packages that can only be on one truck.
+    2. Packages with a wrong address. They go on a truck that leaves once a
+    driver returns, which gives the address time to be corrected.
+    3. Packages with a deadline, earliest deadline first. They go on the
+    earliest truck with a known departure time that leaves after the package
+    arrives at the hub.
+    4. Every other package. It goes on the truck that already visits the
+    closest location to the package.
+
+    Packages that must be delivered together are loaded as one unit. A unit
+    that none of these trucks can take (i.e. with as many drivers as trucks)
+    goes on any truck it fits on, and that truck leaves once the unit is
+    ready.
+
+    === Instance Attributes ===
+    distance_matrix: The distances between every pair of locations
+
+    hub: The location id of the hub
+
+    capacity: The most packages a truck can carry
+
+    max_weight: The most weight (in kilograms) a truck can carry, or None if
+    weight is not limited
+
+    drivers: The number of drivers. The first drivers trucks leave at their
+    loading time and the rest wait for a driver to return
+
+    address_correction_time: The time wrong addresses are corrected, or None
+    if it is not known. Packages with a wrong address are not ready to leave
+    the hub before this time
+    """
+    distance_matrix: DistanceMatrix
+    hub: int
+    capacity: int
+    max_weight: int | None
+    drivers: int
+    address_correction_time: timedelta | None
+
+    # Name: __init__
+    # Function: Initializes load planner object
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __init__(self, distance_matrix: DistanceMatrix, hub: int,
+                 capacity: int = 16,
+                 max_weight: int | None = TRUCK_MAX_WEIGHT,
+                 drivers: int = 2,
+                 address_correction_time: timedelta | None = None) -> None:
+        self.distance_matrix = distance_matrix
+        self.hub = hub
+        self.capacity = capacity
+        self.max_weight = max_weight
+        self.drivers = drivers
+        self.address_correction_time = address_correction_time
+
+    # Name: build_units
+    # Function: Groups packages that must be delivered together into load
+    # units using a union-find over the package ids
+    # Time Complexity: O(n * a(n)), nearly O(n)
+    # Space Complexity: O(n)
+    def build_units(self, packages: list[Package]) -> list[LoadUnit]:
+        parent = {package.package_id: package.package_id
+                  for package in packages}
+
+        def find(package_id: int) -> int:
+            while parent[package_id] != package_id:
+                parent[package_id] = parent[parent[package_id]]
+                package_id = parent[package_id]
+            return package_id
+
+        for package in packages:
+            match = WITH_NOTE.search(package.notes)
+            if not match:
+                continue
+            for other in re.findall(r"\d+", match.group(1)):
+                other = int(other)
+                if other not in parent:
+                    raise ValueError(
+                        f"Package {package.package_id} must be delivered "
+                        f"with package {other}, which is not in the "
+                        f"manifest.")
+                parent[find(other)] = find(package.package_id)
+
+        units = {}
+        for package in packages:
+            root = find(package.package_id)
+            if root not in units:
+                units[root] = LoadUnit()
+            units[root].add(package)
+
+        # A package with a wrong address cannot leave the hub until its
+        # address is corrected
+        if self.address_correction_time is not None:
+            for unit in units.values():
+                if unit.wrong_address:
+                    unit.available_time = max(unit.available_time,
+                                              self.address_correction_time)
+        return list(units.values())
+
+    # Name: plan
+    # Function: Loads every package onto one of the trucks. Returns the
+    # earliest time each truck can leave, which is when the last package
+    # loaded onto it is ready at the hub
+    # Time Complexity: O(n log n + n * t * l) for n packages, t trucks and
+    # l locations. In practice the neighbor walk stops after a few locations
+    # Space Complexity: O(n + t * l)
+    def plan(self, packages: list[Package], trucks: list[Truck]) -> \
+            dict[int, timedelta]:
+        units = self.build_units(packages)
+
+        loads = {truck.truck_id: [] for truck in trucks}
+        ready_times = {truck.truck_id: timedelta(hours=0) for truck in trucks}
+        weights = {truck.truck_id: 0 for truck in trucks}
+        # The locations each truck already visits, as a pending set of the
+        # distance matrix
+        stops = {truck.truck_id: self.distance_matrix.pending_set(())
+                 for truck in trucks}
+        hub_only = self.distance_matrix.pending_set((self.hub,))
+
+        first_wave = trucks[:self.drivers]
+        second_wave = trucks[self.drivers:]
+
+        # Name: fits
+        # Function: Returns True if the unit fits onto the truck
+        def fits(unit: LoadUnit, truck: Truck) -> bool:
+            if unit.truck_id is not None and unit.truck_id != truck.truck_id:
+                return False
+            if len(loads[truck.truck_id]) + len(unit.packages) > \
+                    self.capacity:
+                return False
+            if self.max_weight is not None:
+                weight = sum(package.weight for package in unit.packages)
+                if weights[truck.truck_id] + weight > self.max_weight:
+                    return False
+            return True
+
+        # Name: load
+        # Function: Loads the unit onto the truck
+        def load(unit: LoadUnit, truck: Truck) -> None:
+            ready_times[truck.truck_id] = max(ready_times[truck.truck_id],
+                                              unit.available_time)
+            for package in unit.packages:
+                loads[truck.truck_id].append(package)
+                weights[truck.truck_id] += package.weight
+                stops[truck.truck_id][package.location_id] = 1
+
+        # Name: closeness
+        # Function: Returns how far the unit is from the closest location the
+        # truck already visits. An empty truck is measured from the hub
+        def closeness(unit: LoadUnit, truck: Truck) -> float:
+            visited = stops[truck.truck_id] if loads[truck.truck_id] \
+                else hub_only
+            location = unit.packages[0].location_id
+            nearest = self.distance_matrix.nearest_pending(location, visited)
+            return self.distance_matrix.distance(location, nearest)
+
+        # Name: eligible
+        # Function: Returns the trucks the unit may be loaded onto
+        def eligible(unit: LoadUnit) -> list[Truck]:
+            if unit.wrong_address:
+                candidates = [truck for truck in second_wave
+                              if fits(unit, truck)]
+            else:
+                candidates = [truck for truck in first_wave
+                              if truck.loading_time >= unit.available_time
+                              and fits(unit, truck)]
+                # Packages due by the end of day can always wait for a
+                # driver. Packages with a deadline only wait if no other
+                # truck can take them
+                if unit.deadline is None or not candidates:
+                    candidates += [truck for truck in second_wave
+                                   if fits(unit, truck)]
+
+            # With as many drivers as trucks there is no truck that waits
+            # for a driver, so the unit goes on any truck it fits on. That
+            # truck waits for the unit, because load moves its ready time
+            if not candidates:
+                candidates = [truck for truck in trucks if fits(unit, truck)]
+            return candidates
+
+        pinned = [unit for unit in units if unit.truck_id is not None]
+        wrong_address = [unit for unit in units
+                         if unit.truck_id is None and unit.wrong_address]
+        timed = [unit for unit in units if unit.truck_id is None
+                 and not unit.wrong_address and unit.deadline is not None]
+        untimed = [unit for unit in units if unit.truck_id is None
+                   and not unit.wrong_address and unit.deadline is None]
+
+        timed.sort(key=lambda unit: (unit.deadline, unit.available_time))
+        # Place the packages farthest from the hub first so the trucks'
+        # areas are decided by the outlying stops
+        untimed.sort(key=lambda unit: -self.distance_matrix.distance(
+            self.hub, unit.packages[0].location_id))
+
+        # Name: departure
+        # Function: Returns the earliest time the truck can leave with what
+        # is loaded onto it so far
+        def departure(truck: Truck) -> timedelta:
+            return max(truck.loading_time, ready_times[truck.truck_id])
+
+        # Name: delay
+        # Function: Returns how much longer the truck would wait at the hub
+        # for the unit and how many packages already loaded onto it would
+        # wait too
+        def delay(unit: LoadUnit, truck: Truck) -> tuple[int, timedelta]:
+            wait = max(unit.available_time - departure(truck), timedelta(0))
+            if not wait:
+                return 0, wait
+            return len(loads[truck.truck_id]), wait
+
+        unloaded = []
+        for unit in pinned + wrong_address + timed:
+            candidates = eligible(unit)
+            if not candidates:
+                unloaded.extend(unit.packages)
+                continue
+            # Prefer the truck that delays the fewest packages (and then
+            # waits the least) for the unit, then the truck that leaves
+            # first, then the closest one
+            load(unit, min(candidates, key=lambda truck: (
+                truck in second_wave, delay(unit, truck), departure(truck),
+                closeness(unit, truck))))
+
+        for unit in untimed:
+            candidates = eligible(unit)
+            if not candidates:
+                unloaded.extend(unit.packages)
+                continue
+            load(unit, min(candidates,
+                           key=lambda truck: closeness(unit, truck)))
+
+        if unloaded:
+            raise InfeasibleLoad(
+                "No truck can carry packages " +
+                ", ".join(str(package.package_id) for package in unloaded))
+
+        for truck in trucks:
+            load_list = sorted(loads[truck.truck_id],
+                               key=lambda package: package.package_id)
+            for package in load_list:
+                package.truck_id = truck.truck_id
+            truck.package_collection = load_list
+            truck.package_id_collection = [package.package_id
+                                           for package in load_list]
+            truck.package_visual_collection = [package.package_id
+                                               for package in load_list]
+
+        return ready_times
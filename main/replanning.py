@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from datetime import timedelta
+
+from clock import to_seconds, to_timedelta, travel_seconds
+from dispatcher import Dispatcher, return_travel
+from distances import DistanceMatrix
+from packages import Package
+from routing import plan_route
+from timeline import DeliveryTimeline
+from truck_jobs import stop_deadlines
+from trucks import Truck
+
+# The kinds of re-planning events
+ADDRESS_CHANGE = "address change"
+NEW_PACKAGE = "new package"
+CANCELLATION = "cancellation"
+EVENT_KINDS = (ADDRESS_CHANGE, NEW_PACKAGE, CANCELLATION)
+
+
+class ReplanEvent:
+    """
+    A change to the packages of the day that becomes known at a time of day.
+
+    === Instance Attributes ===
+    kind: ADDRESS_CHANGE, NEW_PACKAGE or CANCELLATION
+
+    time: The time of day the change becomes known
+
+    package: The package that changes. For an address change, the package
+    already has its new address and location id. For a new package, it is
+    the package to add
+    """
+    kind: str
+    time: timedelta
+    package: Package
+
+    # Name: __init__
+    # Function: Initializes replan event object
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __init__(self, kind: str, time: timedelta, package: Package) -> None:
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown event kind: {kind}")
+        self.kind = kind
+        self.time = time
+        self.package = package
+
+
+class TruckSchedule:
+    """
+    The planned trip of one truck, which re-planning changes in place. Times
+    are in seconds since midnight.
+
+    === Instance Attributes ===
+    truck_id: The number of the truck
+
+    earliest_departure: The earliest time the truck may leave the hub
+
+    departure: The time the truck leaves the hub
+
+    route: The location ids of the stops the truck visits, in order
+
+    stop_packages: The ids of the packages delivered at each stop of route.
+    A stop may deliver nothing if the truck was already driving there when
+    its packages were taken off
+
+    arrivals: The time the truck reaches each stop of route
+
+    distance: The number of miles the truck travels
+
+    finish_time: The time the truck's driver is free again, after the last
+    stop (or back at the hub if trucks return to it)
+    """
+    truck_id: int
+    earliest_departure: int
+    departure: int
+    route: list[int]
+    stop_packages: list[list[int]]
+    arrivals: list[int]
+    distance: float
+    finish_time: int
+
+    # Name: __init__
+    # Function: Initializes truck schedule object. The times are set by
+    # Replanner.retime
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __init__(self, truck_id: int, earliest_departure: int,
+                 departure: int, route: list[int],
+                 stop_packages: list[list[int]]) -> None:
+        self.truck_id = truck_id
+        self.earliest_departure = earliest_departure
+        self.departure = departure
+        self.route = route
+        self.stop_packages = stop_packages
+        self.arrivals = []
+        self.distance = 0.0
+        self.finish_time = departure
+
+    # Name: delivered_stops
+    # Function: Returns the number of stops the truck has reached by a time
+    # of day in seconds. The arrivals are in order, so this is a binary
+    # search
+    # Time Complexity: O(log n)
+    # Space Complexity: O(1)
+    def delivered_stops(self, time: int) -> int:
+        return bisect_right(self.arrivals, time)
+
+
+class Replanner:
+    """
+    Re-plans a simulated day one event at a time.
+
+    Only the truck an event affects is routed again, and only from where
+    it is at the time of the event. The stops it has already reached are
+    frozen, and so is the stop it is driving to. Every other truck keeps its
+    route. A truck that has not left yet only has its times moved if it
+    waits for the driver of a truck whose trip now ends at another time.
+
+    === Instance Attributes ===
+    matrix: The distances between every pair of locations
+
+    hub: The location id of the hub
+
+    packages: Maps a package id to the package
+
+    schedules: The schedule of every truck, in the order the trucks are
+    given drivers
+
+    settings: The routing settings passed to routing.plan_route
+
+    drivers: The number of drivers
+
+    return_to_hub: Whether trucks drive back to the hub after their last
+    stop
+
+    capacity: The most packages a truck can carry
+
+    cancelled: Maps the id of every cancelled package to the time of day it
+    was cancelled
+
+    === Private Attributes ===
+    _truck_of: Maps the id of every package still to be delivered (or
+    already delivered) to the number of its truck
+    """
+    matrix: DistanceMatrix
+    hub: int
+    packages: dict[int, Package]
+    schedules: list[TruckSchedule]
+    settings: tuple
+    drivers: int
+    return_to_hub: bool
+    capacity: int
+    cancelled: dict[int, timedelta]
+    _truck_of: dict[int, int]
+
+    # Name: __init__
+    # Function: Initializes replanner object from a simulated day.
+    # earliest_departures maps a truck id to the earliest time it may leave
+    # the hub. Trucks missing from it may not leave before the time they
+    # left in the simulated day
+    # Time Complexity: O(n)
+    # Space Complexity: O(n)
+    def __init__(self, matrix: DistanceMatrix, hub: int,
+                 timeline: DeliveryTimeline, packages: dict[int, Package],
+                 earliest_departures: dict[int, timedelta] | None = None,
+                 settings: tuple = ("nearest",), drivers: int = 2,
+                 return_to_hub: bool = False, capacity: int = 16) -> None:
+        self.matrix = matrix
+        self.hub = hub
+        self.packages = packages
+        self.settings = settings
+        self.drivers = drivers
+        self.return_to_hub = return_to_hub
+        self.capacity = capacity
+        self.cancelled = {}
+        self._truck_of = {}
+
+        earliest_departures = earliest_departures or {}
+        self.schedules = []
+        for record in timeline.trucks:
+            departure = to_seconds(record.loading_time)
+            earliest = earliest_departures.get(record.truck_id)
+            stops = {location: [] for location in record.route}
+            for package_id in record.package_ids:
+                stops[packages[package_id].location_id].append(package_id)
+                self._truck_of[package_id] = record.truck_id
+            schedule = TruckSchedule(
+                record.truck_id,
+                departure if earliest is None else to_seconds(earliest),
+                departure, list(record.route),
+                [stops[location] for location in record.route])
+            self.retime(schedule)
+            self.schedules.append(schedule)
+
+    # Name: retime
+    # Function: Recomputes the arrival times, miles and finish time of a
+    # schedule from its departure
+    # Time Complexity: O(s) for s stops
+    # Space Complexity: O(s)
+    def retime(self, schedule: TruckSchedule) -> None:
+        clock = schedule.departure
+        previous = self.hub
+        distance = 0.0
+        schedule.arrivals = []
+        for location in schedule.route:
+            miles = self.matrix.distance(previous, location)
+            distance += miles
+            clock += travel_seconds(miles)
+            schedule.arrivals.append(clock)
+            previous = location
+        if self.return_to_hub:
+            miles, travel = return_travel(self.matrix, self.hub,
+                                          schedule.route)
+            distance += miles
+            clock += travel
+        schedule.distance = distance
+        schedule.finish_time = clock
+
+    # Name: schedule_of
+    # Function: Returns the schedule of a truck
+    # Time Complexity: O(t) for t trucks
+    # Space Complexity: O(1)
+    def schedule_of(self, truck_id: int) -> TruckSchedule:
+        for schedule in self.schedules:
+            if schedule.truck_id == truck_id:
+                return schedule
+        raise ValueError(f"There is no truck {truck_id}.")
+
+    # Name: choose_truck
+    # Function: Returns the schedule of the truck a new package goes on: of
+    # the trucks still at the hub with room for it, the one whose route
+    # passes closest to the package
+    # Time Complexity: O(t * s) for t trucks with s stops
+    # Space Complexity: O(1)
+    def choose_truck(self, package: Package, time: int) -> \
+            TruckSchedule:
+        best = None
+        for schedule in self.schedules:
+            load = sum(len(packages) for packages in schedule.stop_packages)
+            if schedule.departure < time or load >= self.capacity:
+                continue
+            closest = min((self.matrix.distance(location, package.location_id)
+                           for location in [self.hub] + schedule.route))
+            if best is None or closest < best[0]:
+                best = (closest, schedule)
+        if best is None:
+            raise ValueError(f"No truck at the hub has room for package "
+                             f"{package.package_id}.")
+        return best[1]
+
+    # Name: apply
+    # Function: Applies an event and re-plans the truck it affects. Returns
+    # the ids of the trucks whose schedules changed. A package that has
+    # already been delivered cannot change
+    # Time Complexity: O(cost of routing the affected truck + t log d) for t
+    # trucks and d drivers
+    # Space Complexity: O(s)
+    def apply(self, event: ReplanEvent) -> list[int]:
+        package = event.package
+        package_id = package.package_id
+        time = to_seconds(event.time)
+
+        if event.kind == NEW_PACKAGE:
+            if package_id in self._truck_of:
+                raise ValueError(f"Package {package_id} is already planned.")
+            schedule = self.choose_truck(package, time)
+            self.packages[package_id] = package
+        else:
+            if package_id not in self._truck_of:
+                raise ValueError(f"Package {package_id} is not planned.")
+            schedule = self.schedule_of(self._truck_of[package_id])
+
+        # The stops the truck has reached, and the one it is driving to,
+        # are frozen. A truck still at the hub is re-planned from the hub
+        if schedule.departure >= time:
+            frozen = 0
+        else:
+            frozen = min(schedule.delivered_stops(time) + 1,
+                         len(schedule.route))
+
+        # Take the package off its stop. It must not be delivered yet
+        if event.kind != NEW_PACKAGE:
+            for index, packages in enumerate(schedule.stop_packages):
+                if package_id in packages:
+                    if schedule.arrivals[index] <= time:
+                        raise ValueError(
+                            f"Package {package_id} was delivered at "
+                            f"{to_timedelta(schedule.arrivals[index])}.")
+                    packages.remove(package_id)
+                    break
+
+        if event.kind == CANCELLATION:
+            del self._truck_of[package_id]
+            self.cancelled[package_id] = event.time
+        else:
+            self._truck_of[package_id] = schedule.truck_id
+
+        # Gather the packages still to be delivered by stop
+        remaining = {}
+        for location, packages in zip(schedule.route[frozen:],
+                                      schedule.stop_packages[frozen:]):
+            if packages:
+                remaining.setdefault(location, []).extend(packages)
+        if event.kind != CANCELLATION:
+            remaining.setdefault(package.location_id, []).append(package_id)
+
+        # Route the remaining stops from where the truck will be once it
+        # reaches the last frozen stop
+        if frozen:
+            start = schedule.route[frozen - 1]
+            clock = schedule.arrivals[frozen - 1]
+        else:
+            start = self.hub
+            clock = schedule.departure
+        deadlines = stop_deadlines([self.packages[package_id]
+                                    for packages in remaining.values()
+                                    for package_id in packages])
+        order, _ = plan_route(self.matrix, start, list(remaining),
+                              *self.settings, departure=clock,
+                              deadlines=deadlines)
+
+        schedule.route[frozen:] = order
+        schedule.stop_packages[frozen:] = [remaining[location]
+                                           for location in order]
+        self.retime(schedule)
+        return [schedule.truck_id] + self.dispatch(time)
+
+    # Name: dispatch
+    # Function: Gives the trucks drivers again with the new finish times,
+    # and moves the times of every truck still at the hub whose departure
+    # changes. Trucks that left before time keep their departure. Returns
+    # the ids of the trucks that were moved
+    # Time Complexity: O(t log d + s) for t trucks with s stops
+    # Space Complexity: O(d)
+    def dispatch(self, time: int) -> list[int]:
+        dispatcher = Dispatcher(self.drivers)
+        for schedule in self.schedules:
+            dispatcher.add_truck(schedule.earliest_departure,
+                                 schedule.truck_id, schedule)
+
+        moved = []
+        while dispatcher.waiting():
+            schedule, driver, departure = dispatcher.dispatch()
+            # A truck still at the hub cannot leave before now
+            departure = max(departure, time)
+            if schedule.departure > time and departure != schedule.departure:
+                schedule.departure = departure
+                self.retime(schedule)
+                moved.append(schedule.truck_id)
+            dispatcher.release(driver, schedule.finish_time)
+        return moved
+
+    # Name: publish
+    # Function: Writes the schedules of trucks to their packages (truck,
+    # loading time and delivery time), and returns the packages and a truck
+    # per schedule, as DeliveryTimeline.replace takes them
+    # Time Complexity: O(n) for n packages on the trucks
+    # Space Complexity: O(n)
+    def publish(self, truck_ids: list[int]) -> \
+            tuple[list[Package], list[Truck]]:
+        packages = []
+        trucks = []
+        for truck_id in dict.fromkeys(truck_ids):
+            schedule = self.schedule_of(truck_id)
+            truck = Truck(to_timedelta(schedule.departure), truck_id)
+            truck.time_truck = to_timedelta(schedule.finish_time)
+            truck.distance_travelled = schedule.distance
+            truck.route = list(schedule.route)
+            for arrival, package_ids in zip(schedule.arrivals,
+                                            schedule.stop_packages):
+                for package_id in package_ids:
+                    package = self.packages[package_id]
+                    package.truck_id = truck_id
+                    package.loading_time = truck.loading_time
+                    package.delivery_seconds = arrival
+                    packages.append(package)
+                    truck.package_id_collection.append(package_id)
+            truck.package_id_collection.sort()
+            trucks.append(truck)
+        return packages, trucks
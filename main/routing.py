@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import time
+from array import array
+from clock import travel_seconds
+from distances import DistanceMatrix
+
+
+# Name: route_distance
+# Function: Returns the number of miles travelled when starting at location
+# start and visiting the locations in route in order
+# Time Complexity: O(n)
+# Space Complexity: O(1)
+def route_distance(matrix: DistanceMatrix, start: int,
+                   route: list[int]) -> float:
+    total = 0.0
+    previous = start
+    for location in route:
+        total += matrix.distance(previous, location)
+        previous = location
+    return total
+
+
+# Name: held_karp_route
+# Function: Returns the order to visit every stop in stops, starting at
+# location start, that travels the fewest miles. The route does not return to
+# start. This is the Held-Karp dynamic programming algorithm
+# Time Complexity: O(2^n * n^2)
+# Space Complexity: O(2^n * n)
+def held_karp_route(matrix: DistanceMatrix, start: int,
+                    stops: list[int]) -> list[int]:
+    # Remove duplicate stops, keeping the order they were given in
+    stops = list(dict.fromkeys(stops))
+    n = len(stops)
+    if n <= 1:
+        return stops
+
+    # cost[mask * n + j] is the fewest miles needed to leave start, visit every
+    # stop in the set mask and finish at stop j (which must be in mask).
+    # parent[mask * n + j] is the stop visited right before j on that path
+    full = 1 << n
+    infinity = float('inf')
+    cost = array('d', [infinity]) * (full * n)
+    parent = array('b', [-1]) * (full * n)
+
+    # Precompute the distances between the stops so the inner loop only
+    # indexes small local arrays
+    from_start = [matrix.distance(start, stop) for stop in stops]
+    between = [[matrix.distance(a, b) for b in stops] for a in stops]
+
+    for j in range(n):
+        cost[(1 << j) * n + j] = from_start[j]
+
+    for mask in range(1, full):
+        base = mask * n
+        for j in range(n):
+            current = cost[base + j]
+            if current == infinity:
+                continue
+            row = between[j]
+            for k in range(n):
+                bit = 1 << k
+                if mask & bit:
+                    continue
+                index = (mask | bit) * n + k
+                candidate = current + row[k]
+                if candidate < cost[index]:
+                    cost[index] = candidate
+                    parent[index] = j
+
+    # Find the stop the cheapest complete path ends at
+    base = (full - 1) * n
+    last = min(range(n), key=lambda j: cost[base + j])
+
+    # Walk the parents back from the last stop to rebuild the route
+    route = []
+    mask = full - 1
+    while last != -1:
+        route.append(stops[last])
+        previous = parent[mask * n + last]
+        mask &= ~(1 << last)
+        last = previous
+    route.reverse()
+    return route
+
+
+# Name: two_opt_move
+# Function: Finds the first 2-opt move (reversing the segment route[i..j])
+# that shortens the route and applies it. Returns True if a move was made
+# Time Complexity: O(n^2)
+# Space Complexity: O(n)
+def two_opt_move(matrix: DistanceMatrix, start: int, route: list[int]) -> bool:
+    distance = matrix.distance
+    n = len(route)
+    for i in range(n - 1):
+        before = route[i - 1] if i > 0 else start
+        first = route[i]
+        removed_first = distance(before, first)
+        for j in range(i + 1, n):
+            last = route[j]
+            # Reversing route[i..j] replaces the edges before-first and
+            # last-after with before-last and first-after. The last stop of
+            # the route has no edge after it
+            delta = distance(before, last) - removed_first
+            if j + 1 < n:
+                after = route[j + 1]
+                delta += distance(first, after) - distance(last, after)
+            if delta < -1e-9:
+                route[i:j + 1] = route[i:j + 1][::-1]
+                return True
+    return False
+
+
+# Name: or_opt_move
+# Function: Finds the first Or-opt move (moving a segment of 1 to 3 stops,
+# possibly reversed, to another place in the route) that shortens the route
+# and applies it. Returns True if a move was made
+# Time Complexity: O(n^2)
+# Space Complexity: O(n)
+def or_opt_move(matrix: DistanceMatrix, start: int, route: list[int]) -> bool:
+    distance = matrix.distance
+    n = len(route)
+    for length in (1, 2, 3):
+        for i in range(n - length + 1):
+            j = i + length - 1
+            first = route[i]
+            last = route[j]
+            before = route[i - 1] if i > 0 else start
+            # Savings from taking the segment out and joining its neighbors
+            if j + 1 < n:
+                after = route[j + 1]
+                removal = distance(before, first) + distance(last, after) \
+                    - distance(before, after)
+            else:
+                removal = distance(before, first)
+
+            # Try to insert the segment between every other pair of
+            # consecutive stops. k is the stop the segment is placed after,
+            # with -1 standing for the start location
+            for k in range(-1, n):
+                if i - 1 <= k <= j:
+                    continue
+                left = route[k] if k >= 0 else start
+                right = route[k + 1] if k + 1 < n else None
+                for reverse in (False, True):
+                    head, tail = (last, first) if reverse else (first, last)
+                    insertion = distance(left, head)
+                    if right is not None:
+                        insertion += distance(tail, right) \
+                            - distance(left, right)
+                    if insertion - removal < -1e-9:
+                        segment = route[i:j + 1]
+                        if reverse:
+                            segment.reverse()
+                        del route[i:j + 1]
+                        # Removing the segment shifts every later stop left
+                        position = k + 1 if k < i else k + 1 - length
+                        route[position:position] = segment
+                        return True
+    return False
+
+
+# Name: improve_route
+# Function: Shortens a route with 2-opt and Or-opt moves until no move helps
+# or the iteration or time budget runs out. Returns the improved route
+# Time Complexity: O(iterations * n^2)
+# Space Complexity: O(n)
+def improve_route(matrix: DistanceMatrix, start: int, route: list[int],
+                  max_iterations: int = 1000,
+                  time_budget: float | None = None) -> list[int]:
+    route = list(route)
+    deadline = None
+    if time_budget is not None:
+        deadline = time.perf_counter() + time_budget
+
+    for _ in range(max_iterations):
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        if not two_opt_move(matrix, start, route) and \
+                not or_opt_move(matrix, start, route):
+            break
+    return route
+
+
+# Name: nearest_neighbor_route
+# Function: Returns the order to visit the stops using the nearest neighbor
+# algorithm, starting at location start
+# Time Complexity: O(n^2) in the worst case
+# Space Complexity: O(n)
+def nearest_neighbor_route(matrix: DistanceMatrix, start: int,
+                           stops: list[int]) -> list[int]:
+    # Mark every stop as pending
+    pending = matrix.pending_set(stops)
+    remaining = len(set(stops))
+
+    route = []
+    previous = start
+    while remaining:
+        previous = matrix.nearest_pending(previous, pending)
+        route.append(previous)
+        pending[previous] = 0
+        remaining -= 1
+    return route
+
+
+# Name: deadline_insertion_route
+# Function: Returns the order to visit the stops built by cheapest insertion
+# with deadlines, and the stops that cannot be reached by their deadline.
+# The truck leaves start at departure, and deadlines maps a stop to the time
+# it must be reached by, both in seconds since midnight. Stops with a
+# deadline are inserted first, earliest deadline first on ties. Every step
+# inserts the stop and position that add the fewest miles without making any
+# stop late. A stop that fits nowhere is inserted where it adds the fewest
+# miles and reported as late
+# Time Complexity: O(n^3)
+# Space Complexity: O(n)
+def deadline_insertion_route(matrix: DistanceMatrix, start: int,
+                             stops: list[int], departure: int,
+                             deadlines: dict[int, int]) -> \
+        tuple[list[int], list[int]]:
+    distance = matrix.distance
+    infinity = float('inf')
+
+    due = {}
+    for stop in dict.fromkeys(stops):
+        deadline = deadlines.get(stop)
+        due[stop] = infinity if deadline is None else deadline
+
+    route = []
+    late = []
+    # arrival[i] is the time the truck reaches route[i]. latest[i] is the
+    # latest it may reach route[i] and still reach every stop from i on by
+    # its deadline. With both, an insertion is checked in O(1): the new stop
+    # must be reached by its deadline, and the delay it adds must not push
+    # the next stop past its latest arrival
+    arrival = []
+    latest = []
+
+    # Name: update_times
+    # Function: Recomputes arrival forwards and latest backwards
+    def update_times() -> None:
+        arrival.clear()
+        clock = departure
+        previous = start
+        for location in route:
+            clock += travel_seconds(distance(previous, location))
+            arrival.append(clock)
+            previous = location
+        latest[:] = [infinity] * len(route)
+        limit = infinity
+        for i in range(len(route) - 1, -1, -1):
+            if i + 1 < len(route):
+                limit -= travel_seconds(distance(route[i], route[i + 1]))
+            limit = min(limit, due[route[i]])
+            latest[i] = limit
+
+    # Name: insertion
+    # Function: Returns the miles added by inserting stop before position,
+    # whether the stop is reached by its deadline, and whether every later
+    # stop still is
+    def insertion(stop: int, position: int) -> tuple[float, bool, bool]:
+        previous = route[position - 1] if position else start
+        reach = (arrival[position - 1] if position else departure) + \
+            travel_seconds(distance(previous, stop))
+        added = distance(previous, stop)
+        if position < len(route):
+            following = route[position]
+            added += distance(stop, following) - distance(previous, following)
+            keeps_others = arrival[position] + travel_seconds(added) <= \
+                latest[position]
+        else:
+            keeps_others = True
+        return added, reach <= due[stop], keeps_others
+
+    timed = sorted((stop for stop in due if due[stop] != infinity),
+                   key=lambda stop: due[stop])
+    untimed = [stop for stop in due if due[stop] == infinity]
+    for group in (timed, untimed):
+        pending = list(group)
+        while pending:
+            best = None
+            for stop in pending:
+                for position in range(len(route) + 1):
+                    added, on_time, keeps_others = insertion(stop, position)
+                    if on_time and keeps_others and \
+                            (best is None or added < best[0]):
+                        best = (added, stop, position)
+
+            if best is None:
+                # No stop fits on time. The most urgent one goes where it
+                # adds the fewest miles, without making other stops late if
+                # possible
+                stop = pending[0]
+                options = []
+                for position in range(len(route) + 1):
+                    added, _, keeps_others = insertion(stop, position)
+                    options.append((not keeps_others, added, position))
+                best = (0.0, stop, min(options)[2])
+
+            _, stop, position = best
+            route.insert(position, stop)
+            pending.remove(stop)
+            update_times()
+
+            # Give up the deadlines of the stops that are now late, so they
+            # do not block the stops inserted after them
+            given_up = [location for location, time in zip(route, arrival)
+                        if time > due[location]]
+            if given_up:
+                for location in given_up:
+                    due[location] = infinity
+                    late.append(location)
+                update_times()
+
+    return route, late
+
+
+# Name: late_stops
+# Function: Returns the stops of a route the truck reaches after their
+# deadline. The truck leaves start at departure, and deadlines maps a stop
+# to the time it must be reached by, both in seconds since midnight
+# Time Complexity: O(n)
+# Space Complexity: O(n)
+def late_stops(matrix: DistanceMatrix, start: int, route: list[int],
+               departure: int, deadlines: dict[int, int]) -> list[int]:
+    distance = matrix.distance
+    late = []
+    clock = departure
+    previous = start
+    for location in route:
+        clock += travel_seconds(distance(previous, location))
+        deadline = deadlines.get(location)
+        if deadline is not None and clock > deadline:
+            late.append(location)
+        previous = location
+    return late
+
+
+# Name: plan_route
+# Function: Returns the order to visit the stops with a routing mode:
+# "nearest", "improve", "exact" or "deadline", and the stops the route
+# reaches after their deadline. The exact solver is only used for at most
+# exact_stop_limit stops, otherwise the nearest neighbor route is improved
+# with local search. The deadline mode uses cheapest insertion with the
+# deadlines of the stops and the time the truck leaves, and reports the
+# stops it could not fit in on time. This only depends on its arguments, so
+# it can run in a worker thread or process
+# Time Complexity: O(n^2) for nearest neighbor, O(2^n * n^2) for exact,
+# O(n^3) for deadline
+# Space Complexity: O(n) for nearest neighbor, O(2^n * n) for exact
+def plan_route(matrix: DistanceMatrix, start: int, stops: list[int],
+               mode: str = "nearest", exact_stop_limit: int = 16,
+               improve_iterations: int = 1000,
+               improve_time_budget: float | None = None,
+               departure: int = 0,
+               deadlines: dict[int, int] | None = None) -> \
+        tuple[list[int], list[int]]:
+    deadlines = deadlines or {}
+    if mode == "deadline":
+        return deadline_insertion_route(matrix, start, stops, departure,
+                                        deadlines)
+
+    if mode == "exact" and len(stops) <= exact_stop_limit:
+        route = held_karp_route(matrix, start, stops)
+    else:
+        route = nearest_neighbor_route(matrix, start, stops)
+        if mode in ("improve", "exact"):
+            route = improve_route(matrix, start, route, improve_iterations,
+                                  improve_time_budget)
+    return route, late_stops(matrix, start, route, departure, deadlines)
@@ -0,0 +1,191 @@
+"""
+Routing quality scoreboard for the WGUPS Routing Program.
+
+Runs every routing strategy on the bundled data and on generated instances,
+and prints the mileage, late packages and run time of each strategy. Run
+from the main directory:
+
+    python scoreboard.py --instances 20 --workers 4 --output runs.csv
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import csv
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from generator import ScenarioSettings, generate_scenario
+from main import END_OF_DAY, Main
+from planner import InfeasibleLoad
+
+# Every strategy, with the settings it gives the program
+STRATEGIES = {
+    "nearest": {"routing_mode": "nearest"},
+    "improve": {"routing_mode": "improve"},
+    "exact": {"routing_mode": "exact"},
+    "multistart": {"routing_mode": "multistart"},
+    "deadline": {"routing_mode": "deadline"},
+}
+
+# The columns of every run, in order
+FIELDS = ["instance", "strategy", "trucks", "drivers", "mileage",
+          "late_packages", "finish_times", "wall_seconds", "cpu_seconds",
+          "infeasible", "error"]
+
+
+# Name: run_strategy
+# Function: Simulates one instance with one strategy and returns a row of
+# the scoreboard. The instance is the data directory, or the generated
+# scenario for the seed if directory is None. An instance whose packages
+# do not fit onto the trucks is marked infeasible, and a strategy that
+# cannot route the instance gets its error instead of results
+# Time Complexity: O(cost of the strategy)
+# Space Complexity: O(n^2 + p)
+def run_strategy(job: tuple) -> dict:
+    name, directory, settings, strategy, trucks, drivers = job
+    row = {"instance": name, "strategy": strategy, "trucks": trucks,
+           "drivers": drivers, "mileage": "", "late_packages": "",
+           "finish_times": "", "wall_seconds": "", "cpu_seconds": "",
+           "infeasible": "", "error": ""}
+
+    with tempfile.TemporaryDirectory() as scratch:
+        if directory is None:
+            directory = scratch
+            generate_scenario(directory, settings)
+        program = Main()
+        program.data_directory = directory
+        program.truck_count = trucks
+        program.drivers = drivers
+        # Late packages are counted in the results instead
+        program.warn_late = False
+        for attribute, value in STRATEGIES[strategy].items():
+            setattr(program, attribute, value)
+
+        try:
+            program.load_data()
+            program.apply_address_corrections(END_OF_DAY)
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            timeline = program.simulate_day()
+            row["wall_seconds"] = round(time.perf_counter() - wall, 6)
+            row["cpu_seconds"] = round(time.process_time() - cpu, 6)
+        except InfeasibleLoad as e:
+            row["infeasible"] = str(e)
+            return row
+        except ValueError as e:
+            row["error"] = str(e)
+            return row
+
+    row["mileage"] = round(timeline.total_distance, 1)
+    row["late_packages"] = len(program.late_packages(timeline))
+    row["finish_times"] = " ".join(str(truck.finish_time)
+                                   for truck in timeline.trucks)
+    return row
+
+
+# Name: build_jobs
+# Function: Returns one job for every strategy on the bundled data and on
+# every generated instance. Generated instances use settings with the seed
+# of the instance, and every job runs trucks trucks with drivers drivers
+# Time Complexity: O(i * s) for i instances and s strategies
+# Space Complexity: O(i * s)
+def build_jobs(data_directory: str | None, instances: int, first_seed: int,
+               settings: ScenarioSettings, strategies: list[str],
+               trucks: int = 3, drivers: int = 2) -> list[tuple]:
+    jobs = []
+    if data_directory is not None:
+        for strategy in strategies:
+            jobs.append(("data", data_directory, None, strategy, trucks,
+                         drivers))
+    for seed in range(first_seed, first_seed + instances):
+        instance = copy.copy(settings)
+        instance.seed = seed
+        for strategy in strategies:
+            jobs.append((f"seed-{seed}", None, instance, strategy, trucks,
+                         drivers))
+    return jobs
+
+
+# Name: summarize
+# Function: Prints one line per strategy with its total and average mileage,
+# late packages, infeasible and failed instances and average run time
+# Time Complexity: O(r) for r rows
+# Space Complexity: O(s) for s strategies
+def summarize(rows: list[dict], strategies: list[str]) -> None:
+    print(f"{'Strategy':<10} {'Runs':>5} {'Infeasible':>11} {'Failed':>7} "
+          f"{'Total miles':>12} {'Avg miles':>10} {'Late':>6} "
+          f"{'Avg wall s':>11} {'Avg CPU s':>10}")
+    for strategy in strategies:
+        runs = [row for row in rows if row["strategy"] == strategy]
+        infeasible = sum(1 for row in runs if row["infeasible"])
+        failed = sum(1 for row in runs if row["error"])
+        done = [row for row in runs
+                if not row["infeasible"] and not row["error"]]
+        count = len(done) or 1
+        miles = sum(row["mileage"] for row in done)
+        print(f"{strategy:<10} {len(runs):>5} {infeasible:>11} {failed:>7} "
+              f"{miles:>12.1f} {miles / count:>10.1f} "
+              f"{sum(row['late_packages'] for row in done):>6} "
+              f"{sum(row['wall_seconds'] for row in done) / count:>11.4f} "
+              f"{sum(row['cpu_seconds'] for row in done) / count:>10.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WGUPS routing scoreboard")
+    parser.add_argument("--strategies", nargs="+", choices=list(STRATEGIES),
+                        default=list(STRATEGIES))
+    parser.add_argument("--instances", type=int, default=20,
+                        help="number of generated instances")
+    parser.add_argument("--seed", type=int, default=1,
+                        help="seed of the first generated instance")
+    parser.add_argument("--locations", type=int, default=27)
+    parser.add_argument("--packages", type=int, default=40)
+    parser.add_argument("--trucks", type=int, default=3,
+                        help="number of trucks (default: 3)")
+    parser.add_argument("--drivers", type=int, default=2,
+                        help="number of drivers (default: 2)")
+    parser.add_argument("--truck-note-rate", type=float, default=0.1,
+                        help="share of generated packages that can only be "
+                             "on one truck")
+    parser.add_argument("--delayed-rate", type=float, default=0.1)
+    parser.add_argument("--wrong-address-rate", type=float, default=0.025)
+    parser.add_argument("--group-rate", type=float, default=0.075)
+    parser.add_argument("--data", metavar="DIR", default="../data",
+                        help="also score this data directory; use '' to skip "
+                             "it (default: ../data)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write every run to FILE as CSV")
+    args = parser.parse_args()
+
+    settings = ScenarioSettings(
+        args.locations, args.packages, truck_note_rate=args.truck_note_rate,
+        delayed_rate=args.delayed_rate,
+        wrong_address_rate=args.wrong_address_rate,
+        group_rate=args.group_rate, trucks=args.trucks)
+    jobs = build_jobs(args.data or None, args.instances, args.seed, settings,
+                      args.strategies, args.trucks, args.drivers)
+    # Results come back in job order, so the output does not depend on
+    # which worker finished first
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        rows = list(executor.map(run_strategy, jobs))
+
+    if args.output:
+        with open(args.output, "w", newline='') as file:
+            writer = csv.DictWriter(file, FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    summarize(rows, args.strategies)
+    for row in rows:
+        if row["infeasible"]:
+            print(f"{row['instance']} ({row['strategy']}) is infeasible: "
+                  f"{row['infeasible']}", file=sys.stderr)
+        if row["error"]:
+            print(f"{row['instance']} ({row['strategy']}): {row['error']}",
+                  file=sys.stderr)
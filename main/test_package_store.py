@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import unittest
+from datetime import timedelta
+
+from main import Main
+from package_store import PackageStore, PackageView
+from replanning import ADDRESS_CHANGE, CANCELLATION, ReplanEvent
+
+
+# Name: day_summary
+# Function: Returns the trucks and the truck, delivery time and status of
+# every package of a simulated day, at the end of the day
+# Time Complexity: O(n)
+# Space Complexity: O(n)
+def day_summary(program: Main) -> tuple:
+    timeline = program.simulate_day()
+    program.apply_timeline(timeline, timedelta(hours=17),
+                           program.package_ids)
+    trucks = [(truck.truck_id, truck.loading_time, truck.finish_time,
+               round(truck.distance_travelled, 6))
+              for truck in timeline.trucks]
+    packages = []
+    for package_id in program.package_ids:
+        package = program.package_hashtable.search(package_id)
+        packages.append((package_id, package.truck_id, package.time_tracker,
+                         package.delivery_status))
+    return trucks, packages
+
+
+# Name: store_program
+# Function: Returns a program that keeps its packages in a PackageStore
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def store_program() -> Main:
+    program = Main()
+    program.package_hashtable = PackageStore()
+    program.updated_package_hashtable = program.package_hashtable
+    return program
+
+
+class PackageStoreTest(unittest.TestCase):
+    # Name: test_simulated_day
+    # Function: Checks that a full simulated day on the store matches the
+    # same day on the package hash table, in every routing mode
+    def test_simulated_day(self) -> None:
+        for mode in ("nearest", "improve", "exact", "deadline"):
+            expected = Main()
+            expected.routing_mode = mode
+            expected.load_data()
+            expected.apply_address_corrections(timedelta(hours=17))
+
+            program = store_program()
+            program.routing_mode = mode
+            program.load_data()
+            program.apply_address_corrections(timedelta(hours=17))
+
+            self.assertIsInstance(program.package_hashtable.search(1),
+                                  PackageView)
+            self.assertEqual(day_summary(program), day_summary(expected))
+
+    # Name: test_insert_updates
+    # Function: Checks that inserting a package id that is already in the
+    # store updates its row, like a hash table
+    def test_insert_updates(self) -> None:
+        program = store_program()
+        program.load_data()
+        store = program.package_hashtable
+        package = store.search(9)
+        package.update_deadline("9:00:00")
+        package.notes = "Checked"
+        store.insert(9, package)
+
+        copy = PackageStore.from_packages([package])
+        copy.search(9).update_address("410 S State St", "Salt Lake City",
+                                      "UT", 84111, 3)
+        store.insert(9, copy.search(9))
+
+        package = store.search(9)
+        self.assertEqual(len(store), 40)
+        self.assertEqual(package.delivery_address, "410 S State St")
+        self.assertEqual(package.location_id, 3)
+        self.assertEqual(package.deadline_seconds, 9 * 3600)
+        self.assertEqual(package.notes, "Checked")
+        self.assertEqual(package, store.search(9))
+
+    # Name: test_replanning
+    # Function: Checks that re-planning an address change and a cancellation
+    # on the store gives the same day as on the package hash table
+    def test_replanning(self) -> None:
+        results = []
+        for program in (Main(), store_program()):
+            program.load_data()
+            program.start_replanning(program.simulate_day())
+            program.update_package_address(9, "410 S State St",
+                                           "Salt Lake City", "UT", 84111)
+            program.replan(ReplanEvent(ADDRESS_CHANGE,
+                                       timedelta(hours=10, minutes=20),
+                                       program.package_hashtable.search(9)))
+            timeline = program.replan(ReplanEvent(
+                CANCELLATION, timedelta(hours=8, minutes=30),
+                program.package_hashtable.search(2)))
+            results.append(([(truck.truck_id, truck.finish_time,
+                              round(truck.distance_travelled, 6))
+                             for truck in timeline.trucks],
+                            [package.package_id for package in
+                             program.find_packages(status="CANCELLED")]))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[1][1], [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
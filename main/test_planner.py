@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import unittest
+from datetime import timedelta
+
+from distances import DistanceMatrix
+from packages import Package
+from planner import TRUCK_MAX_WEIGHT, LoadPlanner
+from trucks import Truck
+
+
+# Name: make_package
+# Function: Returns a package due by the end of day that weighs weight
+# kilograms and is delivered to the location
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def make_package(package_id: int, location_id: int, weight: int) -> Package:
+    return Package(package_id, f"{location_id} Main St", "Salt Lake City",
+                   "UT", 84101, "EOD", weight, "", location_id)
+
+
+class LoadPlannerTest(unittest.TestCase):
+    # Name: setUp
+    # Function: Builds a hub and two packages whose stops are next to each
+    # other. Package 2 is farther from the hub, so it is placed first
+    def setUp(self) -> None:
+        self.matrix = DistanceMatrix.from_lower_triangle([["0"],
+                                                          ["5", "0"],
+                                                          ["6", "1", "0"]])
+        self.packages = [make_package(1, 1, 60), make_package(2, 2, 50)]
+
+    # Name: plan_trucks
+    # Function: Plans the packages onto two trucks and returns the ids of
+    # the packages on each truck
+    def plan_trucks(self, planner: LoadPlanner) -> list[list[int]]:
+        trucks = [Truck(timedelta(hours=8), 1), Truck(timedelta(hours=8), 2)]
+        planner.plan(self.packages, trucks)
+        return [sorted(truck.package_id_collection) for truck in trucks]
+
+    # Name: test_weight_limit
+    # Function: Checks that a package that would put a truck over its weight
+    # limit goes onto another truck
+    def test_weight_limit(self) -> None:
+        self.assertEqual(self.plan_trucks(LoadPlanner(self.matrix, 0)),
+                         [[1, 2], []])
+        self.assertEqual(self.plan_trucks(
+            LoadPlanner(self.matrix, 0, max_weight=100)), [[2], [1]])
+
+    # Name: test_default_weight_limit
+    # Function: Checks that the planner limits weight by default
+    def test_default_weight_limit(self) -> None:
+        self.assertEqual(LoadPlanner(self.matrix, 0).max_weight,
+                         TRUCK_MAX_WEIGHT)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from datetime import timedelta
+from typing import Iterator
+
+from clock import to_seconds
+
+
+class SortedTimes:
+    """
+    The packages of a simulated day sorted by one of their times, i.e. the
+    time they were delivered.
+
+    The times and package ids are kept in two parallel arrays sorted by time
+    (and by package id for equal times). A window of the day is found with
+    two binary searches.
+
+    === Instance Attributes ===
+    times: The times in seconds since midnight, in sorted order
+
+    package_ids: The id of the package at the same position in times
+    """
+    times: array
+    package_ids: array
+
+    # Name: __init__
+    # Function: Initializes sorted times object from a dictionary that maps
+    # a package id to its time in seconds
+    # Time Complexity: O(n log n)
+    # Space Complexity: O(n)
+    def __init__(self, times: dict[int, int]) -> None:
+        pairs = sorted((time, package_id)
+                       for package_id, time in times.items())
+        self.times = array('i', (time for time, _ in pairs))
+        self.package_ids = array('q', (package_id for _, package_id in pairs))
+
+    # Name: positions
+    # Function: Returns the first position at or after start and the first
+    # position at or after end. end None means the end of the day
+    # Time Complexity: O(log n)
+    # Space Complexity: O(1)
+    def positions(self, start: int, end: int | None) -> tuple[int, int]:
+        first = bisect_left(self.times, start)
+        if end is None:
+            return first, len(self.times)
+        return first, max(first, bisect_left(self.times, end))
+
+    # Name: between
+    # Function: Yields the id of every package with a time from start up to
+    # (but not including) end, in order of time
+    # Time Complexity: O(log n + k) for k packages yielded
+    # Space Complexity: O(1)
+    def between(self, start: int, end: int | None) -> Iterator[int]:
+        first, last = self.positions(start, end)
+        package_ids = self.package_ids
+        for position in range(first, last):
+            yield package_ids[position]
+
+    # Name: count_between
+    # Function: Returns the number of packages with a time from start up to
+    # (but not including) end
+    # Time Complexity: O(log n)
+    # Space Complexity: O(1)
+    def count_between(self, start: int, end: int | None) -> int:
+        first, last = self.positions(start, end)
+        return last - first
+
+    # Name: __len__
+    # Function: Returns the number of packages
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def __len__(self) -> int:
+        return len(self.times)
+
+
+class TimeIndex:
+    """
+    Sorted indexes of a simulated day on the time every package is
+    delivered and the time it leaves the hub.
+
+    Windows are half open: a package delivered at exactly 11:00 is counted
+    in the window from 11:00 to 12:00, not in the window from 10:00 to
+    11:00, so windows that follow each other never count a package twice.
+    Queries take a binary search to find the window and then stream its
+    packages, so counting costs O(log n) and listing costs O(log n + k).
+
+    === Instance Attributes ===
+    deliveries: The packages sorted by the time they are delivered.
+    Cancelled packages are left out
+
+    loadings: The packages sorted by the time their truck leaves the hub.
+    Packages cancelled before leaving are left out
+    """
+    deliveries: SortedTimes
+    loadings: SortedTimes
+
+    # Name: __init__
+    # Function: Initializes time index object from dictionaries that map a
+    # package id to the time (in seconds) it is delivered and leaves the hub
+    # Time Complexity: O(n log n)
+    # Space Complexity: O(n)
+    def __init__(self, delivery_times: dict[int, int],
+                 loading_times: dict[int, int]) -> None:
+        self.deliveries = SortedTimes(delivery_times)
+        self.loadings = SortedTimes(loading_times)
+
+    # Name: delivered_between
+    # Function: Yields the id of every package delivered from start up to
+    # (but not including) end, in the order they are delivered. end None
+    # means the end of the day
+    # Time Complexity: O(log n + k) for k packages yielded
+    # Space Complexity: O(1)
+    def delivered_between(self, start: timedelta,
+                          end: timedelta | None = None) -> Iterator[int]:
+        return self.deliveries.between(to_seconds(start), window_end(end))
+
+    # Name: count_delivered_between
+    # Function: Returns the number of packages delivered from start up to
+    # (but not including) end
+    # Time Complexity: O(log n)
+    # Space Complexity: O(1)
+    def count_delivered_between(self, start: timedelta,
+                                end: timedelta | None = None) -> int:
+        return self.deliveries.count_between(to_seconds(start),
+                                             window_end(end))
+
+    # Name: loaded_between
+    # Function: Yields the id of every package whose truck leaves the hub
+    # from start up to (but not including) end, in the order they leave
+    # Time Complexity: O(log n + k) for k packages yielded
+    # Space Complexity: O(1)
+    def loaded_between(self, start: timedelta,
+                       end: timedelta | None = None) -> Iterator[int]:
+        return self.loadings.between(to_seconds(start), window_end(end))
+
+    # Name: count_loaded_between
+    # Function: Returns the number of packages whose truck leaves the hub
+    # from start up to (but not including) end
+    # Time Complexity: O(log n)
+    # Space Complexity: O(1)
+    def count_loaded_between(self, start: timedelta,
+                             end: timedelta | None = None) -> int:
+        return self.loadings.count_between(to_seconds(start),
+                                           window_end(end))
+
+
+# Name: window_end
+# Function: Converts the end of a window to seconds, keeping None (the end
+# of the day) as None
+# Time Complexity: O(1)
+# Space Complexity: O(1)
+def window_end(end: timedelta | None) -> int | None:
+    return None if end is None else to_seconds(end)
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from datetime import timedelta
+from typing import Iterator
+
+from clock import to_seconds
+from packages import Package
+from planner import parse_flight_arrival
+from time_index import TimeIndex
+from trucks import Truck
+
+DELAYED = "DELAYED - ON FLIGHT TO DEPOT"
+AT_THE_HUB = "AT THE HUB"
+EN_ROUTE = "EN ROUTE"
+DELIVERED = "DELIVERED"
+CANCELLED = "CANCELLED"
+
+
+class TruckRecord:
+    """
+    The result of one truck's trip in a simulated day.
+
+    === Instance Attributes ===
+    truck_id: The number of the truck
+
+    loading_time: The time the truck left the hub
+
+    finish_time: The time the truck delivered its last package
+
+    distance_travelled: The number of miles the truck travelled
+
+    package_ids: The ids of the packages loaded onto the truck
+
+    route: The location ids of the stops the truck visited, in order
+    """
+    __slots__ = ('truck_id', 'loading_time', 'finish_time',
+                 'distance_travelled', 'package_ids', 'route')
+
+    truck_id: int
+    loading_time: timedelta
+    finish_time: timedelta
+    distance_travelled: float
+    package_ids: tuple[int, ...]
+    route: tuple[int, ...]
+
+    # Name: __init__
+    # Function: Initializes truck record object from a truck that has
+    # delivered all of its packages
+    # Time Complexity: O(n)
+    # Space Complexity: O(n)
+    def __init__(self, truck: Truck) -> None:
+        self.truck_id = truck.truck_id
+        self.loading_time = truck.loading_time
+        self.finish_time = truck.time_truck
+        self.distance_travelled = truck.distance_travelled
+        self.package_ids = tuple(truck.package_id_collection)
+        self.route = tuple(truck.route)
+
+
+class DeliveryTimeline:
+    """
+    An immutable record of a simulated day.
+
+    For every package the timeline keeps the times its status changes, in
+    seconds since midnight and in sorted order, along with the status it
+    changes to. The status of a package at any time is found with a binary
+    search, so the day only has to be simulated once no matter how many
+    times are looked up. Windows of the day (i.e. every package delivered
+    between 10:00 and 11:00) are answered by a TimeIndex, built the first
+    time one is asked for.
+
+    === Instance Attributes ===
+    trucks: A record of every truck's trip, in the order the trucks were given
+
+    total_distance: The number of miles travelled by all trucks
+
+    === Private Attributes ===
+    _times: Maps a package id to the sorted times its status changes
+
+    _statuses: Maps a package id to the statuses it changes to. The status
+    at _statuses[id][k] starts at _times[id][k]
+
+    _deliveries: Maps a package id to the number of the truck that delivered
+    it and the time it was delivered in seconds, or (None, None) if it was
+    cancelled
+
+    _loadings: Maps a package id to the time its truck leaves the hub in
+    seconds. Packages cancelled before leaving are left out
+
+    _time_index: The sorted index of delivery and loading times, or None
+    until it is first needed
+    """
+    __slots__ = ('trucks', 'total_distance', '_times', '_statuses',
+                 '_deliveries', '_loadings', '_time_index')
+
+    trucks: tuple[TruckRecord, ...]
+    total_distance: float
+    _times: dict[int, array]
+    _statuses: dict[int, tuple[str, ...]]
+    _deliveries: dict[int, tuple[int | None, int | None]]
+    _loadings: dict[int, int]
+    _time_index: TimeIndex | None
+
+    # Name: __init__
+    # Function: Initializes delivery timeline object from packages and trucks
+    # once every truck has delivered its packages
+    # Time Complexity: O(n)
+    # Space Complexity: O(n)
+    def __init__(self, packages: list[Package], trucks: list[Truck]) -> None:
+        self.trucks = tuple(TruckRecord(truck) for truck in trucks)
+        self.total_distance = sum(truck.distance_travelled
+                                  for truck in trucks)
+        self._times = {}
+        self._statuses = {}
+        self._deliveries = {}
+        self._loadings = {}
+        self._time_index = None
+
+        for package in packages:
+            self._record_package(package)
+
+    # Name: _record_package
+    # Function: Records the status changes and the delivery of a package that
+    # has been delivered
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def _record_package(self, package: Package) -> None:
+        times = array('d')
+        statuses = []
+
+        # A delayed package is on its flight until it arrives at the hub
+        arrival = parse_flight_arrival(package.notes)
+        if arrival is not None:
+            times.append(0.0)
+            statuses.append(DELAYED)
+            times.append(arrival.total_seconds())
+        else:
+            times.append(0.0)
+        statuses.append(AT_THE_HUB)
+
+        # A package is still at the hub at the moment its truck leaves and
+        # is en route right after
+        leaves = package.loading_time.total_seconds() + 1
+        delivered = package.delivery_seconds
+        if times[-1] < leaves < delivered:
+            times.append(leaves)
+            statuses.append(EN_ROUTE)
+        times.append(max(delivered, times[-1]))
+        statuses.append(DELIVERED)
+
+        self._times[package.package_id] = times
+        self._statuses[package.package_id] = tuple(statuses)
+        self._deliveries[package.package_id] = (package.truck_id, delivered)
+        self._loadings[package.package_id] = to_seconds(package.loading_time)
+
+    # Name: replace
+    # Function: Returns a copy of the timeline where the trips of some trucks
+    # and the deliveries of some packages are replaced, i.e. after
+    # re-planning. cancelled maps the id of a cancelled package to the time
+    # it was cancelled. It keeps its history up to then, and is never
+    # delivered
+    # Time Complexity: O(n) to copy the timeline, plus O(k) for k replaced
+    # packages and trucks
+    # Space Complexity: O(n)
+    def replace(self, packages: list[Package], trucks: list[Truck],
+                cancelled: dict[int, timedelta] | None = None) -> \
+            DeliveryTimeline:
+        timeline = DeliveryTimeline([], [])
+        records = {record.truck_id: record for record in self.trucks}
+        for truck in trucks:
+            records[truck.truck_id] = TruckRecord(truck)
+        timeline.trucks = tuple(records.values())
+        timeline.total_distance = sum(record.distance_travelled
+                                      for record in timeline.trucks)
+        timeline._times = dict(self._times)
+        timeline._statuses = dict(self._statuses)
+        timeline._deliveries = dict(self._deliveries)
+        timeline._loadings = dict(self._loadings)
+
+        for package in packages:
+            timeline._record_package(package)
+
+        for package_id, time in (cancelled or {}).items():
+            times = timeline._times[package_id]
+            kept = bisect_right(times, time.total_seconds())
+            timeline._times[package_id] = times[:kept] + \
+                array('d', [time.total_seconds()])
+            timeline._statuses[package_id] = \
+                timeline._statuses[package_id][:kept] + (CANCELLED,)
+            timeline._deliveries[package_id] = (None, None)
+            # A package cancelled at the hub never leaves it
+            if timeline._loadings[package_id] >= time.total_seconds():
+                del timeline._loadings[package_id]
+        return timeline
+
+    # Name: status_at
+    # Function: Returns the status of a package at a time of day
+    # Time Complexity: O(log k) for k status changes (at most 4)
+    # Space Complexity: O(1)
+    def status_at(self, package_id: int, time: timedelta) -> str:
+        times = self._times[package_id]
+        index = bisect_right(times, time.total_seconds()) - 1
+        return self._statuses[package_id][max(index, 0)]
+
+    # Name: delivery
+    # Function: Returns the number of the truck that delivers a package and
+    # the time it is delivered. Both are None if the package was cancelled
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def delivery(self, package_id: int) -> tuple[int | None,
+                                                 timedelta | None]:
+        truck_id, delivered = self._deliveries[package_id]
+        if delivered is None:
+            return truck_id, None
+        return truck_id, timedelta(seconds=delivered)
+
+    # Name: delivery_seconds
+    # Function: Returns the time a package is delivered in seconds since
+    # midnight, or None if it was cancelled
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def delivery_seconds(self, package_id: int) -> int | None:
+        return self._deliveries[package_id][1]
+
+    # Name: cancelled_at
+    # Function: Returns the time a package was cancelled, or None if it was
+    # not cancelled
+    # Time Complexity: O(1)
+    # Space Complexity: O(1)
+    def cancelled_at(self, package_id: int) -> timedelta | None:
+        if self._statuses[package_id][-1] != CANCELLED:
+            return None
+        return timedelta(seconds=self._times[package_id][-1])
+
+    # Name: transitions
+    # Function: Returns every (time, status) change of a package in order
+    # Time Complexity: O(k)
+    # Space Complexity: O(k)
+    def transitions(self, package_id: int) -> list[tuple[timedelta, str]]:
+        return [(timedelta(seconds=time), status) for time, status in
+                zip(self._times[package_id], self._statuses[package_id])]
+
+    # Name: time_index
+    # Function: Returns the sorted index of the times packages are delivered
+    # and leave the hub. It is built once, the first time it is needed
+    # Time Complexity: O(n log n) the first time, O(1) after
+    # Space Complexity: O(n)
+    def time_index(self) -> TimeIndex:
+        if self._time_index is None:
+            delivery_times = {package_id: delivered for package_id,
+                              (_, delivered) in self._deliveries.items()
+                              if delivered is not None}
+            self._time_index = TimeIndex(delivery_times, self._loadings)
+        return self._time_index
+
+    # Name: delivered_between
+    # Function: Yields the id of every package delivered from start up to
+    # (but not including) end, in the order they are delivered. end None
+    # means the end of the day
+    # Time Complexity: O(log n + k) for k packages yielded
+    # Space Complexity: O(1)
+    def delivered_between(self, start: timedelta,
+                          end: timedelta | None = None) -> Iterator[int]:
+        return self.time_index().delivered_between(start, end)
+
+    # Name: count_delivered_between
+    # Function: Returns the number of packages delivered from start up to
+    # (but not including) end
+    # Time Complexity: O(log n)
+    # Space Complexity: O(1)
+    def count_delivered_between(self, start: timedelta,
+                                end: timedelta | None = None) -> int:
+        return self.time_index().count_delivered_between(start, end)
+
+    # Name: at_hub
+    # Function: Yields the id of every package at the hub at a time of day,
+    # in the order they leave. Only the packages whose truck has not left
+    # yet are looked at, and the ones still on their flight are skipped
+    # Time Complexity: O(log n + k) for k packages that have not left
+    # Space Complexity: O(1)
+    def at_hub(self, time: timedelta) -> Iterator[int]:
+        for package_id in self.time_index().loaded_between(time):
+            if self.status_at(package_id, time) == AT_THE_HUB:
+                yield package_id
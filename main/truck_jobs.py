@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+from concurrent.futures import (Executor, FIRST_COMPLETED,
+                                ProcessPoolExecutor, wait)
+from typing import Callable
+
+from clock import to_seconds, to_timedelta
+from dispatcher import Dispatcher, return_travel
+from distances import DistanceMatrix
+from matrix_cache import load_map
+from packages import Package
+from routing import late_stops, plan_route
+from trucks import Truck
+
+# The distance matrix of a worker process, set by init_worker
+worker_matrix: DistanceMatrix | None = None
+
+
+# Name: init_worker
+# Function: Loads the distance matrix once when a worker process starts.
+# The matrix comes from the memory-mapped cache, so every worker shares the
+# same physical pages instead of receiving its own copy
+# Time Complexity: O(b) for b bytes in the files
+# Space Complexity: O(1) beyond the shared mapping
+def init_worker(distance_file: str, location_file: str) -> None:
+    global worker_matrix
+    worker_matrix = load_map(distance_file, location_file)[0]
+
+
+# Name: route_in_worker
+# Function: Plans a route with the distance matrix of the worker process.
+# Returns the route and its late stops
+# Time Complexity: O(cost of plan_route)
+# Space Complexity: O(cost of plan_route)
+def route_in_worker(start: int, stops: list[int], settings: tuple,
+                    departure: int, deadlines: dict[int, int]) -> \
+        tuple[list[int], list[int]]:
+    return plan_route(worker_matrix, start, stops, *settings, departure,
+                      deadlines)
+
+
+# Name: route_job
+# Function: Plans the route of a job's truck in this process and returns
+# the route and its late stops. Instrumentation replaces this function to
+# time the planning of every truck
+# Time Complexity: O(cost of plan_route)
+# Space Complexity: O(cost of plan_route)
+def route_job(job: TruckJob, matrix: DistanceMatrix, start: int,
+              settings: tuple) -> tuple[list[int], list[int]]:
+    return plan_route(matrix, start, job.stops, *settings, job.departure,
+                      job.deadlines)
+
+
+# Name: stop_deadlines
+# Function: Returns the earliest deadline (in seconds since midnight) of the
+# packages delivered at each stop. Stops where every package is due by the
+# end of the day are left out
+# Time Complexity: O(n)
+# Space Complexity: O(n)
+def stop_deadlines(packages: list[Package]) -> dict[int, int]:
+    deadlines = {}
+    for package in packages:
+        deadline = package.deadline_seconds
+        if deadline is not None:
+            deadlines[package.location_id] = min(
+                deadline, deadlines.get(package.location_id, deadline))
+    return deadlines
+
+
+class TruckJob:
+    """
+    Routing and delivering the packages of one truck.
+
+    A job leaves once a driver is available at the hub, but never before its
+    truck's loading time or its ready time.
+
+    === Instance Attributes ===
+    truck: The loaded truck
+
+    ready_time: The earliest time the truck's packages are ready to leave
+    the hub, in seconds since midnight
+
+    stops: The locations the truck visits, in the order its packages were
+    loaded
+
+    deadlines: Maps a stop to the earliest deadline of the packages
+    delivered there, in seconds since midnight. Stops where every package is
+    due by the end of the day are left out
+
+    driver: The number of the driver of the truck, or None until the truck
+    leaves
+
+    departure: The time the truck leaves the hub in seconds since midnight,
+    or None until it leaves
+    """
+    truck: Truck
+    ready_time: int
+    stops: list[int]
+    deadlines: dict[int, int]
+    driver: int | None
+    departure: int | None
+
+    # Name: __init__
+    # Function: Initializes truck job object
+    # Time Complexity: O(n)
+    # Space Complexity: O(n)
+    def __init__(self, truck: Truck, ready_time: int = 0) -> None:
+        self.truck = truck
+        self.ready_time = ready_time
+        self.stops = list(dict.fromkeys(
+            package.location_id for package in truck.package_collection))
+        self.deadlines = stop_deadlines(truck.package_collection)
+        self.driver = None
+        self.departure = None
+
+
+# Name: wait_for_driver
+# Function: Adds a job to the trucks waiting for a driver. It can leave no
+# earlier than its truck's loading time and its ready time
+# Time Complexity: O(log j) for j waiting jobs
+# Space Complexity: O(1)
+def wait_for_driver(job: TruckJob, dispatcher: Dispatcher) -> None:
+    dispatcher.add_truck(max(to_seconds(job.truck.loading_time),
+                             job.ready_time),
+                         job.truck.truck_id, job)
+
+
+# Name: depart
+# Function: Gives the first available driver to the waiting job that is
+# ready first, sets the time its truck leaves the hub, and loads its
+# packages at that time. Returns the job
+# Time Complexity: O(n + log d + log j) for d drivers and j waiting jobs
+# Space Complexity: O(1)
+def depart(dispatcher: Dispatcher) -> TruckJob:
+    job, job.driver, job.departure = dispatcher.dispatch()
+    truck = job.truck
+    truck.loading_time = to_timedelta(job.departure)
+    truck.time_truck = truck.loading_time
+    for package in truck.package_collection:
+        package.loading_time = truck.loading_time
+    return job
+
+
+# Name: finish
+# Function: Ends a truck's trip once it has delivered its packages. If
+# return_to_hub is True, the truck drives back to the hub and the miles and
+# time are added to its trip. The driver is then available again
+# Time Complexity: O(log d)
+# Space Complexity: O(1)
+def finish(job: TruckJob, dispatcher: Dispatcher, matrix: DistanceMatrix,
+           start: int, return_to_hub: bool) -> None:
+    truck = job.truck
+    finish_time = to_seconds(truck.time_truck)
+    if return_to_hub:
+        miles, travel = return_travel(matrix, start, truck.route)
+        truck.distance_travelled += miles
+        finish_time += travel
+        truck.time_truck = to_timedelta(finish_time)
+    dispatcher.release(job.driver, finish_time)
+
+
+# Name: run_truck_jobs
+# Function: Dispatches, routes and delivers every job. Whenever a driver is
+# available, they take the waiting truck that is ready first (the lowest
+# truck id breaks ties). A job's route is planned as soon as it has a
+# driver, so trucks on the road at the same time are routed at the same
+# time on the executor.
+# Each route is then delivered with deliver(truck, route, late) in this
+# thread, where late holds the stops the route reaches after their deadline.
+# A job only takes a driver once no truck still on the road can return
+# before that driver is available, and jobs that finish together are
+# delivered in the order they left, so the result does not depend on the
+# timing of the workers. Without an executor, or when routes already
+# holds every truck's route, the jobs run one at a time
+# Time Complexity: O(sum of the routing costs + j log d) for j jobs and d
+# drivers, with the routing divided among the workers
+# Space Complexity: O(j + d)
+def run_truck_jobs(jobs: list[TruckJob], matrix: DistanceMatrix, start: int,
+                   settings: tuple,
+                   deliver: Callable[[Truck, list[int], list[int]], None],
+                   executor: Executor | None = None,
+                   routes: dict[int, list[int]] | None = None,
+                   drivers: int = 2, return_to_hub: bool = False) -> None:
+    dispatcher = Dispatcher(drivers)
+    for job in jobs:
+        wait_for_driver(job, dispatcher)
+
+    if executor is None or routes is not None:
+        while dispatcher.waiting():
+            job = depart(dispatcher)
+            if routes is not None:
+                route = routes[job.truck.truck_id]
+                late = late_stops(matrix, start, route, job.departure,
+                                  job.deadlines)
+            else:
+                route, late = route_job(job, matrix, start, settings)
+            deliver(job.truck, route, late)
+            finish(job, dispatcher, matrix, start, return_to_hub)
+        return
+
+    running = {}
+    # The order jobs left in
+    order = {}
+
+    # Name: submit_ready_jobs
+    # Function: Gives drivers to waiting jobs while the next driver is
+    # certain to be available before any truck on the road returns
+    def submit_ready_jobs() -> None:
+        while dispatcher.waiting():
+            available = dispatcher.next_available()
+            if available is None:
+                return
+            # A truck returns no earlier than it left, so a driver who is
+            # available before every truck on the road left is next
+            if running and available >= min(job.departure
+                                            for job in running.values()):
+                return
+            job = depart(dispatcher)
+            order[id(job)] = len(order)
+            if isinstance(executor, ProcessPoolExecutor):
+                future = executor.submit(route_in_worker, start, job.stops,
+                                         settings, job.departure,
+                                         job.deadlines)
+            else:
+                future = executor.submit(route_job, job, matrix, start,
+                                         settings)
+            running[future] = job
+
+    submit_ready_jobs()
+    while running:
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in sorted(done, key=lambda item: order[id(running[item])]):
+            job = running.pop(future)
+            deliver(job.truck, *future.result())
+            finish(job, dispatcher, matrix, start, return_to_hub)
+        submit_ready_jobs()
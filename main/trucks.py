@@ -11,6 +11,8 @@ class Truck:
     A truck that carries packages to their destination.
 
     === Instance Attributes ===
+    truck_id: The number of the truck (i.e. 2 for truck 2)
+
     packaage_collection: A list of packages currently loaded on the truck
 
     package_id_collection: A list of the id numbers of the packages originally
@@ -20,6 +22,8 @@ class Truck:
     depending on which packages remain on the truck as it goes through the
     delivery process
 
+    route: The location ids of the stops the truck visits, in order
+
     distance_travelled: The number of miles travelled by the truck between the
     beginning of the trip and the end of day.
 
@@ -31,7 +35,7 @@ class Truck:
 
 
     === Representation Invariants ===
-    - There are only two drivers available at any time.
+    - There are only as many trucks in transit as there are drivers.
     - A truck that is in transit must always have one driver.
     - A truck can carry a maximum of 16 packages.
     - Trucks can not leave the hub before 8:00 a.m.
@@ -40,9 +44,11 @@ class Truck:
     """
     # Class Attributes
 
+    truck_id: int
     package_collection: list[Package]
     package_id_collection: list[int]
     package_visual_collection: list[int]
+    route: list[int]
     distance_travelled: float
     time_truck: timedelta
     loading_time = timedelta
@@ -51,17 +57,20 @@ class Truck:
     # Function: Initializes truck object
     # Time Complexity: O(1)
     # Space Complexity: O(1)
-    def __init__(self, time_truck: timedelta = timedelta(hours=8, minutes=0)):
+    def __init__(self, time_truck: timedelta = timedelta(hours=8, minutes=0),
+                 truck_id: int = 0):
         """
         Initialize truck.
 
-        The constructor for the Truck class is a no-argument constructor that
-        will be called when a Truck object is created.
+        The constructor for the Truck class takes the time the truck leaves
+        the hub and the number of the truck. Both have default values.
         """
+        self.truck_id = truck_id
         self.package_collection = []
         self.package_id_collection = []  # Will be for updating package status
         # Used to visualize packages removed from truck in debugger
         self.package_visual_collection = []
+        self.route = []
         self.distance_travelled = 0.0
         # This attribute tracks the time on the truck as it delivers each pkg
         # It results in the time the truck is done delivering all packages
@@ -77,7 +86,8 @@ class Truck:
     # Space Complexity: O(1)
     def __str__(self):
 
-        return (f"Package Collection: {len(self.package_collection)}, "
+        return (f"Truck ID: {self.truck_id}, "
+                f"Package Collection: {len(self.package_collection)}, "
                 f"Package IDs: {self.package_id_collection}, "
                 f"Distance Travelled: {self.distance_travelled}, "
                 f"Loading Time: {self.loading_time}, "
@@ -88,7 +98,8 @@ class Truck:
     # Time Complexity: O(1)
     # Space Complexity: O(1)
     def __repr__(self):
-        return (f"package_collection={self.package_collection}, "
+        return (f"truck_id={self.truck_id}, "
+                f"package_collection={self.package_collection}, "
                 f"package_id_collection={self.package_id_collection}, "
                 f"package_visual_collection={self.package_visual_collection}, "
                 f"distance_travelled={self.distance_travelled}, "